@@ -7,9 +7,10 @@ Downloads external flash texts from multiple TLDs and generates SQL updates
 import os
 import sys
 import json
-import requests
 from typing import Dict, List, Optional
 
+from flash_texts import fetch_external_texts
+
 # Configuration
 TLDS = ['com.br', 'com.tr', 'com', 'de', 'es', 'fi', 'fr', 'it', 'nl']
 PRIORITY_ORDER = ['de', 'com', 'nl', 'fi', 'es', 'fr', 'com.br', 'com.tr']
@@ -77,28 +78,25 @@ def parse_flash_texts(content: str) -> Dict[str, str]:
     return result
 
 
-def download_external_texts(tlds: List[str]) -> Dict[str, Dict[str, str]]:
-    """Download external_flash_texts from all TLDs"""
-    log("Starting download of external_flash_texts from TLDs")
+def download_external_texts(tlds: List[str], offline: bool = False) -> Dict[str, Dict[str, str]]:
+    """Download external_flash_texts from all TLDs (concurrently, revalidating the cache)"""
+    log("Starting download of external_flash_texts from TLDs" + (" (offline, cache only)" if offline else ""))
     
     texts_by_tld = {}
     
-    for tld in tlds:
-        url = f"https://www.habbo.{tld}/gamedata/external_flash_texts/0"
-        log(f"Downloading from {tld}: {url}")
-        
-        try:
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            
-            parsed_texts = parse_flash_texts(response.text)
-            texts_by_tld[tld] = parsed_texts
-            
-            log(f"Successfully downloaded {len(parsed_texts)} entries from {tld}")
-            
-        except requests.exceptions.RequestException as e:
-            log_error(f"Failed to download from {tld}: {e}")
+    for tld, result in fetch_external_texts(tlds, offline=offline).items():
+        if result.text is None:
+            log_error(f"Failed to download from {tld}: {result.detail}")
             texts_by_tld[tld] = {}
+            continue
+        
+        if result.status == 'stale':
+            log_warning(f"Download from {tld} failed, using cached copy: {result.detail}")
+        
+        parsed_texts = parse_flash_texts(result.text)
+        texts_by_tld[tld] = parsed_texts
+        
+        log(f"Loaded {len(parsed_texts)} entries from {tld} ({result.status})")
     
     return texts_by_tld
 
@@ -265,22 +263,27 @@ def main():
     """Main execution function"""
     # Parse command line arguments
     force_update = False
+    offline = False
     
-    if len(sys.argv) > 1:
-        if sys.argv[1] in ['--force', '-f']:
+    for arg in sys.argv[1:]:
+        if arg in ['--force', '-f']:
             force_update = True
-        elif sys.argv[1] in ['--help', '-h']:
-            print("Usage: python script.py [--force|-f]")
+        elif arg == '--offline':
+            offline = True
+        elif arg in ['--help', '-h']:
+            print("Usage: python script.py [--force|-f] [--offline]")
             print("  --force, -f    Force update all values, ignoring local cache")
+            print("  --offline      Use cached external texts only (see flash_texts.py)")
             print("  --help, -h     Show this help message")
             return
         else:
-            log_error(f"Unknown argument: {sys.argv[1]}")
+            log_error(f"Unknown argument: {arg}")
             print("Use --help for usage information")
             return
     
     log("=== Habbo Badge Name Updater Started ===")
     log(f"Force update mode: {force_update}")
+    log(f"Offline mode: {offline}")
     
     # Step 1: List all badge files
     badge_keys = list_badge_files(ALBUM_PATH)
@@ -290,7 +293,7 @@ def main():
         return
     
     # Step 2: Download external texts from all TLDs
-    tld_data = download_external_texts(TLDS)
+    tld_data = download_external_texts(TLDS, offline)
     
     # Step 3: Load local JSON
     local_data = load_local_json(LOCAL_JSON_PATH)
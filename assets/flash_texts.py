@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Shared fetcher for the external_flash_texts of every Habbo TLD.
+Downloads all TLDs at once over a bounded thread pool and keeps each
+response in a disk cache, revalidated with ETag / Last-Modified, so a
+run where nothing changed costs one round of 304s.
+
+Used by badge_name_update.py and translation/external_text.py:
+
+    results = fetch_external_texts(TLDS)           # {tld: FetchResult}
+    text = results['de'].text                      # None if unavailable
+
+    python flash_texts.py                          # fetch and show what happened
+    python flash_texts.py --offline                # cache only, no network
+
+tests/test_flash_texts.py runs it against a local stand-in server.
+
+Environment:
+    HABBO_GAMEDATA_URL   URL template with {tld}, e.g. a mirror or test server
+                         (default https://www.habbo.{tld}/gamedata/external_flash_texts/0)
+    FLASH_TEXTS_CACHE    cache directory (default assets/.cache/external_flash_texts)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+import requests
+
+TLDS = ['com.br', 'com.tr', 'com', 'de', 'es', 'fi', 'fr', 'it', 'nl']
+DEFAULT_URL = 'https://www.habbo.{tld}/gamedata/external_flash_texts/0'
+DEFAULT_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'external_flash_texts')
+WORKERS = 4
+TIMEOUT = 30
+
+
+class FetchResult(NamedTuple):
+    """Outcome for one TLD."""
+    tld: str
+    text: Optional[str]  # None when neither the server nor the cache had it
+    status: str          # downloaded, not modified, cached (offline), stale (server failed), failed
+    detail: str = ''
+
+
+def _write_atomic(path: str, data: str) -> None:
+    """Write a file through a temp file and rename, so readers never see half of it."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _read_cache(cache_dir: str, tld: str):
+    """(cached text or None, cache metadata) for one TLD."""
+    try:
+        with open(os.path.join(cache_dir, f'{tld}.txt'), 'r', encoding='utf-8') as f:
+            text = f.read()
+        with open(os.path.join(cache_dir, f'{tld}.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None, {}
+    return text, meta
+
+
+def _write_cache(cache_dir: str, tld: str, text: str, meta: Dict) -> None:
+    os.makedirs(cache_dir, exist_ok=True)
+    _write_atomic(os.path.join(cache_dir, f'{tld}.txt'), text)
+    _write_atomic(os.path.join(cache_dir, f'{tld}.json'), json.dumps(meta, indent=2))
+
+
+def fetch_one(tld: str, url: str, cache_dir: str, offline: bool = False,
+              timeout: float = TIMEOUT) -> FetchResult:
+    """Fetch one TLD's texts, revalidating the cached copy when there is one."""
+    cached, meta = _read_cache(cache_dir, tld)
+    if offline:
+        if cached is None:
+            return FetchResult(tld, None, 'failed', f'offline and not cached in {cache_dir}')
+        return FetchResult(tld, cached, 'cached', f"fetched {meta.get('fetched', 'at an unknown time')}")
+
+    headers = {}
+    if cached is not None and meta.get('url') == url:
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304 and headers:
+            return FetchResult(tld, cached, 'not modified')
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        if cached is not None:
+            return FetchResult(tld, cached, 'stale', str(e))
+        return FetchResult(tld, None, 'failed', str(e))
+
+    text = response.text
+    detail = f'{len(response.content)} bytes'
+    try:
+        _write_cache(cache_dir, tld, text, {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+    except OSError as e:
+        detail += f', not cached: {e}'
+    return FetchResult(tld, text, 'downloaded', detail)
+
+
+def fetch_external_texts(tlds: List[str] = TLDS, base_url: str = None, cache_dir: str = None,
+                         offline: bool = False, workers: int = WORKERS,
+                         timeout: float = TIMEOUT) -> Dict[str, FetchResult]:
+    """
+    Fetch external_flash_texts for every TLD concurrently (at most `workers`
+    requests at a time). Results keep the order of `tlds`.
+    """
+    base_url = base_url or os.environ.get('HABBO_GAMEDATA_URL') or DEFAULT_URL
+    cache_dir = cache_dir or os.environ.get('FLASH_TEXTS_CACHE') or DEFAULT_CACHE
+    if not tlds:
+        return {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tlds)))) as pool:
+        results = pool.map(
+            lambda tld: fetch_one(tld, base_url.format(tld=tld), cache_dir, offline, timeout), tlds)
+        return {result.tld: result for result in results}
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Fetch external_flash_texts for every TLD into the cache.")
+    parser.add_argument('--offline', action='store_true', help='use only the cache, no network')
+    parser.add_argument('--base-url', help=f'URL template with {{tld}} (default {DEFAULT_URL})')
+    parser.add_argument('--cache', help=f'cache directory (default {DEFAULT_CACHE})')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='concurrent downloads')
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    results = fetch_external_texts(TLDS, args.base_url, args.cache, args.offline, args.workers)
+    for result in results.values():
+        size = f'{len(result.text)} chars' if result.text is not None else 'no text'
+        print(f"[INFO] {result.tld:7s} {result.status:13s} {size}" + (f' - {result.detail}' if result.detail else ''))
+    print(f"[INFO] {len(results)} TLDs in {time.monotonic() - started:.1f}s")
+    if any(result.text is None for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
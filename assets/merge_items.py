@@ -2,12 +2,40 @@
 """
 Merge roomitemtypes.json and wallitemtypes.json into FurnitureData.json
 Checks for duplicate IDs and logs warnings for existing entries.
+
+FurnitureData.json is streamed, never loaded whole: furnitype entries are
+decoded one at a time (JsonStream) and written straight back out
+(JsonWriter), so memory holds the id sets plus about two read chunks.
+Output goes to a temp file next to the target and is renamed into place,
+leaving the old file intact if the run fails.
+
+Merging first hashes every existing entry (entry_hash) and compares the
+source items against those hashes, so a run with nothing new to add ends
+there and leaves FurnitureData.json untouched.  The summary lists what was
+added, and the fields of source items that differ from the existing entry.
+
+    python merge_items.py                          # merge into FurnitureData.json
+    python merge_items.py extract [OTHER]          # items missing from OTHER
+    python merge_items.py diff OLD NEW [REPORT]    # added / removed / changed
+
+diff compares two FurnitureData versions by id (an entry without one by
+classname): one pass indexes OLD, a second streams NEW against it.  It
+prints one line per added or removed furnitype and the changed fields,
+old -> new, of the others; an entry whose id changed but whose classname
+did not shows up as changed.  REPORT also writes the diff as JSON.
 """
 
+import hashlib
 import json
 import logging
+import os
+import re
+import shutil
+import tempfile
+from collections import Counter
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from typing import Dict, List, Set
+from typing import Dict, Iterable, Iterator, List, Set, TextIO, Tuple
 
 # Configure logging
 logging.basicConfig(
@@ -17,56 +45,293 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+CHUNK_SIZE = 1 << 20  # characters read at a time
+WHITESPACE = re.compile(r'[ \t\r\n]*')
+NUMBER_CHARS = frozenset('0123456789+-.eE')
+SECTIONS = ('roomitemtypes', 'wallitemtypes')
+
+
+class JsonStream:
+    """
+    Incremental reader for one JSON document.
+    Walks objects and arrays member by member and decodes only the values
+    asked for, reading the file CHUNK_SIZE characters at a time.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        """Append the next chunk to the unread part of the buffer; False at end of file."""
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
 
-def load_json(filepath: str) -> Dict | List:
-    """Load JSON data from file."""
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)."""
+        while True:
+            buf = self.buf
+            pos = self.pos = WHITESPACE.match(buf, self.pos).end()
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ''
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"Invalid JSON in {getattr(self.f, 'name', 'stream')}: {message}")
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise self._error(f"expected {char!r}, found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self, raw: bool = False):
+        """Decode the next complete value; with raw, (value, its JSON text)."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError as e:
+                if self._fill():
+                    continue
+                raise self._error(e.msg) from None
+            # A number cut by the chunk boundary ("3." or "2.5e") decodes
+            # to its shorter prefix: read on until something else follows it.
+            if (isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and (end == len(self.buf) or self.buf[end] in NUMBER_CHARS) and self._fill()):
+                continue
+            start, self.pos = self.pos, end
+            return (value, self.buf[start:end]) if raw else value
+
+    def members(self) -> Iterator[str]:
+        """
+        Yield the keys of the object that comes next.
+        Each member's value must be read (value(), members() or elements())
+        before asking for the next key.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.peek() != ',':
+                self.expect('}')
+                return
+            self.pos += 1
+
+    def elements(self, raw: bool = False) -> Iterator:
+        """Yield the decoded elements of the array that comes next, one at a time."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value(raw)
+            if self.peek() != ',':
+                self.expect(']')
+                return
+            self.pos += 1
+
+
+def dump_at(value, level: int) -> str:
+    """json.dumps(value, indent=2) for a value nested `level` deep in an indent=2 document."""
+    return json.dumps(value, indent=2, ensure_ascii=False).replace('\n', '\n' + '  ' * level)
+
+
+class JsonWriter:
+    """
+    One object or array of an indent=2 document, written member by member.
+    The output is byte-for-byte what json.dump(..., indent=2) writes.
+    """
+
+    def __init__(self, out: TextIO, level: int = 1, brackets: str = '{}'):
+        self.out = out
+        self.level = level
+        self.brackets = brackets
+        self.count = 0
+
+    def _next(self) -> None:
+        self.out.write(',\n' if self.count else self.brackets[0] + '\n')
+        self.out.write('  ' * self.level)
+        self.count += 1
+
+    def add(self, value) -> None:
+        """Append an array element."""
+        self._next()
+        self.out.write(dump_at(value, self.level))
+
+    def key(self, name: str) -> None:
+        """Start an object member; its value is written next."""
+        self._next()
+        self.out.write(json.dumps(name, ensure_ascii=False) + ': ')
+
+    def put(self, name: str, value) -> None:
+        self.key(name)
+        self.out.write(dump_at(value, self.level))
+
+    def child(self, brackets: str) -> 'JsonWriter':
+        return JsonWriter(self.out, self.level + 1, brackets)
+
+    def close(self) -> None:
+        if self.count:
+            self.out.write('\n' + '  ' * (self.level - 1) + self.brackets[1])
+        else:
+            self.out.write(self.brackets)
+
+
+@contextmanager
+def open_json(filepath: str) -> Iterator[JsonStream]:
+    """Open a JSON file for streaming."""
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        f = open(filepath, 'r', encoding='utf-8')
     except FileNotFoundError:
         logger.error(f"File not found: {filepath}")
         raise
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in {filepath}: {e}")
-        raise
+    with f:
+        yield JsonStream(f)
 
 
-def save_json(filepath: str, data: Dict) -> None:
-    """Save JSON data to file with indentation."""
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+@contextmanager
+def atomic_write(filepath: str) -> Iterator[TextIO]:
+    """Write to a temp file next to filepath, renamed over it only on success."""
+    path = Path(filepath)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f'.{path.name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as out:
+            yield out
+        try:
+            shutil.copymode(path, tmp)
+        except FileNotFoundError:
+            os.chmod(tmp, 0o644)  # mkstemp's 0600 would hide it from nginx
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
     logger.info(f"Successfully saved merged data to {filepath}")
 
 
-def get_item_info(item: Dict) -> str:
-    """Get item identification string for logging."""
-    classname = item.get('classname', 'N/A')
-    name = item.get('name', 'N/A')
-    item_id = item.get('id', 'N/A')
-    return f"ID: {item_id}, Classname: {classname}, Name: {name}"
+def iter_items(filepath: str) -> Iterator[Dict]:
+    """Yield the entries of a roomitemtypes.json / wallitemtypes.json list one at a time."""
+    with open_json(filepath) as stream:
+        yield from stream.elements()
 
 
-def check_duplicates_in_list(items: List[Dict], item_type: str) -> Set:
-    """Check for duplicate IDs within a list and return set of IDs."""
-    id_map = {}
-    duplicate_ids = set()
-    
+def iter_furnitypes(filepath: str, raw: bool = False) -> Iterator[Tuple]:
+    """
+    Yield (section, item) for every furnitype of a FurnitureData file, one at a time.
+    With raw, (section, item, the item's JSON text as it appears in the file).
+    """
+    with open_json(filepath) as stream:
+        for section in stream.members():
+            if section not in SECTIONS:
+                stream.value()
+                continue
+            for key in stream.members():
+                if key != 'furnitype':
+                    stream.value()
+                    continue
+                for element in stream.elements(raw):
+                    yield (section, *element) if raw else (section, element)
+
+
+def entry_hash(item: Dict) -> bytes:
+    """Hash of an entry's content, independent of key order and formatting."""
+    canonical = json.dumps(item, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=8).digest()
+
+
+def changed_fields(old: Dict, new: Dict) -> List[str]:
+    """Names of the fields whose values differ between two versions of an entry."""
+    missing = object()
+    return sorted(k for k in old.keys() | new.keys() if old.get(k, missing) != new.get(k, missing))
+
+
+def format_ids(ids: Iterable, limit: int = 8) -> str:
+    """Compact listing of ids for the summary: '1-5, 9, 12-14, ... (+40 more)'."""
+    ints = sorted({i for i in ids if isinstance(i, int) and not isinstance(i, bool)})
+    others = sorted({str(i) for i in ids if i is not None and not isinstance(i, int)})
+    runs = []
+    for i in ints:
+        if runs and i == runs[-1][1] + 1:
+            runs[-1][1] = i
+        else:
+            runs.append([i, i])
+    parts = [str(a) if a == b else f"{a}-{b}" for a, b in runs] + others
+    if len(parts) > limit:
+        return ', '.join(parts[:limit]) + f", ... (+{len(parts) - limit} more)"
+    return ', '.join(parts)
+
+
+class SectionReport:
+    """What a run did with one section's items, logged as a few lines rather than one per item."""
+
+    def __init__(self, label: str):
+        self.label = label
+        self.added = []
+        self.unchanged = 0
+        self.changed = {}  # id -> names of the fields that differ
+        self.skipped = {}  # reason -> [ids]
+
+    def skip(self, reason: str, item_id) -> None:
+        self.skipped.setdefault(reason, []).append(item_id)
+
+    @property
+    def skipped_count(self) -> int:
+        return self.unchanged + len(self.changed) + sum(len(ids) for ids in self.skipped.values())
+
+    def log(self) -> None:
+        parts = [f"{len(self.added)} added"]
+        if self.added:
+            parts[0] += f" ({format_ids(self.added)})"
+        if self.unchanged:
+            parts.append(f"{self.unchanged} unchanged")
+        for reason, ids in self.skipped.items():
+            listed = format_ids(ids)
+            parts.append(f"{len(ids)} {reason}" + (f" ({listed})" if listed else ''))
+        logger.info(f"{self.label} items: {', '.join(parts)}")
+        if self.changed:
+            counts = Counter(field for fields in self.changed.values() for field in fields)
+            fields = ', '.join(f"{field} x{n}" for field, n in counts.most_common())
+            logger.warning(f"{self.label} items that differ from the existing entry (not applied): "
+                           f"{len(self.changed)} ({format_ids(self.changed)}); fields: {fields}")
+
+
+def check_duplicates(items: Iterable[Dict], item_type: str) -> Set:
+    """Check for duplicate IDs in a stream of items and return the set of IDs."""
+    ids = set()
+    duplicates = []
+
     for item in items:
         item_id = item.get('id')
         if item_id is None:
             continue
-            
-        if item_id in id_map:
-            if item_id not in duplicate_ids:
-                # Log the first occurrence
-                logger.warning(f"Duplicate ID found in source {item_type}: {get_item_info(id_map[item_id])}")
-                duplicate_ids.add(item_id)
-            # Log the duplicate
-            logger.warning(f"Duplicate ID found in source {item_type}: {get_item_info(item)}")
+
+        if item_id in ids:
+            duplicates.append(item_id)
         else:
-            id_map[item_id] = item
-    
-    return set(id_map.keys())
+            ids.add(item_id)
+
+    if duplicates:
+        logger.warning(f"Duplicate IDs found in {item_type}: {len(duplicates)} ({format_ids(duplicates)})")
+    return ids
 
 
 def merge_into_furniture_data(
@@ -76,103 +341,116 @@ def merge_into_furniture_data(
 ) -> None:
     """
     Merge room and wall item types into FurnitureData.json.
-    Only adds items with IDs that don't already exist.
+    Only adds items with IDs that don't already exist. Existing entries are
+    compared by content hash; when there is nothing to add the file is not
+    rewritten, so its caches stay valid.
     """
     logger.info("Starting furniture data merge (INTO FurnitureData.json)...")
-    
-    # Load all files
-    logger.info(f"Loading {roomitems_file}...")
-    roomitems = load_json(roomitems_file)
-    
-    logger.info(f"Loading {wallitems_file}...")
-    wallitems = load_json(wallitems_file)
-    
-    logger.info(f"Loading {furniture_data_file}...")
-    furniture_data = load_json(furniture_data_file)
-    
-    # Ensure proper structure exists
-    if 'roomitemtypes' not in furniture_data:
-        furniture_data['roomitemtypes'] = {'furnitype': []}
-    if 'furnitype' not in furniture_data['roomitemtypes']:
-        furniture_data['roomitemtypes']['furnitype'] = []
-        
-    if 'wallitemtypes' not in furniture_data:
-        furniture_data['wallitemtypes'] = {'furnitype': []}
-    if 'furnitype' not in furniture_data['wallitemtypes']:
-        furniture_data['wallitemtypes']['furnitype'] = []
-    
-    # Check for duplicates in source files
-    logger.info("Checking for duplicates in source files...")
-    check_duplicates_in_list(roomitems, "roomitemtypes.json")
-    check_duplicates_in_list(wallitems, "wallitemtypes.json")
-    
-    # Get existing IDs from furniture_data
-    existing_room_ids = {
-        item.get('id') for item in furniture_data['roomitemtypes']['furnitype']
-        if item.get('id') is not None
-    }
-    existing_wall_ids = {
-        item.get('id') for item in furniture_data['wallitemtypes']['furnitype']
-        if item.get('id') is not None
-    }
-    
-    # Merge room items
-    logger.info("Merging room items...")
-    room_added = 0
-    room_skipped = 0
-    
-    for item in roomitems:
-        item_id = item.get('id')
-        
-        if item_id is None:
-            logger.warning(f"Skipping room item with null ID: {get_item_info(item)}")
-            room_skipped += 1
-            continue
-        
-        if item_id in existing_room_ids:
-            logger.warning(f"Room item ID already exists, skipping: {get_item_info(item)}")
-            room_skipped += 1
-            continue
-        
-        furniture_data['roomitemtypes']['furnitype'].append(item)
-        existing_room_ids.add(item_id)
-        room_added += 1
-    
-    # Merge wall items
-    logger.info("Merging wall items...")
-    wall_added = 0
-    wall_skipped = 0
-    
-    for item in wallitems:
-        item_id = item.get('id')
-        
-        if item_id is None:
-            logger.warning(f"Skipping wall item with null ID: {get_item_info(item)}")
-            wall_skipped += 1
-            continue
-        
-        if item_id in existing_wall_ids:
-            logger.warning(f"Wall item ID already exists, skipping: {get_item_info(item)}")
-            wall_skipped += 1
-            continue
-        
-        furniture_data['wallitemtypes']['furnitype'].append(item)
-        existing_wall_ids.add(item_id)
-        wall_added += 1
-    
-    # Save merged data
-    save_json(furniture_data_file, furniture_data)
-    
+    sources = {'roomitemtypes': roomitems_file, 'wallitemtypes': wallitems_file}
+    reports = {'roomitemtypes': SectionReport('Room'), 'wallitemtypes': SectionReport('Wall')}
+    for filepath in (roomitems_file, wallitems_file, furniture_data_file):
+        if not Path(filepath).is_file():
+            logger.error(f"File not found: {filepath}")
+            raise FileNotFoundError(filepath)
+
+    # Hash pass: content hash of every existing entry, by id
+    logger.info(f"Hashing {furniture_data_file}...")
+    hashes = {section: {} for section in SECTIONS}
+    for section, item in iter_furnitypes(furniture_data_file):
+        if item.get('id') is not None:
+            hashes[section][item.get('id')] = entry_hash(item)
+
+    # Compare the source files against it
+    logger.info("Comparing source files...")
+    to_add = {section: set() for section in SECTIONS}
+    differing = {section: {} for section in SECTIONS}  # id -> source entry
+    for section, filepath in sources.items():
+        report = reports[section]
+        seen = set()
+        for item in iter_items(filepath):
+            item_id = item.get('id')
+            if item_id is None:
+                report.skip('without ID', None)
+                continue
+            if item_id in seen:
+                report.skip(f"duplicate in {Path(filepath).name}", item_id)
+                continue
+            seen.add(item_id)
+
+            if item_id not in hashes[section]:
+                to_add[section].add(item_id)
+                report.added.append(item_id)
+            elif entry_hash(item) == hashes[section][item_id]:
+                report.unchanged += 1
+            else:
+                differing[section][item_id] = item
+    del hashes
+
+    def compare(section: str, item: Dict) -> None:
+        source = differing[section].get(item.get('id'))
+        if source is not None:
+            reports[section].changed[item.get('id')] = changed_fields(item, source)
+
+    def merge_section(furnitypes: JsonWriter, section: str, existing: Iterable[Dict]) -> None:
+        """Copy the section's existing entries, then append the new ones from its source file."""
+        for item in existing:
+            furnitypes.add(item)
+            compare(section, item)
+        for item in iter_items(sources[section]):
+            if item.get('id') in to_add[section]:
+                furnitypes.add(item)
+                to_add[section].discard(item.get('id'))
+        furnitypes.close()
+
+    written = any(to_add.values())
+    if written:
+        # Stream FurnitureData.json through, appending each section's new items
+        # at the end of its furnitype list (creating sections that are missing)
+        logger.info(f"Writing {furniture_data_file}...")
+        with open_json(furniture_data_file) as stream, atomic_write(furniture_data_file) as out:
+            root = JsonWriter(out)
+            missing = list(SECTIONS)
+            for section in stream.members():
+                if section not in missing:
+                    root.put(section, stream.value())
+                    continue
+                missing.remove(section)
+                root.key(section)
+                body = root.child('{}')
+                merged = False
+                for key in stream.members():
+                    if key != 'furnitype':
+                        body.put(key, stream.value())
+                        continue
+                    body.key(key)
+                    merge_section(body.child('[]'), section, stream.elements())
+                    merged = True
+                if not merged:
+                    body.key('furnitype')
+                    merge_section(body.child('[]'), section, ())
+                body.close()
+            for section in missing:
+                root.key(section)
+                body = root.child('{}')
+                body.key('furnitype')
+                merge_section(body.child('[]'), section, ())
+                body.close()
+            root.close()
+    elif any(differing.values()):
+        # Nothing to write, but say which fields the differing entries changed
+        for section, item in iter_furnitypes(furniture_data_file):
+            compare(section, item)
+
     # Summary
     logger.info("=" * 60)
     logger.info("MERGE SUMMARY (INTO FurnitureData.json)")
     logger.info("=" * 60)
-    logger.info(f"Room items added: {room_added}")
-    logger.info(f"Room items skipped: {room_skipped}")
-    logger.info(f"Wall items added: {wall_added}")
-    logger.info(f"Wall items skipped: {wall_skipped}")
-    logger.info(f"Total items added: {room_added + wall_added}")
-    logger.info(f"Total items skipped: {room_skipped + wall_skipped}")
+    for report in reports.values():
+        report.log()
+    logger.info(f"Total items added: {sum(len(r.added) for r in reports.values())}")
+    logger.info(f"Total items skipped: {sum(r.skipped_count for r in reports.values())}")
+    if not written:
+        logger.info(f"Nothing to add, {furniture_data_file} left untouched")
     logger.info("=" * 60)
 
 
@@ -188,139 +466,205 @@ def extract_from_furniture_data(
     if they don't already exist there.
     """
     logger.info("Starting furniture data extraction (FROM FurnitureData.json)...")
-    
-    # Load all files
-    logger.info(f"Loading {furniture_data_file}...")
-    furniture_data = load_json(furniture_data_file)
-    
-    logger.info(f"Loading {other_furniture_data_file}...")
-    other_furniture_data = load_json(other_furniture_data_file)
-    
-    logger.info(f"Loading {roomitems_file}...")
-    try:
-        roomitems = load_json(roomitems_file)
-    except FileNotFoundError:
-        logger.warning(f"{roomitems_file} not found, creating empty list")
-        roomitems = []
-    
-    logger.info(f"Loading {wallitems_file}...")
-    try:
-        wallitems = load_json(wallitems_file)
-    except FileNotFoundError:
-        logger.warning(f"{wallitems_file} not found, creating empty list")
-        wallitems = []
-    
+    targets = {'roomitemtypes': roomitems_file, 'wallitemtypes': wallitems_file}
+    reports = {'roomitemtypes': SectionReport('Room'), 'wallitemtypes': SectionReport('Wall')}
+
     # Get IDs from other_furniture_data (items we DON'T want to extract)
-    other_room_ids = {
-        item.get('id') for item in other_furniture_data.get('roomitemtypes', {}).get('furnitype', [])
-        if item.get('id') is not None
-    }
-    other_wall_ids = {
-        item.get('id') for item in other_furniture_data.get('wallitemtypes', {}).get('furnitype', [])
-        if item.get('id') is not None
-    }
-    
-    # Get existing IDs from roomitems and wallitems files
-    existing_room_ids = {
-        item.get('id') for item in roomitems
-        if item.get('id') is not None
-    }
-    existing_wall_ids = {
-        item.get('id') for item in wallitems
-        if item.get('id') is not None
-    }
-    
-    # Check for duplicates in target files
+    logger.info(f"Reading IDs from {other_furniture_data_file}...")
+    other_ids = {section: set() for section in SECTIONS}
+    for section, item in iter_furnitypes(other_furniture_data_file):
+        if item.get('id') is not None:
+            other_ids[section].add(item.get('id'))
+
+    # Get existing IDs from roomitems and wallitems files, checking for duplicates
     logger.info("Checking for duplicates in target files...")
-    check_duplicates_in_list(roomitems, roomitems_file)
-    check_duplicates_in_list(wallitems, wallitems_file)
-    
-    # Extract room items
-    logger.info("Extracting room items...")
-    room_added = 0
-    room_skipped = 0
-    
-    for item in furniture_data.get('roomitemtypes', {}).get('furnitype', []):
-        item_id = item.get('id')
-        
-        if item_id is None:
-            logger.warning(f"Skipping room item with null ID: {get_item_info(item)}")
-            room_skipped += 1
-            continue
-        
-        # Skip if exists in other furniture data
-        if item_id in other_room_ids:
-            room_skipped += 1
-            continue
-        
-        # Skip if already exists in roomitems
-        if item_id in existing_room_ids:
-            logger.warning(f"Room item ID already exists in {roomitems_file}, skipping: {get_item_info(item)}")
-            room_skipped += 1
-            continue
-        
-        roomitems.append(item)
-        existing_room_ids.add(item_id)
-        room_added += 1
-        logger.info(f"Added room item: {get_item_info(item)}")
-    
-    # Extract wall items
-    logger.info("Extracting wall items...")
-    wall_added = 0
-    wall_skipped = 0
-    
-    for item in furniture_data.get('wallitemtypes', {}).get('furnitype', []):
+    existing_ids = {}
+    for section, filepath in targets.items():
+        if Path(filepath).is_file():
+            existing_ids[section] = check_duplicates(iter_items(filepath), filepath)
+        else:
+            logger.warning(f"{filepath} not found, creating empty list")
+            existing_ids[section] = set()
+
+    # First pass: decide which IDs to extract (only the IDs are kept)
+    logger.info(f"Extracting items from {furniture_data_file}...")
+    to_add = {section: set() for section in SECTIONS}
+    other_name = Path(other_furniture_data_file).name
+
+    for section, item in iter_furnitypes(furniture_data_file):
         item_id = item.get('id')
-        
+        report = reports[section]
+
         if item_id is None:
-            logger.warning(f"Skipping wall item with null ID: {get_item_info(item)}")
-            wall_skipped += 1
+            report.skip('without ID', None)
             continue
-        
+
         # Skip if exists in other furniture data
-        if item_id in other_wall_ids:
-            wall_skipped += 1
+        if item_id in other_ids[section]:
+            report.skip(f"also in {other_name}", item_id)
             continue
-        
-        # Skip if already exists in wallitems
-        if item_id in existing_wall_ids:
-            logger.warning(f"Wall item ID already exists in {wallitems_file}, skipping: {get_item_info(item)}")
-            wall_skipped += 1
+
+        # Skip if already exists in the target file (or was just picked)
+        if item_id in existing_ids[section]:
+            report.skip(f"already in {Path(targets[section]).name}", item_id)
             continue
-        
-        wallitems.append(item)
-        existing_wall_ids.add(item_id)
-        wall_added += 1
-        logger.info(f"Added wall item: {get_item_info(item)}")
-    
-    # Save extracted data
-    if room_added > 0:
-        save_json(roomitems_file, roomitems)
-    else:
-        logger.info(f"No room items to add, skipping save of {roomitems_file}")
-    
-    if wall_added > 0:
-        save_json(wallitems_file, wallitems)
-    else:
-        logger.info(f"No wall items to add, skipping save of {wallitems_file}")
-    
+
+        to_add[section].add(item_id)
+        existing_ids[section].add(item_id)
+        report.added.append(item_id)
+
+    # Second pass: copy each changed target file and append its new items
+    for section in SECTIONS:
+        if not to_add[section]:
+            logger.info(f"No {reports[section].label.lower()} items to add, skipping save of {targets[section]}")
+    if any(to_add.values()):
+        with ExitStack() as stack:
+            writers = {}
+            for section in SECTIONS:
+                if not to_add[section]:
+                    continue
+                filepath = targets[section]
+                writers[section] = JsonWriter(stack.enter_context(atomic_write(filepath)), 1, '[]')
+                if Path(filepath).is_file():
+                    for item in iter_items(filepath):
+                        writers[section].add(item)
+            for section, item in iter_furnitypes(furniture_data_file):
+                if item.get('id') in to_add[section]:
+                    writers[section].add(item)
+                    to_add[section].discard(item.get('id'))
+            for writer in writers.values():
+                writer.close()
+
     # Summary
     logger.info("=" * 60)
     logger.info("EXTRACTION SUMMARY (FROM FurnitureData.json)")
     logger.info("=" * 60)
-    logger.info(f"Room items added: {room_added}")
-    logger.info(f"Room items skipped: {room_skipped}")
-    logger.info(f"Wall items added: {wall_added}")
-    logger.info(f"Wall items skipped: {wall_skipped}")
-    logger.info(f"Total items added: {room_added + wall_added}")
-    logger.info(f"Total items skipped: {room_skipped + wall_skipped}")
+    for report in reports.values():
+        report.log()
+    logger.info(f"Total items added: {sum(len(r.added) for r in reports.values())}")
+    logger.info(f"Total items skipped: {sum(r.skipped_count for r in reports.values())}")
+    logger.info("=" * 60)
+
+
+SECTION_NAMES = {'roomitemtypes': 'room', 'wallitemtypes': 'wall'}
+
+
+def entry_key(item: Dict):
+    """Diff key of a furnitype: its id, or its classname when it has none."""
+    item_id = item.get('id')
+    return item_id if item_id is not None else ('classname', item.get('classname'))
+
+
+def field_changes(old: Dict, new: Dict) -> Dict[str, List]:
+    """{field: [old value, new value]} for every field that differs."""
+    return {field: [old.get(field), new.get(field)] for field in changed_fields(old, new)}
+
+
+def entry_record(section: str, item: Dict, fields: Dict = None) -> Dict:
+    record = {'section': section, 'id': item.get('id'), 'classname': item.get('classname')}
+    if fields is not None:
+        record['fields'] = fields
+    return record
+
+
+def index_furniture_data(filepath: str) -> Dict[str, Dict]:
+    """{section: {entry_key: the entry's JSON text}} of a FurnitureData file, in one streaming pass."""
+    index = {section: {} for section in SECTIONS}
+    for section, item, text in iter_furnitypes(filepath, raw=True):
+        index[section][entry_key(item)] = text
+    return index
+
+
+def diff_furniture_data(old_file: str, new_file: str) -> Dict[str, List[Dict]]:
+    """
+    Keyed, field-level diff of two FurnitureData files.
+    Returns {'added': [...], 'removed': [...], 'changed': [...]} of records
+    with section, id and classname; changed records also carry
+    {field: [old, new]}.  Entries whose text is identical in both files are
+    not decoded twice; only those that differ are compared field by field.
+    """
+    old = index_furniture_data(old_file)
+    added = {section: [] for section in SECTIONS}
+    changed = []
+
+    for section, item, text in iter_furnitypes(new_file, raw=True):
+        before = old[section].pop(entry_key(item), None)
+        if before is None:
+            added[section].append(item)
+        elif before != text:
+            fields = field_changes(json.loads(before), item)
+            if fields:  # otherwise only the formatting differs
+                changed.append(entry_record(section, item, fields))
+
+    # What is left in the index was removed, unless an added entry has its
+    # classname: then the furnitype was renumbered, and counts as changed
+    diff = {'added': [], 'removed': [], 'changed': changed}
+    for section in SECTIONS:
+        removed = [json.loads(text) for text in old[section].values()]
+        by_classname = {}
+        for entry in removed:
+            if entry.get('classname') is not None:
+                by_classname.setdefault(entry.get('classname'), []).append(entry)
+        renumbered = set()
+        for item in added[section]:
+            matches = by_classname.get(item.get('classname'))
+            if matches:
+                entry = matches.pop(0)
+                renumbered.add(id(entry))
+                changed.append(entry_record(section, item, field_changes(entry, item)))
+            else:
+                diff['added'].append(entry_record(section, item))
+        diff['removed'].extend(entry_record(section, entry) for entry in removed
+                               if id(entry) not in renumbered)
+    return diff
+
+
+def print_diff(diff: Dict[str, List[Dict]]) -> None:
+    """Print a diff for review: '+' added, '-' removed, '~' changed with its fields old -> new."""
+    for mark, kind in (('+', 'added'), ('-', 'removed'), ('~', 'changed')):
+        for record in diff[kind]:
+            print(f"{mark} {SECTION_NAMES[record['section']]} {record['id']} {record['classname']}")
+            for field, (old, new) in record.get('fields', {}).items():
+                print(f"    {field}: {json.dumps(old, ensure_ascii=False)} -> {json.dumps(new, ensure_ascii=False)}")
+
+
+def diff_command(old_file: str, new_file: str, report_file: str = None) -> Dict[str, List[Dict]]:
+    """Diff two FurnitureData files, print it, and optionally save it as JSON."""
+    logger.info(f"Diffing {old_file} -> {new_file}...")
+    diff = diff_furniture_data(old_file, new_file)
+    print_diff(diff)
+
+    if report_file:
+        with atomic_write(report_file) as out:
+            json.dump(diff, out, indent=2, ensure_ascii=False)
+
+    counts = Counter(field for record in diff['changed'] for field in record['fields'])
+    logger.info("=" * 60)
+    logger.info(f"DIFF SUMMARY ({old_file} -> {new_file})")
+    logger.info("=" * 60)
+    logger.info(f"Added: {len(diff['added'])}")
+    logger.info(f"Removed: {len(diff['removed'])}")
+    logger.info(f"Changed: {len(diff['changed'])}")
+    if counts:
+        logger.info(f"Changed fields: {', '.join(f'{field} x{n}' for field, n in counts.most_common())}")
     logger.info("=" * 60)
+    return diff
 
 
 if __name__ == '__main__':
     import sys
     
-    if len(sys.argv) > 1 and sys.argv[1] == 'extract':
+    if len(sys.argv) > 1 and sys.argv[1] == 'diff':
+        # Diff mode: review what changed between two FurnitureData versions
+        if len(sys.argv) < 4:
+            print("Usage: merge_items.py diff OLD NEW [REPORT.json]")
+            sys.exit(2)
+        try:
+            diff_command(*sys.argv[2:5])
+        except Exception as e:
+            logger.error(f"Error during diff: {e}")
+            raise
+    elif len(sys.argv) > 1 and sys.argv[1] == 'extract':
         # Extract mode: compare FurnitureData files and extract differences
         try:
             if len(sys.argv) >= 3:
@@ -339,4 +683,4 @@ if __name__ == '__main__':
             merge_into_furniture_data()
         except Exception as e:
             logger.error(f"Error during merge: {e}")
-            raise
\ No newline at end of file
+            raise
@@ -1,35 +1,46 @@
 import argparse
-import requests
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from flash_texts import fetch_external_texts  # shared with badge_name_update.py, in assets/
 
 domains = ["com.br", "com.tr", "com", "de", "es", "fi", "fr", "it", "nl"]
 
-def fetch_external_flash_texts(domain):
-    url = f"https://www.habbo.{domain}/gamedata/external_flash_texts/0"
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        return response.text.split('\n')
-    else:
-        print(f"Failed to fetch data from {url}. Status code: {response.status_code}")
-        return []
+def fetch_all_external_flash_texts(domains, offline=False, base_url=None):
+    results = fetch_external_texts(domains, base_url=base_url, offline=offline)
+    lines_by_domain = {}
+
+    for domain, result in results.items():
+        if result.text is None:
+            print(f"Failed to fetch data for {domain}: {result.detail}")
+            lines_by_domain[domain] = []
+            continue
+        if result.status == 'stale':
+            print(f"Failed to fetch data for {domain}, using cached copy: {result.detail}")
+        lines_by_domain[domain] = result.text.split('\n')
+
+    return lines_by_domain
 
 def parse_flash_texts(lines):
     flash_texts_dict = {}
-    
+
     for line in lines:
         if '=' in line:
             key, value = line.split('=', 1)
             flash_texts_dict[key.strip()] = value.strip()
-    
+
     return flash_texts_dict
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch and parse external flash texts for a given domain.")
     parser.add_argument("--domain", help="Specify the top-level domain (TLD) for fetching external flash texts.", choices=domains)
-    
+    parser.add_argument("--offline", action="store_true", help="Use cached external flash texts only, no network.")
+    parser.add_argument("--base-url", help="URL template with {tld} to fetch from instead of www.habbo.{tld}.")
+
     args = parser.parse_args()
-    
+
     if args.domain:
         domain = args.domain
     else:
@@ -42,10 +53,11 @@ def main():
     all_flash_texts = {}
     with open("../assets/gamedata/ExternalTexts.json", "r", encoding="utf-8") as f:
         all_flash_texts = json.load(f)
-    
+
+    # All domains are fetched at once; merged in order, so the chosen domain wins
+    lines_by_domain = fetch_all_external_flash_texts(domains, args.offline, args.base_url)
     for d in domains:
-        flash_texts_lines = fetch_external_flash_texts(d)
-        flash_texts_dict = parse_flash_texts(flash_texts_lines)
+        flash_texts_dict = parse_flash_texts(lines_by_domain[d])
         all_flash_texts = all_flash_texts | flash_texts_dict
 
     with open("../assets/gamedata/ExternalTexts.json", "w", encoding="utf-8") as f:
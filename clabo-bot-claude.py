@@ -4,60 +4,73 @@ Clabo Hotel Bot — "claude" — AI-powered chat bot.
 Connects via WebSocket as a real player, listens to room chat,
 responds with AI (OpenRouter), does keyword commands, greets new
 users, and patrols the room with ambient behavior.
+
+Operators can steer it while it runs through its control socket
+(clabo.control): python -m clabo.control claude help
+
+One process can cover several rooms, hopping or with extra accounts,
+sharing the AI client, response cache and guest memory
+(CLABO_ROOMS, see clabo.presence).  With CLABO_AI_BATCH=<seconds>,
+guests who address it within that window are answered by one batched
+AI request; OPENROUTER_URL points the AI at another endpoint, such as
+the local stand-in clabo.mockai.
 """
 
+from clabo import startup    # first, so --startup-profile times the imports below
+
 import asyncio
 import json
+import logging
 import os
-import random
-import struct
-import subprocess
 import sys
 import time
 
-import aiohttp
 import websockets
 
+from clabo.admission import ADMIT, ChatAdmission
+from clabo.behavior import BehaviorRunner, compile_behavior, load_behavior
+from clabo.chatlog import ChatLog
+from clabo.clock import clock, rng
+from clabo.connection import (
+    authenticate, connect, enter_room, request_entry_data, request_room, run_sql,
+)
+from clabo.control import ControlServer, register_avatar
+from clabo.follow import Follower
+from clabo.greeting import ArrivalGreeter, group_names
+from clabo.heatmap import Heatmap, HeatmapSampler
+from clabo.log import setup_logging
+from clabo.presence import HOP_INTERVAL, ROOMS, Presence, ReplyBatcher, parse_rooms
+from clabo.messages import IN, OUT
+from clabo.protocol import (
+    parse_chat, parse_packets, parse_room_model, parse_room_users, parse_user_update,
+)
+from clabo.scheduler import PRIORITY_PATROL, Scheduler
+from clabo.watchdog import install, uninstall
+
 # ── Config ────────────────────────────────────────────────────────────
-WS_URL = "ws://127.0.0.1:2096"
+WS_URL = os.environ.get("CLABO_WS_URL", "ws://127.0.0.1:2096")
 ROOM_ID = 208
 BOT_USER_ID = 8
 BOT_USERNAME = "claude"
-LOCK_FILE = "/tmp/clabo-bot-claude.lock"
+LOCK_FILE = os.environ.get("CLABO_LOCK", "/tmp/clabo-bot-claude.lock")   # per shard under clabo.fleet
+CHATLOG_PATH = os.environ.get("CLABO_CHATLOG", "")   # SQLite file for observed chat
+HEATMAP_DIR = os.environ.get("CLABO_HEATMAP_DIR", "")  # occupancy heatmap snapshots
+BEHAVIOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "behaviors", "claude.json")
+PERSONA_FILE = os.environ.get("CLABO_PERSONA", "")    # system prompt override, re-read on "reload"
+
+log = setup_logging(BOT_USERNAME)
 
 OPENROUTER_KEY = os.environ.get("OPENROUTER_KEY", "")
 OPENROUTER_MODEL = os.environ.get("OPENROUTER_MODEL", "openai/gpt-4o-mini")
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_URL = os.environ.get("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+AI_BATCH_WINDOW = float(os.environ.get("CLABO_AI_BATCH", "0"))   # seconds; 0 = one request per message
+AI_BATCH_MAX = int(os.environ.get("CLABO_AI_BATCH_MAX", "8"))
 
 DB_USER = os.environ.get("MYSQL_USER", "arcturus_user")
 DB_PASS = os.environ.get("MYSQL_PASSWORD", "arcturus_pw")
 DB_NAME = os.environ.get("MYSQL_DATABASE", "arcturus")
 
-# ── Outgoing packet headers ──────────────────────────────────────────
-SECURITY_TICKET = 2419
-SECURITY_MACHINE = 2490
-CLIENT_VARIABLES = 1053
-GET_GUEST_ROOM = 2230
-OPEN_FLAT_CONNECTION = 2312
-GET_ROOM_ENTRY_DATA = 3898
-OUT_CHAT = 1314
-OUT_SHOUT = 2085
-OUT_WHISPER = 1543
-MOVE_AVATAR = 3320
-DANCE = 2080
-EXPRESSION = 2456    # 1=wave 2=blow_kiss 3=laugh 5=jump_happy
-SIGN = 1975
-CLIENT_PONG = 2596
-
-# ── Incoming packet headers ──────────────────────────────────────────
-SERVER_PING = 3928
-IN_AUTHENTICATED = 2491
-IN_CHAT = 1446
-IN_SHOUT = 1036
-IN_WHISPER = 1132
-IN_ROOM_USERS = 374
-IN_USER_REMOVE = 2661
-IN_USER_UPDATE = 1640
+CHAT_KINDS = {IN.CHAT.id: "chat", IN.SHOUT.id: "shout", IN.WHISPER.id: "whisper"}
 
 # ── AI persona ───────────────────────────────────────────────────────
 SYSTEM_PROMPT = (
@@ -72,6 +85,13 @@ SYSTEM_PROMPT = (
     "and professional."
 )
 
+
+def load_persona() -> str:
+    if PERSONA_FILE:
+        with open(PERSONA_FILE, encoding="utf-8") as f:
+            return f.read().strip()
+    return SYSTEM_PROMPT
+
 # ── Keyword data ─────────────────────────────────────────────────────
 GREETING_WORDS = {
     "hi", "hey", "hello", "sup", "yo", "hii", "heyy", "heya",
@@ -81,165 +101,15 @@ GREETING_RESPONSES = [
     "Welcome!", "Hello there!", "Hi! Nice to see you!", "Hey, welcome!",
     "Good to see you!", "Hello! How can I help?",
 ]
+GREET_WINDOW = 3          # seconds of arrivals merged into one greeting
+GREET_TTL = 900           # don't re-greet someone seen this recently
+SPAM_MAX_MESSAGES = int(os.environ.get("CLABO_SPAM_MAX", "4"))        # per sender …
+SPAM_WINDOW = float(os.environ.get("CLABO_SPAM_WINDOW", "10"))        # … per this many seconds
+SPAM_DUP_WINDOW = float(os.environ.get("CLABO_SPAM_DUP_WINDOW", "30"))
+SPAM_SIMILARITY = float(os.environ.get("CLABO_SPAM_SIMILARITY", "0.85"))
 FOLLOW_KEYWORDS = ["follow me", "come here", "follow"]
-IDLE_LINES = [
-    "Let me know if you need anything!", "Welcome to Clabo Hotel.",
-    "Feel free to look around!", "I'm here if you need help.",
-    "Hope everyone's having a great time!",
-    "The hotel is looking lovely today.",
-    "Don't hesitate to ask if you need something.",
-]
-PATROL_WAYPOINTS = [
-    (16, 19), (13, 15), (10, 12), (14, 18), (11, 16), (15, 14), (12, 20),
-]
-
-
-# ── Wire helpers ─────────────────────────────────────────────────────
-class PayloadReader:
-    """Read Habbo wire-format fields from a binary payload."""
-
-    def __init__(self, data: bytes):
-        self.data = data
-        self.pos = 0
-
-    def read_int(self) -> int:
-        if self.pos + 4 > len(self.data):
-            raise ValueError("EOF reading int")
-        val = struct.unpack(">i", self.data[self.pos:self.pos + 4])[0]
-        self.pos += 4
-        return val
-
-    def read_short(self) -> int:
-        if self.pos + 2 > len(self.data):
-            raise ValueError("EOF reading short")
-        val = struct.unpack(">H", self.data[self.pos:self.pos + 2])[0]
-        self.pos += 2
-        return val
-
-    def read_string(self) -> str:
-        length = self.read_short()
-        if self.pos + length > len(self.data):
-            raise ValueError("EOF reading string")
-        val = self.data[self.pos:self.pos + length].decode("utf-8", errors="replace")
-        self.pos += length
-        return val
-
-    def read_bool(self) -> bool:
-        if self.pos + 1 > len(self.data):
-            raise ValueError("EOF reading bool")
-        val = self.data[self.pos] != 0
-        self.pos += 1
-        return val
-
-    def remaining(self) -> int:
-        return len(self.data) - self.pos
-
-
-def build_packet(header_id: int, payload: bytes = b"") -> bytes:
-    length = 2 + len(payload)
-    return struct.pack(">IH", length, header_id) + payload
-
-
-def encode_string(s: str) -> bytes:
-    b = s.encode("utf-8")
-    return struct.pack(">H", len(b)) + b
-
-
-def encode_int(n: int) -> bytes:
-    return struct.pack(">i", n)
-
-
-def parse_packets(data: bytes):
-    packets = []
-    o = 0
-    while o + 6 <= len(data):
-        length = struct.unpack(">I", data[o:o + 4])[0]
-        if o + 4 + length > len(data):
-            break
-        hid = struct.unpack(">H", data[o + 4:o + 6])[0]
-        payload = data[o + 6:o + 4 + length]
-        packets.append((hid, payload))
-        o += 4 + length
-    return packets
-
-
-# ── Packet parsers ───────────────────────────────────────────────────
-def parse_room_users(payload: bytes, room_users: dict):
-    """Parse ROOM_USERS (374) packet → update room_users dict.
-    Returns list of (room_unit_id, username) for newly parsed users."""
-    parsed = []
-    try:
-        r = PayloadReader(payload)
-        count = r.read_int()
-        for _ in range(count):
-            user_id = r.read_int()
-            username = r.read_string()
-            motto = r.read_string()
-            figure = r.read_string()
-            room_unit_id = r.read_int()
-            x = r.read_int()
-            y = r.read_int()
-            z = r.read_string()      # height "0.0"
-            body_dir = r.read_int()
-            head_dir = r.read_int()
-            user_type = r.read_string()  # "legacy" / "bot" / "pet"
-
-            room_users[room_unit_id] = {
-                "username": username,
-                "user_id": user_id,
-                "x": x,
-                "y": y,
-            }
-            parsed.append((room_unit_id, username))
-
-            # Skip type-specific trailing fields
-            try:
-                if user_type == "legacy":
-                    r.read_string()  # gender
-                    r.read_int()     # groupId
-                    r.read_int()     # groupStatus
-                    r.read_string()  # groupName
-                    r.read_string()  # swimFigure
-                    r.read_int()     # achievementScore
-                    r.read_bool()    # isModerator
-                elif user_type == "bot":
-                    r.read_string()  # ownerName
-                    r.read_int()     # ownerId
-                    # some implementations add extra bot fields
-                    # we'll be tolerant of parse errors here
-            except ValueError:
-                break  # couldn't read trailing fields, stop
-    except Exception as e:
-        print(f"[!] ROOM_USERS parse (got {len(parsed)}): {e}", flush=True)
-    return parsed
-
-
-def parse_user_update(payload: bytes, room_users: dict):
-    """Parse USER_UPDATE (1640) to track positions."""
-    try:
-        r = PayloadReader(payload)
-        count = r.read_int()
-        for _ in range(count):
-            room_unit_id = r.read_int()
-            x = r.read_int()
-            y = r.read_int()
-            z = r.read_string()
-            head_dir = r.read_int()
-            body_dir = r.read_int()
-            status_str = r.read_string()
-            if room_unit_id in room_users:
-                room_users[room_unit_id]["x"] = x
-                room_users[room_unit_id]["y"] = y
-    except Exception:
-        pass  # best-effort
-
-
-def parse_chat(payload: bytes):
-    """Parse CHAT_MESSAGE / SHOUT_MESSAGE → (roomUnitId, message)."""
-    r = PayloadReader(payload)
-    sender_ruid = r.read_int()
-    message = r.read_string()
-    return sender_ruid, message
+FOLLOW_DISTANCE = 2        # tiles the guest may get away before re-targeting
+FOLLOW_TIMEOUT = 120       # seconds
 
 
 # ── AI ───────────────────────────────────────────────────────────────
@@ -259,13 +129,15 @@ def chunk_message(text: str, max_len: int = 100) -> list[str]:
     return chunks if chunks else [text[:max_len]]
 
 
-async def ai_respond(username: str, message: str, history: list, session):
-    """Call OpenRouter for an AI response."""
-    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
-    for role, content in history:
-        messages.append({"role": role, "content": content})
-    messages.append({"role": "user", "content": f"{username}: {message}"})
+def ai_session():
+    """The HTTP client for OpenRouter; aiohttp is imported on the first AI call."""
+    import aiohttp
+
+    return aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
 
+
+async def ai_complete(session, messages: list, max_tokens: int = 150, **extra):
+    """POST a chat completion to OpenRouter; the reply text or None."""
     try:
         async with session.post(
             OPENROUTER_URL,
@@ -276,144 +148,196 @@ async def ai_respond(username: str, message: str, history: list, session):
             json={
                 "model": OPENROUTER_MODEL,
                 "messages": messages,
-                "max_tokens": 150,
+                "max_tokens": max_tokens,
                 "temperature": 0.8,
+                **extra,
             },
-            timeout=aiohttp.ClientTimeout(total=10),
         ) as resp:
             if resp.status == 200:
                 data = await resp.json()
                 return data["choices"][0]["message"]["content"].strip()
             else:
                 body = await resp.text()
-                print(f"[!] OpenRouter {resp.status}: {body[:200]}", flush=True)
+                log.warning("[!] OpenRouter %s: %s", resp.status, body[:200])
                 return None
     except Exception as e:
-        print(f"[!] AI error: {e}", flush=True)
+        log.error("[!] AI error: %s", e)
         return None
 
 
+async def ai_respond(username: str, message: str, history: list, session, persona: str = SYSTEM_PROMPT):
+    """Call OpenRouter for an AI response."""
+    messages = [{"role": "system", "content": persona}]
+    for role, content in history:
+        messages.append({"role": role, "content": content})
+    messages.append({"role": "user", "content": f"{username}: {message}"})
+    return await ai_complete(session, messages)
+
+
+BATCH_PROMPT = (
+    "Several guests spoke to you at once. Each numbered line below is one "
+    "guest's message, after your recent exchange with that guest (if any). "
+    "Answer every guest separately, in your usual style. Reply with only a "
+    'JSON object mapping each number to your reply, e.g. {"1": "...", "2": "..."}.'
+)
+
+
+async def ai_respond_batch(items: list, session, persona: str = SYSTEM_PROMPT) -> list:
+    """One OpenRouter request for several (username, message, history)
+    items; returns a reply (or None) per item.  Items the model skipped
+    are asked again one by one."""
+    if len(items) == 1:
+        return [await ai_respond(*items[0], session, persona)]
+    lines = []
+    for n, (username, message, history) in enumerate(items, 1):
+        for role, content in history:
+            lines.append(f"    ({'you' if role == 'assistant' else 'guest'}) {content}")
+        lines.append(f"[{n}] {username}: {message}")
+    text = await ai_complete(
+        session,
+        [{"role": "system", "content": persona + "\n\n" + BATCH_PROMPT},
+         {"role": "user", "content": "\n".join(lines)}],
+        max_tokens=min(100 * len(items), 800),
+        response_format={"type": "json_object"},
+    )
+    replies = {}
+    if text:
+        try:
+            replies = json.loads(text[text.find("{"):text.rfind("}") + 1])
+        except ValueError:
+            log.warning("[!] Batched reply is not JSON: %s", text[:200])
+    if not isinstance(replies, dict):
+        replies = {}
+    out = []
+    for n in range(1, len(items) + 1):
+        reply = replies.get(str(n))
+        out.append(str(reply).strip() if reply else None)
+    missing = [i for i, reply in enumerate(out) if reply is None]
+    if missing and text:        # the request worked but skipped some guests
+        log.warning("[!] Batched reply missed %s of %s guests", len(missing), len(items))
+        again = await asyncio.gather(*(ai_respond(*items[i], session, persona) for i in missing))
+        for i, reply in zip(missing, again):
+            out[i] = reply
+    return out
+
+
 # ── Main bot ─────────────────────────────────────────────────────────
 async def run_bot():
-    # Shared state
+    watchdog, profiler = install(BOT_USERNAME)   # loop-lag reports; SIGUSR2 toggles profiling
+    plans = parse_rooms(ROOMS or str(ROOM_ID), BOT_USER_ID, BOT_USERNAME)
+    scheduler = Scheduler()
+
+    # Observed chat/arrivals/departures of every room → SQLite, written in batches
+    chatlog = ChatLog(CHATLOG_PATH) if CHATLOG_PATH else None
+    if chatlog:
+        chatlog.start()
+
+    presence = Presence(plans, ai_session, load_persona())
+    if AI_BATCH_WINDOW > 0:
+        presence.batcher = ReplyBatcher(
+            lambda items: ai_respond_batch(items, presence.http, presence.persona),
+            AI_BATCH_WINDOW, AI_BATCH_MAX)
+    try:
+        await asyncio.gather(*(
+            run_session(plan, presence, scheduler, chatlog, watchdog, profiler) for plan in plans))
+    finally:
+        await presence.close()
+        await scheduler.close()
+        if chatlog:
+            await chatlog.close()
+        await uninstall(watchdog, profiler)
+
+
+async def run_session(plan, presence, scheduler, chatlog, watchdog, profiler):
+    """One connection: log in as plan's account and serve its room(s)."""
+    username = plan.username
+    log = logging.getLogger(f"clabo.{BOT_USERNAME}" + (f".{username}" if presence.multi else ""))
+
+    # Session state
+    room_id = plan.rooms[0]
     own_room_unit_id = None
     room_users = {}                # roomUnitId → {username, user_id, x, y}
-    user_histories = {}            # username → [(role, content), ...] max 6
+    user_histories = presence.histories
     chat_queue = asyncio.Queue()
     ws_lock = asyncio.Lock()
     room_loaded = False
-    responding = asyncio.Event()
-    responding.set()               # set = bot is free (not busy)
+    responding = scheduler.hold(username)   # held = busy with a guest
+    program = compile_behavior(load_behavior(BEHAVIOR))
 
     # ── Auth ──────────────────────────────────────────────────────────
-    sso_ticket = f"ClaboBot-claude-{int(time.time())}"
-    subprocess.run(
-        ["docker", "exec", "clabo-hotel-db-1", "mysql", "-u", DB_USER,
-         f"-p{DB_PASS}", DB_NAME, "-N", "-e",
-         f"UPDATE users SET auth_ticket='{sso_ticket}' WHERE id={BOT_USER_ID};"],
-        capture_output=True,
-    )
-    print(f"[*] SSO: {sso_ticket}", flush=True)
-
-    ws = await asyncio.wait_for(
-        websockets.connect(WS_URL, origin="https://localhost"), timeout=5,
-    )
-    print("[+] Connected!", flush=True)
-
-    # Send handshake
-    await ws.send(build_packet(SECURITY_MACHINE, encode_string("")))
-    await ws.send(build_packet(CLIENT_VARIABLES,
-                               encode_int(0) + encode_string("0") + encode_string("")))
-    await ws.send(build_packet(SECURITY_TICKET, encode_string(sso_ticket)))
-    await asyncio.sleep(2)
-
-    # Drain auth response
-    auth_ok = False
-    try:
-        while True:
-            msg = await asyncio.wait_for(ws.recv(), timeout=3)
-            if isinstance(msg, bytes):
-                for hid, _ in parse_packets(msg):
-                    if hid == IN_AUTHENTICATED:
-                        auth_ok = True
-                    if hid == SERVER_PING:
-                        await ws.send(build_packet(CLIENT_PONG))
-    except asyncio.TimeoutError:
-        pass
-
-    if not auth_ok:
-        print("[!] Auth failed!", flush=True)
+    sso_ticket = f"ClaboBot-{username}-{int(time.time())}"
+    run_sql(f"UPDATE users SET auth_ticket='{sso_ticket}' WHERE id={plan.user_id};",
+            DB_USER, DB_PASS, DB_NAME)
+    log.info("[*] SSO: %s", sso_ticket)
+
+    with startup.phase("connect"):
+        ws = await connect(WS_URL)
+    log.info("[+] Connected!")
+
+    with startup.phase("authenticate"):
+        authenticated = await authenticate(ws, sso_ticket)
+    if not authenticated:
+        log.warning("[!] Auth failed!")
         await ws.close()
         return
-    print("[+] Authenticated!", flush=True)
+    log.info("[+] Authenticated!")
 
     # ── Enter room ────────────────────────────────────────────────────
-    await ws.send(build_packet(GET_GUEST_ROOM,
-                               encode_int(ROOM_ID) + encode_int(0) + encode_int(1)))
-    await asyncio.sleep(1)
-
-    # Drain
-    try:
-        while True:
-            msg = await asyncio.wait_for(ws.recv(), timeout=2)
-            if isinstance(msg, bytes):
-                for hid, _ in parse_packets(msg):
-                    if hid == SERVER_PING:
-                        await ws.send(build_packet(CLIENT_PONG))
-    except asyncio.TimeoutError:
-        pass
-
-    await ws.send(build_packet(OPEN_FLAT_CONNECTION,
-                               encode_int(ROOM_ID) + encode_string("")))
-    await asyncio.sleep(1)
-
-    # Drain — parse room users
-    try:
-        while True:
-            msg = await asyncio.wait_for(ws.recv(), timeout=3)
-            if isinstance(msg, bytes):
-                for hid, payload in parse_packets(msg):
-                    if hid == SERVER_PING:
-                        await ws.send(build_packet(CLIENT_PONG))
-                    if hid == IN_ROOM_USERS:
-                        parse_room_users(payload, room_users)
-                        for ruid, info in room_users.items():
-                            if info["username"].lower() == BOT_USERNAME:
-                                own_room_unit_id = ruid
-    except asyncio.TimeoutError:
-        pass
-
-    await ws.send(build_packet(GET_ROOM_ENTRY_DATA))
-    await asyncio.sleep(2)
-
-    # Drain more
-    try:
-        while True:
-            msg = await asyncio.wait_for(ws.recv(), timeout=3)
-            if isinstance(msg, bytes):
-                for hid, payload in parse_packets(msg):
-                    if hid == SERVER_PING:
-                        await ws.send(build_packet(CLIENT_PONG))
-                    if hid == IN_ROOM_USERS:
-                        parse_room_users(payload, room_users)
-                        for ruid, info in room_users.items():
-                            if info["username"].lower() == BOT_USERNAME:
-                                own_room_unit_id = ruid
-    except asyncio.TimeoutError:
-        pass
-
-    print(f"[+] In room {ROOM_ID}! (roomUnitId={own_room_unit_id})", flush=True)
-    print(f"[*] Users: {[u['username'] for u in room_users.values()]}", flush=True)
+    with startup.phase("enter room"):
+        packets = await enter_room(ws, room_id)
+
+    # Parse room users (and the heightmap, for the heatmap's size)
+    heightmap = None
+    for hid, payload in packets:
+        if hid == IN.ROOM_USERS.id:
+            parse_room_users(payload, room_users)
+        elif hid == IN.ROOM_MODEL.id:
+            heightmap = parse_room_model(payload)
+    for ruid, info in room_users.items():
+        if info["username"].lower() == username.lower():
+            own_room_unit_id = ruid
+
+    log.info("[+] In room %s! (roomUnitId=%s)", room_id, own_room_unit_id)
+    log.info("[*] Users: %s", [u['username'] for u in room_users.values()])
+    startup.report()
+
+    # Where guests spend their time, sampled every movement tick
+    heatmap = None
+
+    def start_heatmap(rows):
+        nonlocal heatmap
+        heatmap = HeatmapSampler(
+            Heatmap(room_id, rows, HEATMAP_DIR), scheduler,
+            lambda: [(u["x"], u["y"]) for ruid, u in room_users.items() if ruid != own_room_unit_id],
+            owner=username)
+        heatmap.start()
+
+    if HEATMAP_DIR and heightmap:
+        start_heatmap(heightmap)
+    elif HEATMAP_DIR:
+        log.warning("[!] No room model received, heatmap disabled")
+
+    # Flood / repeat filter in front of the chat queue (and the AI)
+    admission = ChatAdmission(max_messages=SPAM_MAX_MESSAGES, window=SPAM_WINDOW,
+                              dup_window=SPAM_DUP_WINDOW, similarity=SPAM_SIMILARITY)
+
+    # ── Arrival greetings: one per burst, none for recent returners ───
+    async def greet_group(names):
+        await chat_queue.put(("new_user", None, group_names(names), ""))
+
+    greeter = ArrivalGreeter(scheduler, username, greet_group,
+                             window=GREET_WINDOW, ttl=GREET_TTL)
+    for info in room_users.values():
+        greeter.mark_seen(info["username"])
 
     # Let initial user list settle before greeting arrivals
-    await asyncio.sleep(2)
+    await clock.sleep(2)
     room_loaded = True
 
     # Announce
     async with ws_lock:
-        await ws.send(build_packet(OUT_CHAT,
-                                   encode_string("Good day! Front desk is open.") + encode_int(0) + encode_int(-1)))
-    print('[>] "heyyy, just got here"', flush=True)
+        await ws.send(OUT.CHAT.encode("Good day! Front desk is open."))
+    log.info('[>] "heyyy, just got here"')
 
     # ── Listener task ─────────────────────────────────────────────────
     async def listener_task():
@@ -425,47 +349,70 @@ async def run_bot():
                     continue
                 for hid, payload in parse_packets(msg):
                     # Ping
-                    if hid == SERVER_PING:
+                    if hid == IN.SERVER_PING.id:
                         async with ws_lock:
-                            await ws.send(build_packet(CLIENT_PONG))
+                            await ws.send(OUT.CLIENT_PONG.encode())
+                        continue
+
+                    # Room change requested over the control socket
+                    if hid == IN.ROOM_OPEN.id:
+                        async with ws_lock:
+                            await request_entry_data(ws)
+                        continue
+                    if hid == IN.ROOM_MODEL.id:
+                        if HEATMAP_DIR and heatmap is None:
+                            start_heatmap(parse_room_model(payload))
                         continue
 
                     # Room users (arrivals / initial)
-                    if hid == IN_ROOM_USERS:
+                    if hid == IN.ROOM_USERS.id:
                         old_ruids = set(room_users.keys())
                         newly_parsed = parse_room_users(payload, room_users)
                         # Grab own roomUnitId
                         for ruid, uname in newly_parsed:
-                            if uname.lower() == BOT_USERNAME:
+                            if uname.lower() == username.lower():
                                 own_room_unit_id = ruid
+                        # First list after a room change: everyone is already here
+                        if not room_loaded:
+                            for ruid, uname in newly_parsed:
+                                greeter.mark_seen(uname)
+                            room_loaded = True
+                            log.info("[+] In room %s!", room_id)
+                            continue
                         # Greet new arrivals (after room is loaded)
                         if room_loaded:
                             for ruid, uname in newly_parsed:
-                                if ruid not in old_ruids and uname.lower() != BOT_USERNAME:
-                                    print(f"[>] {uname} entered!", flush=True)
-                                    await chat_queue.put(("new_user", ruid, uname, ""))
+                                if (ruid not in old_ruids and uname.lower() != username.lower()
+                                        and room_users[ruid]["type"] == "user"):     # not pets / bots
+                                    log.info("[>] %s entered!", uname, extra={"event": "arrive", "user": uname})
+                                    greeter.arrive(uname)
+                                    if chatlog:
+                                        chatlog.record(room_id, "arrive", uname, ruid)
                         continue
 
                     # User left
-                    if hid == IN_USER_REMOVE:
+                    if hid == IN.USER_REMOVE.id:
                         try:
-                            r = PayloadReader(payload)
-                            ruid_str = r.read_string()
-                            ruid = int(ruid_str)
+                            ruid = int(IN.USER_REMOVE.decode(payload)[0])
                             removed = room_users.pop(ruid, None)
+                            follower.on_remove(ruid)
                             if removed:
-                                print(f"[<] {removed['username']} left", flush=True)
+                                greeter.mark_seen(removed["username"])
+                                if chatlog:
+                                    chatlog.record(room_id, "leave", removed["username"], ruid)
+                                log.info("[<] %s left", removed['username'],
+                                         extra={"event": "leave", "user": removed['username']})
                         except Exception:
                             pass
                         continue
 
                     # Position updates
-                    if hid == IN_USER_UPDATE:
-                        parse_user_update(payload, room_users)
+                    if hid == IN.USER_UPDATE.id:
+                        follower.on_update(parse_user_update(payload, room_users))
                         continue
 
                     # Chat / Shout / Whisper
-                    if hid in (IN_CHAT, IN_SHOUT, IN_WHISPER):
+                    if hid in CHAT_KINDS:
                         try:
                             sender_ruid, message = parse_chat(payload)
                             # Skip our own messages
@@ -473,212 +420,261 @@ async def run_bot():
                                 continue
                             sender_info = room_users.get(sender_ruid, {})
                             sender_name = sender_info.get("username", f"User#{sender_ruid}")
-                            kind = "whisper" if hid == IN_WHISPER else "chat"
+                            kind = "whisper" if hid == IN.WHISPER.id else "chat"
                             tag = "[whisper]" if kind == "whisper" else "[chat]"
-                            print(f"  {tag} {sender_name}: {message}", flush=True)
+                            log.info("  %s %s: %s", tag, sender_name, message,
+                                     extra={"event": kind, "user": sender_name, "ruid": sender_ruid})
+                            if chatlog:
+                                chatlog.record(room_id, CHAT_KINDS[hid], sender_name, sender_ruid, message)
+                            if admission.check(sender_ruid, sender_name, message) != ADMIT:
+                                continue
                             await chat_queue.put((kind, sender_ruid, sender_name, message))
                         except Exception as e:
-                            print(f"[!] Chat parse err: {e}", flush=True)
+                            log.error("[!] Chat parse err: %s", e)
                         continue
 
             except websockets.exceptions.ConnectionClosed:
-                print("[!] Connection closed (listener).", flush=True)
+                log.warning("[!] Connection closed (listener).")
                 break
             except Exception as e:
-                print(f"[!] Listener err: {e}", flush=True)
+                log.error("[!] Listener err: %s", e)
                 await asyncio.sleep(1)
 
     # ── Chat handler task ─────────────────────────────────────────────
-    async def chat_handler_task():
-        async with aiohttp.ClientSession() as http:
-            while True:
-                event_type, sender_ruid, sender_name, message = await chat_queue.get()
-                responding.clear()  # busy
-                try:
-                    # ── New user greeting ──
-                    if event_type == "new_user":
-                        await asyncio.sleep(1.5)
-                        greeting = random.choice(GREETING_RESPONSES)
-                        async with ws_lock:
-                            await ws.send(build_packet(EXPRESSION, encode_int(1)))  # wave
-                            await ws.send(build_packet(
-                                OUT_CHAT,
-                                encode_string(f"Welcome to Clabo Hotel, {sender_name}!")
-                                + encode_int(0) + encode_int(-1)))
-                        print(f"[>] Greeted {sender_name}", flush=True)
-                        continue
-
-                    msg_lower = message.lower().strip()
-
-                    # ── Keyword: dance ──
-                    if "dance" in msg_lower:
-                        style = random.randint(1, 4)
-                        async with ws_lock:
-                            await ws.send(build_packet(DANCE, encode_int(style)))
-                            await ws.send(build_packet(
-                                OUT_CHAT,
-                                encode_string("Sure, I love a good dance!")
-                                + encode_int(0) + encode_int(-1)))
-                        print(f"[>] Dancing (style {style})", flush=True)
-                        await asyncio.sleep(8)
-                        async with ws_lock:
-                            await ws.send(build_packet(DANCE, encode_int(0)))
-                        continue
-
-                    # ── Keyword: wave ──
-                    if msg_lower in ("wave", "wave!"):
-                        async with ws_lock:
-                            await ws.send(build_packet(EXPRESSION, encode_int(1)))
-                        print("[>] *waves*", flush=True)
-                        continue
+    answering = set()     # in-flight batched AI answers
 
-                    # ── Keyword: follow me ──
-                    if any(kw in msg_lower for kw in FOLLOW_KEYWORDS):
-                        sender_info = room_users.get(sender_ruid)
-                        if sender_info:
-                            tx, ty = sender_info.get("x", 10), sender_info.get("y", 10)
-                            async with ws_lock:
-                                await ws.send(build_packet(MOVE_AVATAR,
-                                                           encode_int(tx) + encode_int(ty)))
-                                await ws.send(build_packet(
-                                    OUT_CHAT,
-                                    encode_string("Right behind you!")
-                                    + encode_int(0) + encode_int(-1)))
-                            print(f"[>] Following {sender_name} → ({tx},{ty})", flush=True)
-                        continue
+    async def ask_ai(sender_name, message, history):
+        if presence.batcher:
+            return await presence.batcher.ask((sender_name, message, list(history)))
+        return await ai_respond(sender_name, message, history, presence.http, presence.persona)
 
-                    # ── Keyword: greetings (hi/hey/hello…) ──
-                    words = set(
-                        msg_lower.replace("!", "").replace("?", "")
-                        .replace(",", " ").replace(".", " ").split()
-                    )
-                    if words & GREETING_WORDS and (
-                        "claude" in msg_lower or len(words) <= 3
-                    ):
-                        greeting = random.choice(GREETING_RESPONSES)
+    async def answer(sender_name, message):
+        with responding:
+            try:
+                history = user_histories.get(sender_name, [])
+                if history:
+                    reply = await ask_ai(sender_name, message, history)
+                else:       # opening questions repeat across guests and rooms
+                    reply = await presence.cache.get(
+                        sender_name, message, lambda: ask_ai(sender_name, message, history))
+                if reply:
+                    # Re-read: another answer for this guest may have finished meanwhile
+                    history = user_histories.get(sender_name, []) + [
+                        ("user", f"{sender_name}: {message}"), ("assistant", reply)]
+                    user_histories[sender_name] = history[-6:]
+
+                    chunks = chunk_message(reply)
+                    for chunk in chunks:
                         async with ws_lock:
-                            await ws.send(build_packet(EXPRESSION, encode_int(1)))
-                            await ws.send(build_packet(
-                                OUT_CHAT,
-                                encode_string(f"{greeting} {sender_name}!")
-                                + encode_int(0) + encode_int(-1)))
-                        print(f"[>] Greeting → {sender_name}", flush=True)
-                        continue
-
-                    # ── Check if message is directed at claude ──
-                    is_directed = (
-                        "claude" in msg_lower
-                        or event_type == "whisper"
-                        or msg_lower.startswith("@claude")
-                    )
-                    if not is_directed:
-                        continue
+                            await ws.send(OUT.CHAT.encode(chunk))
+                        log.info("[>] %s", chunk, extra={"event": "reply", "user": sender_name})
+                        if len(chunks) > 1:
+                            await clock.sleep(1.5)
+                else:
+                    # Fallback if AI fails
+                    async with ws_lock:
+                        await ws.send(OUT.CHAT.encode("hmm idk lol"))
+            except Exception as e:
+                log.error("[!] AI answer err: %s", e)
 
-                    # ── AI response via OpenRouter ──
-                    history = user_histories.get(sender_name, [])
-                    reply = await ai_respond(sender_name, message, history, http)
-                    if reply:
-                        history.append(("user", f"{sender_name}: {message}"))
-                        history.append(("assistant", reply))
-                        user_histories[sender_name] = history[-6:]
-
-                        chunks = chunk_message(reply)
-                        for chunk in chunks:
-                            async with ws_lock:
-                                await ws.send(build_packet(
-                                    OUT_CHAT,
-                                    encode_string(chunk)
-                                    + encode_int(0) + encode_int(-1)))
-                            print(f"[>] {chunk}", flush=True)
-                            if len(chunks) > 1:
-                                await asyncio.sleep(1.5)
-                    else:
-                        # Fallback if AI fails
-                        async with ws_lock:
-                            await ws.send(build_packet(
-                                OUT_CHAT,
-                                encode_string("hmm idk lol")
-                                + encode_int(0) + encode_int(-1)))
-
-                except Exception as e:
-                    print(f"[!] Chat handler err: {e}", flush=True)
-                finally:
-                    responding.set()  # free
-
-    # ── Ambient behavior task ─────────────────────────────────────────
-    async def ambient_task():
-        await asyncio.sleep(15)  # let the bot settle in first
-        wp_idx = 0
-        dancing = False
+    async def chat_handler_task():
         while True:
+            event_type, sender_ruid, sender_name, message = await chat_queue.get()
+            responding.acquire()  # busy
             try:
-                # Pause while responding to chat
-                await responding.wait()
+                # ── New user greeting (sender_name may be a group) ──
+                if event_type == "new_user":
+                    async with ws_lock:
+                        await ws.send(OUT.EXPRESSION.encode(1))  # wave
+                        await ws.send(OUT.CHAT.encode(f"Welcome to Clabo Hotel, {sender_name}!"))
+                    log.info("[>] Greeted %s", sender_name)
+                    continue
 
-                roll = random.random()
+                msg_lower = message.lower().strip()
 
-                if roll < 0.12:
-                    # Dance
-                    style = random.randint(1, 4)
-                    async with ws_lock:
-                        await ws.send(build_packet(DANCE, encode_int(style)))
-                    dancing = True
-                    print(f"[~] Ambient dance (style {style})", flush=True)
-                    await asyncio.sleep(random.uniform(6, 12))
+                # ── Keyword: stop (while following this guest) ──
+                if follower.is_stop_command(sender_ruid, message):
+                    follower.stop(f"{sender_name} said stop")
                     async with ws_lock:
-                        await ws.send(build_packet(DANCE, encode_int(0)))
-                    dancing = False
+                        await ws.send(OUT.CHAT.encode("Okay, I'll wait here."))
+                    continue
 
-                elif roll < 0.20:
-                    # Wave
+                # ── Keyword: dance ──
+                if "dance" in msg_lower:
+                    style = rng.randint(1, 4)
                     async with ws_lock:
-                        await ws.send(build_packet(EXPRESSION, encode_int(1)))
-                    print("[~] Ambient wave", flush=True)
-                    await asyncio.sleep(3)
+                        await ws.send(OUT.DANCE.encode(style))
+                        await ws.send(OUT.CHAT.encode("Sure, I love a good dance!"))
+                    log.info("[>] Dancing (style %s)", style)
+                    await clock.sleep(8)
+                    async with ws_lock:
+                        await ws.send(OUT.DANCE.encode(0))
+                    continue
 
-                elif roll < 0.28:
-                    # Say something casual
-                    line = random.choice(IDLE_LINES)
+                # ── Keyword: wave ──
+                if msg_lower in ("wave", "wave!"):
                     async with ws_lock:
-                        await ws.send(build_packet(
-                            OUT_CHAT,
-                            encode_string(line) + encode_int(0) + encode_int(-1)))
-                    print(f'[~] "{line}"', flush=True)
-                    await asyncio.sleep(5)
+                        await ws.send(OUT.EXPRESSION.encode(1))
+                    log.info("[>] *waves*")
+                    continue
 
-                else:
-                    # Patrol to next waypoint
-                    if dancing:
+                # ── Keyword: follow me ──
+                if any(kw in msg_lower for kw in FOLLOW_KEYWORDS):
+                    if await follower.start(sender_ruid, sender_name):
                         async with ws_lock:
-                            await ws.send(build_packet(DANCE, encode_int(0)))
-                        dancing = False
-                    x, y = PATROL_WAYPOINTS[wp_idx % len(PATROL_WAYPOINTS)]
+                            await ws.send(OUT.CHAT.encode("Right behind you!"))
+                        log.info("[>] Following %s", sender_name)
+                    continue
+
+                # ── Keyword: greetings (hi/hey/hello…) ──
+                words = set(
+                    msg_lower.replace("!", "").replace("?", "")
+                    .replace(",", " ").replace(".", " ").split()
+                )
+                if words & GREETING_WORDS and (
+                    "claude" in msg_lower or len(words) <= 3
+                ):
+                    greeting = rng.choice(GREETING_RESPONSES)
                     async with ws_lock:
-                        await ws.send(build_packet(MOVE_AVATAR,
-                                                   encode_int(x) + encode_int(y)))
-                    wp_idx += 1
-                    print(f"[~] Patrol → ({x},{y})", flush=True)
+                        await ws.send(OUT.EXPRESSION.encode(1))
+                        await ws.send(OUT.CHAT.encode(f"{greeting} {sender_name}!"))
+                    log.info("[>] Greeting → %s", sender_name)
+                    continue
 
-                await asyncio.sleep(random.uniform(10, 25))
+                # ── Check if message is directed at claude ──
+                is_directed = (
+                    "claude" in msg_lower
+                    or event_type == "whisper"
+                    or msg_lower.startswith("@claude")
+                )
+                if not is_directed:
+                    continue
 
-            except websockets.exceptions.ConnectionClosed:
-                break
-            except Exception as e:
-                print(f"[!] Ambient err: {e}", flush=True)
-                await asyncio.sleep(5)
+                # ── AI response via OpenRouter ──
+                if presence.batcher:
+                    # Answer off the queue, so the next guests' messages
+                    # can join the same batched request
+                    task = asyncio.create_task(answer(sender_name, message))
+                    answering.add(task)
+                    task.add_done_callback(answering.discard)
+                else:
+                    await answer(sender_name, message)
 
-    # ── Run all three tasks concurrently ──────────────────────────────
+            except Exception as e:
+                log.error("[!] Chat handler err: %s", e)
+            finally:
+                responding.release()  # free
+                chat_queue.task_done()
+
+    # ── Ambient behavior (behaviors/claude.json) ─────────────────────
+    # Runs on the shared timer wheel; while the chat handler holds
+    # `responding`, due steps wait for it.
+    def world():
+        own = room_users.get(own_room_unit_id)
+        others = [(u["x"], u["y"]) for ruid, u in room_users.items()
+                  if ruid != own_room_unit_id]
+        return ((own["x"], own["y"]) if own else None), others
+
+    # ── Follow mode ("follow me" … "stop") ──────────────────────────
+    follower = Follower(ws, scheduler, username, room_users, ws_lock,
+                        distance=FOLLOW_DISTANCE, timeout=FOLLOW_TIMEOUT)
+
+    ambient = BehaviorRunner(program, ws, scheduler, username, world=world, lock=ws_lock)
+
+    # ── Control socket (python -m clabo.control claude …) ────────────
+    def state():
+        return {
+            "room": room_id,
+            "room_unit_id": own_room_unit_id,
+            "users": {ruid: f"{u['username']} ({u['x']},{u['y']})" for ruid, u in room_users.items()},
+            "chat_queue": chat_queue.qsize(),
+            "following": follower.name,
+            "ambient": {"program": ambient.program.name, "step": ambient.pc,
+                        "loop": ambient.loop, "paused": ambient.paused},
+            "timers": scheduler.pending,
+            "admission": dict(admission.counts),
+            "rooms": plan.rooms,
+            "ai_cache": presence.cache.summary(),
+            "ai_batch": presence.batcher.summary() if presence.batcher else None,
+            "chatlog_rows": chatlog.written + len(chatlog.batch) if chatlog else None,
+            "histories": {name: [content for _, content in h] for name, h in user_histories.items()},
+        }
+
+    def pause():
+        ambient.pause()
+        return "ambient paused"
+
+    def resume():
+        ambient.resume()
+        return "ambient resumed"
+
+    def reload():
+        ambient.reload(compile_behavior(load_behavior(BEHAVIOR)))
+        presence.persona = load_persona()      # every session
+        dropped = presence.cache.clear()       # replies in the old persona's voice
+        return {"behavior": ambient.program.name, "steps": len(ambient.program.ops),
+                "persona": presence.persona[:80], "cache_dropped": dropped}
+
+    async def change_room(target: int):
+        nonlocal room_id, own_room_unit_id, room_loaded, heatmap
+        follower.stop("changing rooms")
+        if heatmap:
+            await heatmap.close()
+            heatmap = None
+        room_id, own_room_unit_id, room_loaded = target, None, False
+        room_users.clear()
+        async with ws_lock:
+            await request_room(ws, target)
+        log.info("[*] Moving to room %s", target)
+        return target
+
+    async def room_command(target):
+        if not target.isdigit():
+            raise ValueError("usage: room <id>")
+        return await change_room(int(target))
+
+    # ── Room tour (CLABO_ROOMS=a+b+c): next room every HOP_INTERVAL ───
+    # Patrol priority, so a hop waits until the current guest is answered.
+    async def hop():
+        scheduler.call_later(HOP_INTERVAL, hop, owner=username, priority=PRIORITY_PATROL)
+        rooms = plan.rooms
+        await change_room(rooms[(rooms.index(room_id) + 1) % len(rooms)] if room_id in rooms else rooms[0])
+
+    control = ControlServer(username, state, watchdog, profiler)
+    register_avatar(control, ws, ws_lock)
+    control.register("pause", pause, "pause ambient behavior")
+    control.register("resume", resume, "resume ambient behavior")
+    control.register("reload", reload, "re-read behaviors/claude.json and the persona")
+    control.register("room", room_command, "room <id>: move to another room, same connection")
+
+    # ── Run listener, chat handler and ambient timers ────────────────
+    # The listener only returns once the socket is gone; let the chat
+    # handler finish what was already queued, then stop the others.
+    chat_task = asyncio.create_task(chat_handler_task(), name=f"chat-handler-{username}")
+    asyncio.current_task().set_name(f"listener-{username}")
+    ambient.start()
+    if len(plan.rooms) > 1:
+        scheduler.call_later(HOP_INTERVAL, hop, owner=username, priority=PRIORITY_PATROL)
+    await control.start()
     try:
-        await asyncio.gather(
-            listener_task(),
-            chat_handler_task(),
-            ambient_task(),
-        )
+        await listener_task()
+        await chat_queue.join()
+        if answering:
+            await asyncio.gather(*answering, return_exceptions=True)
     except websockets.exceptions.ConnectionClosed:
-        print("[!] Connection closed.", flush=True)
+        log.warning("[!] Connection closed.")
     finally:
+        await control.close()
+        chat_task.cancel()
+        for task in answering:
+            task.cancel()
+        await asyncio.gather(chat_task, *answering, return_exceptions=True)
+        ambient.stop()
+        scheduler.cancel_owner(username)
+        if heatmap:
+            await heatmap.close()
         await ws.close()
-        print("[*] Disconnected.", flush=True)
+        log.info("[*] Disconnected.")
 
 
 # ── Entry point ──────────────────────────────────────────────────────
@@ -691,15 +687,15 @@ if __name__ == "__main__":
         fp.write(str(os.getpid()))
         fp.flush()
     except BlockingIOError:
-        print("[!] Bot is already running.")
+        log.warning("[!] Bot is already running.")
         sys.exit(1)
 
     try:
-        asyncio.run(run_bot())
+        startup.run(run_bot())
     except KeyboardInterrupt:
-        print("\n[*] Bot stopped.")
+        log.info("[*] Bot stopped.")
     except Exception as e:
-        print(f"[!] Error: {e}")
+        log.error("[!] Error: %s", e)
         import traceback
         traceback.print_exc()
     finally:
@@ -5,15 +5,22 @@ Connected to Claude's brain. Walks around the room placing furniture
 to upgrade the CLABO NIGHTCLUB. Stops after 5 minutes.
 """
 
+from clabo import startup    # first, so --startup-profile times the imports below
+
 import asyncio
 import os
-import struct
-import subprocess
 import sys
 import time
 import websockets
 
-WS_URL = "ws://127.0.0.1:2096"
+from clabo.clock import clock
+from clabo.connection import authenticate, connect, enter_room, idle_drain, run_sql
+from clabo.control import ControlServer, register_avatar
+from clabo.log import setup_logging
+from clabo.messages import OUT
+from clabo.watchdog import install, uninstall
+
+WS_URL = os.environ.get("CLABO_WS_URL", "ws://127.0.0.1:2096")
 DB_USER = os.environ.get("MYSQL_USER", "arcturus_user")
 DB_PASS = os.environ.get("MYSQL_PASSWORD", "arcturus_pw")
 DB_NAME = os.environ.get("MYSQL_DATABASE", "arcturus")
@@ -21,23 +28,7 @@ ROOM_ID = 206
 USER_ID = 5
 DURATION = 300  # 5 minutes
 
-# Arcturus headers
-SECURITY_TICKET = 2419
-SECURITY_MACHINE = 2490
-CLIENT_VARIABLES = 1053
-GET_GUEST_ROOM = 2230
-OPEN_FLAT_CONNECTION = 2312
-GET_ROOM_ENTRY_DATA = 3898
-CHAT = 1314
-SHOUT = 2085
-MOVE_AVATAR = 3320
-DANCE = 2080
-PLACE_OBJECT = 1258   # payload: string "itemId x y rotation"
-MOVE_OBJECT = 248     # payload: int(itemId) int(x) int(y) int(rotation)
-CLIENT_PONG = 2596
-
-SERVER_PING = 3928
-AUTHENTICATED = 2491
+log = setup_logging("dude")
 
 # Item type names for commentary
 ITEM_NAMES = {
@@ -135,171 +126,104 @@ BUILD_PLAN = [
 ]
 
 
-def build_packet(header_id, payload=b""):
-    length = 2 + len(payload)
-    return struct.pack(">IH", length, header_id) + payload
-
-
-def encode_string(s):
-    b = s.encode("utf-8")
-    return struct.pack(">H", len(b)) + b
-
-
-def encode_int(n):
-    return struct.pack(">i", n)
-
-
-def parse_packets(data):
-    packets = []
-    o = 0
-    while o + 6 <= len(data):
-        length = struct.unpack(">I", data[o:o+4])[0]
-        if o + 4 + length > len(data):
-            break
-        hid = struct.unpack(">H", data[o+4:o+6])[0]
-        packets.append((hid, data[o+6:o+4+length]))
-        o += 4 + length
-    return packets
-
-
-async def idle_drain(ws, seconds):
-    end = asyncio.get_event_loop().time() + seconds
-    while asyncio.get_event_loop().time() < end:
-        remaining = end - asyncio.get_event_loop().time()
-        if remaining <= 0:
-            break
-        try:
-            msg = await asyncio.wait_for(ws.recv(), timeout=min(remaining, 5))
-            if isinstance(msg, bytes):
-                for hid, _ in parse_packets(msg):
-                    if hid == SERVER_PING:
-                        await ws.send(build_packet(CLIENT_PONG))
-        except asyncio.TimeoutError:
-            pass
-
-
-async def drain(ws, timeout=2):
-    all_p = []
-    while True:
-        try:
-            msg = await asyncio.wait_for(ws.recv(), timeout=timeout)
-            if isinstance(msg, bytes):
-                for hid, p in parse_packets(msg):
-                    all_p.append((hid, p))
-                    if hid == SERVER_PING:
-                        await ws.send(build_packet(CLIENT_PONG))
-        except asyncio.TimeoutError:
-            break
-    return all_p
-
-
 async def run_bot():
-    start_time = time.time()
+    watchdog, profiler = install("dude")
+    start_time = clock.time()
 
     # Refresh SSO
-    subprocess.run(
-        ["docker", "exec", "clabo-hotel-db-1", "mysql", "-u", DB_USER,
-         f"-p{DB_PASS}", DB_NAME, "-N", "-e",
-         f"UPDATE users SET auth_ticket='ClaboBot-dude-build-{int(time.time())}' WHERE id={USER_ID};"],
-        capture_output=True
-    )
-    result = subprocess.run(
-        ["docker", "exec", "clabo-hotel-db-1", "mysql", "-u", DB_USER,
-         f"-p{DB_PASS}", DB_NAME, "-N", "-e",
-         f"SELECT auth_ticket FROM users WHERE id={USER_ID};"],
-        capture_output=True, text=True
-    )
-    sso = result.stdout.strip()
-    print(f"[*] SSO: {sso}", flush=True)
-
-    ws = await asyncio.wait_for(
-        websockets.connect(WS_URL, origin="https://localhost"), timeout=5
-    )
-    print("[+] Connected!", flush=True)
+    run_sql(f"UPDATE users SET auth_ticket='ClaboBot-dude-build-{int(time.time())}' WHERE id={USER_ID};",
+            DB_USER, DB_PASS, DB_NAME)
+    sso = run_sql(f"SELECT auth_ticket FROM users WHERE id={USER_ID};", DB_USER, DB_PASS, DB_NAME)
+    log.info("[*] SSO: %s", sso)
+
+    with startup.phase("connect"):
+        ws = await connect(WS_URL)
+    log.info("[+] Connected!")
+
+    # Build progress, readable over the control socket (python -m clabo.control dude state)
+    progress = {"room": ROOM_ID, "placed": 0, "total": len(BUILD_PLAN), "last": None}
+    control = ControlServer("dude", lambda: dict(progress, elapsed=int(clock.time() - start_time)),
+                            watchdog, profiler)
+    register_avatar(control, ws, asyncio.Lock())
+    await control.start()
 
     try:
         # Auth
-        await ws.send(build_packet(SECURITY_MACHINE, encode_string("")))
-        await ws.send(build_packet(CLIENT_VARIABLES, encode_int(0) + encode_string("0") + encode_string("")))
-        await ws.send(build_packet(SECURITY_TICKET, encode_string(sso)))
-        await asyncio.sleep(2)
-        packets = await drain(ws, timeout=2)
-        if not any(h == AUTHENTICATED for h, _ in packets):
-            print("[!] Auth failed!", flush=True)
+        with startup.phase("authenticate"):
+            authenticated = await authenticate(ws, sso)
+        if not authenticated:
+            log.warning("[!] Auth failed!")
             return
-        print("[+] Authenticated!", flush=True)
+        log.info("[+] Authenticated!")
 
         # Enter room
-        await ws.send(build_packet(GET_GUEST_ROOM, encode_int(ROOM_ID) + encode_int(0) + encode_int(1)))
-        await asyncio.sleep(1)
-        await drain(ws)
-        await ws.send(build_packet(OPEN_FLAT_CONNECTION, encode_int(ROOM_ID) + encode_string("")))
-        await asyncio.sleep(1)
-        await drain(ws, timeout=3)
-        await ws.send(build_packet(GET_ROOM_ENTRY_DATA))
-        await asyncio.sleep(2)
-        await drain(ws, timeout=3)
-        print(f"[+] In room {ROOM_ID}!", flush=True)
+        with startup.phase("enter room"):
+            await enter_room(ws, ROOM_ID)
+        log.info("[+] In room %s!", ROOM_ID)
+        startup.report()
 
         # Announce
-        await ws.send(build_packet(SHOUT, encode_string("alright, time to upgrade this club!") + encode_int(0)))
-        print('[>] "alright, time to upgrade this club!"', flush=True)
+        await ws.send(OUT.SHOUT.encode("alright, time to upgrade this club!"))
+        log.info('[>] "alright, time to upgrade this club!"')
         await idle_drain(ws, 3)
 
         # Execute build plan
         placed = 0
         for item_id, type_id, x, y, rot, walk_x, walk_y, comment in BUILD_PLAN:
             # Check time limit
-            elapsed = time.time() - start_time
+            elapsed = clock.time() - start_time
             if elapsed >= DURATION:
-                print(f"\n[!] 5 minute timer reached. Stopping build.", flush=True)
+                log.warning("[!] 5 minute timer reached. Stopping build.")
                 break
 
             # Walk to placement area if specified
             if walk_x is not None:
-                await ws.send(build_packet(MOVE_AVATAR, encode_int(walk_x) + encode_int(walk_y)))
+                await ws.send(OUT.MOVE_AVATAR.encode(walk_x, walk_y))
                 await idle_drain(ws, 3)
 
             # Commentary
             if comment:
-                await ws.send(build_packet(CHAT, encode_string(comment) + encode_int(0) + encode_int(-1)))
+                await ws.send(OUT.CHAT.encode(comment))
                 name = ITEM_NAMES.get(type_id, f"item#{type_id}")
-                print(f"  [{x},{y}] {comment} ({name})", flush=True)
+                log.info("  [%s,%s] %s (%s)", x, y, comment, name)
                 await idle_drain(ws, 1)
 
             # Place the item! Payload is string: "itemId x y rotation"
             place_str = f"{item_id} {x} {y} {rot}"
-            await ws.send(build_packet(PLACE_OBJECT, encode_string(place_str)))
+            await ws.send(OUT.PLACE_OBJECT.encode(place_str))
             placed += 1
+            progress.update(placed=placed, last=ITEM_NAMES.get(type_id, f"item#{type_id}"))
 
             # Small pause between placements for visual effect
             await idle_drain(ws, 2)
 
         # Finish
-        elapsed = time.time() - start_time
-        await ws.send(build_packet(SHOUT, encode_string(f"done! placed {placed} items in {int(elapsed)}s. club upgraded!") + encode_int(0)))
-        print(f"\n[+] BUILD COMPLETE — placed {placed} items in {int(elapsed)}s", flush=True)
+        elapsed = clock.time() - start_time
+        await ws.send(OUT.SHOUT.encode(f"done! placed {placed} items in {int(elapsed)}s. club upgraded!"))
+        log.info("[+] BUILD COMPLETE — placed %s items in %ss", placed, int(elapsed))
 
         # Dance to celebrate
-        await ws.send(build_packet(DANCE, encode_int(2)))
+        await ws.send(OUT.DANCE.encode(2))
         await idle_drain(ws, 10)
-        await ws.send(build_packet(DANCE, encode_int(0)))
+        await ws.send(OUT.DANCE.encode(0))
 
         # Idle until 5 min mark
-        remaining = DURATION - (time.time() - start_time)
+        remaining = DURATION - (clock.time() - start_time)
         if remaining > 0:
-            print(f"[*] Idling for {int(remaining)}s until 5 min mark...", flush=True)
+            log.info("[*] Idling for %ss until 5 min mark...", int(remaining))
             await idle_drain(ws, remaining)
 
-        print("[*] 5 minutes up. Signing off.", flush=True)
-        await ws.send(build_packet(CHAT, encode_string("aight im out, enjoy the new club!") + encode_int(0) + encode_int(-1)))
+        log.info("[*] 5 minutes up. Signing off.")
+        await ws.send(OUT.CHAT.encode("aight im out, enjoy the new club!"))
         await idle_drain(ws, 3)
 
     except websockets.exceptions.ConnectionClosed:
-        print("[!] Connection closed.", flush=True)
+        log.warning("[!] Connection closed.")
     finally:
+        await control.close()
         await ws.close()
-        print("[*] Disconnected.", flush=True)
+        await uninstall(watchdog, profiler)
+        log.info("[*] Disconnected.")
 
 
 if __name__ == "__main__":
@@ -311,14 +235,14 @@ if __name__ == "__main__":
         fp.write(str(os.getpid()))
         fp.flush()
     except BlockingIOError:
-        print("[!] Bot is already running.")
+        log.warning("[!] Bot is already running.")
         sys.exit(1)
     try:
-        asyncio.run(run_bot())
+        startup.run(run_bot())
     except KeyboardInterrupt:
-        print("\n[*] Bot stopped.")
+        log.info("[*] Bot stopped.")
     except Exception as e:
-        print(f"[!] Error: {e}")
+        log.error("[!] Error: %s", e)
     finally:
         fp.close()
         os.unlink(lock_file)
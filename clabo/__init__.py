@@ -0,0 +1,3 @@
+"""
+Shared runtime pieces for the Clabo Hotel bots (clabo-bot*.py).
+"""
@@ -0,0 +1,105 @@
+"""
+Admission stage for incoming chat, run in the listener before a message
+reaches the chat queue (and possibly the AI).
+
+Per sender it keeps a sliding window of recent message times and their
+normalized text.  A message is dropped when the sender already sent
+`max_messages` within `window` seconds (flood), or when it is a near
+duplicate of one of their messages from the last `dup_window` seconds
+(the earlier copy stands in for it, so repeats collapse into one reply).
+"""
+
+import collections
+import difflib
+import logging
+import re
+
+from clabo.clock import clock
+
+log = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w\s]+")
+_REPEATS = re.compile(r"(.)\1{2,}")
+_SPACES = re.compile(r"\s+")
+
+ADMIT = "admit"
+FLOOD = "flood"
+DUPLICATE = "duplicate"
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop punctuation, squeeze "heyyyy" → "heyy" and spaces."""
+    text = _NON_WORD.sub(" ", text.lower())
+    text = _REPEATS.sub(r"\1\1", text)
+    return _SPACES.sub(" ", text).strip()
+
+
+class _Sender:
+    __slots__ = ("times", "texts", "dropping")
+
+    def __init__(self):
+        self.times = collections.deque()
+        self.texts = collections.deque()      # (time, normalized text)
+        self.dropping = False
+
+
+class ChatAdmission:
+    """Per-sender flood and near-duplicate filter."""
+
+    def __init__(self, max_messages: int = 4, window: float = 10.0,
+                 dup_window: float = 30.0, similarity: float = 0.85,
+                 max_senders: int = 512):
+        self.max_messages = max_messages
+        self.window = window
+        self.dup_window = dup_window
+        self.similarity = similarity
+        self.max_senders = max_senders
+        self.senders = {}
+        self.counts = collections.Counter()
+
+    def check(self, sender, name: str, text: str) -> str:
+        """Return ADMIT, FLOOD or DUPLICATE for one incoming message.
+        Only the first drop of a run is logged, not every flood line."""
+        now = clock.monotonic()
+        state = self.senders.get(sender)
+        if state is None:
+            if len(self.senders) >= self.max_senders:
+                self._prune(now)
+            state = self.senders[sender] = _Sender()
+
+        while state.times and now - state.times[0] > self.window:
+            state.times.popleft()
+        while state.texts and now - state.texts[0][0] > self.dup_window:
+            state.texts.popleft()
+
+        norm = normalize(text)
+        verdict = ADMIT
+        if len(state.times) >= self.max_messages:
+            verdict = FLOOD
+        elif any(self._similar(norm, old) for _, old in state.texts):
+            verdict = DUPLICATE
+
+        # Dropped messages still count toward the window, so a flood has
+        # to actually stop before the sender is admitted again.
+        state.times.append(now)
+        if verdict == ADMIT:
+            state.texts.append((now, norm))
+        self.counts[verdict] += 1
+        if verdict != ADMIT and not state.dropping:
+            log.info("[~] Dropping %s chat from %s", verdict, name)
+        state.dropping = verdict != ADMIT
+        return verdict
+
+    def _similar(self, a: str, b: str) -> bool:
+        if a == b:
+            return True
+        if not a or not b:
+            return False
+        return difflib.SequenceMatcher(None, a, b).ratio() >= self.similarity
+
+    def _prune(self, now: float) -> None:
+        horizon = max(self.window, self.dup_window)
+        stale = [s for s, st in self.senders.items()
+                 if not st.times or now - st.times[-1] > horizon]
+        for sender in stale:
+            del self.senders[sender]
@@ -0,0 +1,387 @@
+"""
+Declarative NPC behaviors compiled to a small state machine.
+
+A behavior file (JSON, or YAML when PyYAML is installed) lists steps
+that run in order and wrap around at the end:
+
+    {
+      "name": "joejoegopro",
+      "priority": "patrol",           # chat | patrol | ambient
+      "start_delay": 3,
+      "settle": 1,                    # wait after stopping a dance to walk
+      "pools": {"hype": ["DJ drop that beat!", ...],
+                "waypoints": [[16, 19], [13, 15]]},
+      "steps": [
+        {"log": "--- Patrol #{loop} ---"},
+        {"walk": [9, 22], "arrive": 3, "do": "wave", "pause": 1},
+        {"walk": [10, 21], "arrive": 3, "shout": "@hype"},
+        {"label": "top", "choose": [[0.12, "dance"], [0.88, "patrol"]]},
+        {"label": "dance", "do": "dance", "pause": [6, 12]},
+        {"do": "stop_dance", "goto": "top"},
+        {"label": "patrol", "walk": "@waypoints",
+         "if": "guests_nearby", "radius": 6, "else": "top"}
+      ]
+    }
+
+Each step is applied in this order: if/chance (skip or jump to "else"
+when false), log, walk (stops a dance first unless the step dances),
+arrive (wait), do (wave, dance, stop_dance, sign, laugh, kiss, jump),
+say/shout, pause (wait), goto.  A "choose" step (weighted jump) takes
+only label and if/chance besides, since it always jumps away.
+Durations are seconds or [min, max] ranges.  "@pool" text picks a
+random line from the pool; "@pool" positions cycle through it in order.
+
+Steps compile to a flat list of ops with resolved jump targets; a
+BehaviorRunner executes ops until the next wait and then parks itself
+on the shared Scheduler, so a behavior costs one timer, not a task.
+"""
+
+import asyncio
+import json
+import logging
+import math
+
+from clabo.clock import rng
+from clabo.messages import OUT
+from clabo.scheduler import PRIORITY_AMBIENT, PRIORITY_CHAT, PRIORITY_PATROL
+
+log = logging.getLogger(__name__)
+
+PRIORITIES = {"chat": PRIORITY_CHAT, "patrol": PRIORITY_PATROL, "ambient": PRIORITY_AMBIENT}
+EXPRESSIONS = {"wave": 1, "kiss": 2, "laugh": 3, "jump": 5}
+ACTIONS = ("log", "walk", "arrive", "do", "say", "shout", "pause", "goto")
+CONDITIONS = {"guests_nearby", "no_guests_nearby", "guests_in_room", "dancing", "not_dancing"}
+
+# Ops: (opcode, *args)
+OP_LOG = 0            # (template,)
+OP_STOP_DANCE = 1     # (settle_seconds,)
+OP_MOVE = 2           # (pos_source,)
+OP_WAIT = 3           # (duration,)
+OP_DO = 4             # (action,)
+OP_SAY = 5            # (text_source, message)
+OP_JUMP = 6           # (target,)
+OP_BRANCH = 7         # (condition, radius, chance, else_target)
+OP_CHOOSE = 8         # (cumulative_weights, targets)
+
+MAX_OPS_PER_RUN = 1000   # guard against a loop of steps without any wait
+
+
+class BehaviorError(ValueError):
+    """Invalid behavior definition."""
+
+
+class Program:
+    """Compiled behavior: flat op list plus the pools it draws from."""
+
+    def __init__(self, name: str, ops: list, pools: dict, priority: int, start_delay):
+        self.name = name
+        self.ops = ops
+        self.pools = pools
+        self.priority = priority
+        self.start_delay = start_delay
+
+
+def load_behavior(path: str) -> dict:
+    """Read a behavior definition from a .json or .yaml/.yml file."""
+    with open(path, "r", encoding="utf-8") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml       # only YAML behaviors need PyYAML
+            except ImportError:
+                raise BehaviorError(f"{path}: install PyYAML to load YAML behaviors") from None
+            return yaml.safe_load(f)
+        return json.load(f)
+
+
+def _duration(value, where: str):
+    if isinstance(value, (int, float)) and value >= 0:
+        return float(value)
+    if (isinstance(value, list) and len(value) == 2
+            and all(isinstance(v, (int, float)) for v in value) and 0 <= value[0] <= value[1]):
+        return (float(value[0]), float(value[1]))
+    raise BehaviorError(f"{where}: duration must be seconds or [min, max]")
+
+
+def _source(value, pools: dict, kind: str, where: str):
+    if isinstance(value, str) and value.startswith("@"):
+        pool = value[1:]
+        if pool not in pools or not pools[pool]:
+            raise BehaviorError(f"{where}: unknown or empty pool {value!r}")
+        return ("pool", pool)
+    if kind == "pos":
+        if not (isinstance(value, list) and len(value) == 2 and all(isinstance(v, int) for v in value)):
+            raise BehaviorError(f"{where}: position must be [x, y] or @pool")
+        return ("pos", tuple(value))
+    if not isinstance(value, str):
+        raise BehaviorError(f"{where}: message must be a string or @pool")
+    return ("text", value)
+
+
+def compile_behavior(spec: dict) -> Program:
+    """Validate a behavior definition and compile it to a Program."""
+    name = spec.get("name", "behavior")
+    pools = spec.get("pools", {})
+    steps = spec.get("steps")
+    if not steps:
+        raise BehaviorError(f"{name}: no steps")
+    priority = PRIORITIES.get(spec.get("priority", "ambient"))
+    if priority is None:
+        raise BehaviorError(f"{name}: priority must be one of {sorted(PRIORITIES)}")
+    settle = _duration(spec.get("settle", 0), f"{name}.settle")
+    start_delay = _duration(spec.get("start_delay", 0), f"{name}.start_delay")
+
+    ops = []
+    labels = {}
+    fixups = []           # (op index, slot, label, where); slot None = last arg
+
+    for i, step in enumerate(steps):
+        where = f"{name}.steps[{i}]"
+        if "label" in step:
+            if step["label"] in labels:
+                raise BehaviorError(f"{where}: duplicate label {step['label']!r}")
+            labels[step["label"]] = len(ops)
+
+        branch = None
+        if "if" in step or "chance" in step:
+            cond = step.get("if")
+            if cond is not None and cond not in CONDITIONS:
+                raise BehaviorError(f"{where}: unknown condition {cond!r}")
+            branch = len(ops)
+            if "else" in step:
+                fixups.append((branch, None, step["else"], where))
+            ops.append([OP_BRANCH, cond, float(step.get("radius", 5)),
+                        float(step.get("chance", 1.0)), None])
+
+        if "choose" in step:
+            extra = [key for key in ACTIONS if key in step]
+            if extra:
+                raise BehaviorError(f"{where}: choose always jumps, so {', '.join(extra)} would never run")
+            options = step["choose"]
+            total = sum(float(w) for w, _ in options)
+            if total <= 0:
+                raise BehaviorError(f"{where}: choose needs [[weight, label], ...]")
+            cumulative, acc = [], 0.0
+            for j, (weight, label) in enumerate(options):
+                acc += float(weight) / total
+                cumulative.append(acc)
+                fixups.append((len(ops), j, label, where))
+            ops.append([OP_CHOOSE, cumulative, [None] * len(options)])
+
+        if "log" in step:
+            ops.append([OP_LOG, str(step["log"])])
+
+        do = step.get("do")
+        if do is not None and do not in EXPRESSIONS and do not in ("dance", "stop_dance", "sign"):
+            raise BehaviorError(f"{where}: unknown action {do!r}")
+
+        if "walk" in step:
+            if do != "dance":
+                ops.append([OP_STOP_DANCE, settle])
+            ops.append([OP_MOVE, _source(step["walk"], pools, "pos", where)])
+        if "arrive" in step:
+            ops.append([OP_WAIT, _duration(step["arrive"], where)])
+        if do is not None:
+            ops.append([OP_DO, do])
+        if "say" in step:
+            ops.append([OP_SAY, _source(step["say"], pools, "text", where), OUT.CHAT])
+        if "shout" in step:
+            ops.append([OP_SAY, _source(step["shout"], pools, "text", where), OUT.SHOUT])
+        if "pause" in step:
+            ops.append([OP_WAIT, _duration(step["pause"], where)])
+        if "goto" in step:
+            fixups.append((len(ops), None, step["goto"], where))
+            ops.append([OP_JUMP, None])
+
+        # A failed condition without "else" skips the rest of the step
+        if branch is not None and ops[branch][-1] is None:
+            ops[branch][-1] = len(ops)
+
+    for index, slot, label, where in fixups:
+        if label not in labels:
+            raise BehaviorError(f"{where}: unknown label {label!r}")
+        if slot is None:
+            ops[index][-1] = labels[label]
+        else:
+            ops[index][2][slot] = labels[label]
+
+    return Program(name, [tuple(op) for op in ops], pools, priority, start_delay)
+
+
+class BehaviorRunner:
+    """Executes a Program for one bot on a Scheduler.
+
+    world, when given, is called with no arguments and must return
+    ((own_x, own_y) or None, [(x, y), ...] for the other units)."""
+
+    def __init__(self, program: Program, ws, scheduler, owner, world=None, lock=None):
+        self.program = program
+        self.ws = ws
+        self.scheduler = scheduler
+        self.owner = owner
+        self.world = world
+        self.lock = lock or asyncio.Lock()
+        self.pc = 0
+        self.loop = 0
+        self.dancing = False
+        self.pos = None
+        self.cycles = {}      # pool → next index
+        self.timer = None
+        self.paused = False
+        self.generation = 0   # bumped by stop(); a run() from before bails out
+
+    def start(self) -> None:
+        self.timer = self.scheduler.call_later(
+            self._pick(self.program.start_delay), self.run,
+            owner=self.owner, priority=self.program.priority)
+
+    def stop(self) -> None:
+        self.generation += 1
+        if self.timer is not None:
+            self.timer.cancel()
+
+    def pause(self) -> None:
+        """Stop after the current step until resume(); pc is kept."""
+        self.paused = True
+        self.stop()
+
+    def resume(self) -> None:
+        if self.paused:
+            self.paused = False
+            self._schedule(0)
+
+    def reload(self, program: Program) -> None:
+        """Swap in a recompiled program, starting from its first step."""
+        self.stop()
+        self.program = program
+        self.pc = 0
+        self.cycles = {}
+        if not self.paused:
+            self._schedule(self._pick(program.start_delay))
+
+    @staticmethod
+    def _pick(duration) -> float:
+        if isinstance(duration, tuple):
+            return rng.uniform(*duration)
+        return duration
+
+    def _from_pool(self, source):
+        kind, value = source
+        if kind != "pool":
+            return value
+        pool = self.program.pools[value]
+        if isinstance(pool[0], list):
+            index = self.cycles.get(value, 0)
+            self.cycles[value] = index + 1
+            return tuple(pool[index % len(pool)])
+        return rng.choice(pool)
+
+    def _condition(self, cond: str, radius: float) -> bool:
+        if cond == "dancing":
+            return self.dancing
+        if cond == "not_dancing":
+            return not self.dancing
+        own, others = self.world() if self.world else (None, [])
+        if cond == "guests_in_room":
+            return bool(others)
+        own = own or self.pos
+        nearby = own is not None and any(
+            math.hypot(x - own[0], y - own[1]) <= radius for x, y in others)
+        return nearby if cond == "guests_nearby" else not nearby
+
+    async def _send(self, packet: bytes) -> None:
+        async with self.lock:
+            await self.ws.send(packet)
+
+    async def run(self) -> None:
+        """Run ops from pc up to the next wait, then reschedule."""
+        ops = self.program.ops
+        generation = self.generation
+        for _ in range(MAX_OPS_PER_RUN):
+            # Paused, resumed or reloaded while a send was in flight: the
+            # new timer owns pc now, so don't step or reschedule.
+            if self.generation != generation:
+                return
+            if self.pc >= len(ops):
+                self.pc = 0
+            if self.pc == 0:
+                self.loop += 1
+            op = ops[self.pc]
+            self.pc += 1
+            code = op[0]
+
+            if code == OP_WAIT:
+                delay = self._pick(op[1])
+                if delay > 0:
+                    self._schedule(delay)
+                    return
+            elif code == OP_MOVE:
+                x, y = self._from_pool(op[1])
+                await self._send(OUT.MOVE_AVATAR.encode(x, y))
+                self.pos = (x, y)
+            elif code == OP_STOP_DANCE:
+                if self.dancing:
+                    await self._send(OUT.DANCE.encode(0))
+                    self.dancing = False
+                    if op[1] and self.generation == generation:
+                        self._schedule(self._pick(op[1]))
+                        return
+            elif code == OP_DO:
+                await self._do(op[1], self._where())
+            elif code == OP_SAY:
+                line = self._from_pool(op[1])
+                await self._send(op[2].encode(line))
+                if op[2] is OUT.SHOUT:
+                    log.info('  %s SHOUTS: "%s"', self._where(), line)
+                else:
+                    log.info('  %s "%s"', self._where(), line)
+            elif code == OP_LOG:
+                log.info("%s", op[1].format(loop=self.loop, name=self.program.name))
+            elif code == OP_JUMP:
+                self.pc = op[1]
+            elif code == OP_BRANCH:
+                _, cond, radius, chance, else_target = op
+                ok = (cond is None or self._condition(cond, radius)) and (
+                    chance >= 1.0 or rng.random() < chance)
+                if not ok:
+                    self.pc = else_target
+            elif code == OP_CHOOSE:
+                roll = rng.random()
+                cumulative, targets = op[1], op[2]
+                for bound, target in zip(cumulative, targets):
+                    if roll < bound:
+                        break
+                self.pc = target
+        if self.generation != generation:
+            return
+        log.warning("[!] %s: %s steps without a wait, pausing 1s", self.program.name, MAX_OPS_PER_RUN)
+        self._schedule(1.0)
+
+    def _where(self) -> str:
+        if self.pos is None:
+            return f"[{self.program.name}]"
+        return f"[{self.pos[0]},{self.pos[1]}]"
+
+    def _schedule(self, delay: float) -> None:
+        if self.paused:
+            return
+        self.timer = self.scheduler.call_later(
+            delay, self.run, owner=self.owner, priority=self.program.priority)
+
+    async def _do(self, action: str, where: str) -> None:
+        if action == "dance":
+            if not self.dancing:
+                style = rng.randint(1, 4)
+                await self._send(OUT.DANCE.encode(style))
+                self.dancing = True
+                log.info("  %s *dancing* (style %s)", where, style)
+        elif action == "stop_dance":
+            if self.dancing:
+                await self._send(OUT.DANCE.encode(0))
+                self.dancing = False
+        elif action == "sign":
+            sign_num = rng.randint(0, 10)
+            await self._send(OUT.SIGN.encode(sign_num))
+            log.info("  %s *holds up sign %s*", where, sign_num)
+        else:
+            await self._send(OUT.EXPRESSION.encode(EXPRESSIONS[action]))
+            log.info("  %s *%ss*", where, action)
@@ -0,0 +1,301 @@
+"""
+Codec microbenchmarks and round-trip self-check for clabo.protocol.
+
+Synthetic ROOM_USERS / USER_UPDATE payloads are built with the mock
+server's encoders (the Arcturus layout), at 1, 50 and 500 users by
+default.  Each case reports calls/s, µs per call and the peak bytes
+allocated by one call (tracemalloc), so protocol-layer changes can be
+measured against a baseline:
+
+    python -m clabo.bench                       # all cases
+    python -m clabo.bench --users 500 --json > before.json
+    python -m clabo.bench --check 2000 --seed 1 # round-trip properties
+
+--check runs randomized round-trip properties (multibyte UTF-8 names,
+empty strings, int bounds, truncated frames and payloads, and every
+clabo.messages codec) and exits 1 with the first counterexample if any
+fails.  The same PROPERTIES run under pytest (tests/test_codec_properties.py).
+"""
+
+import argparse
+import json
+import logging
+import random
+import struct
+import sys
+import time
+import tracemalloc
+
+from clabo.messages import IN, OUT, UNIT_TYPES
+from clabo.mockserver import Unit
+from clabo.protocol import (
+    PayloadReader, build_packet, encode_bool, encode_int, encode_room_unit,
+    encode_string, parse_packets, parse_room_users, parse_user_update,
+)
+
+NAMES = ["alice", "Bob_99", "", "x" * 24, "Zoë", "日本語ユーザー", "🍸bartender🍸", "áb", "ñandú"]
+
+
+# ── Synthetic payloads ───────────────────────────────────────────────
+def random_name(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return rng.choice(NAMES)
+    alphabet = "abcXYZ019_-. éüßλжな中😀"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randrange(0, 20)))
+
+
+def make_units(n: int, rng: random.Random) -> list:
+    return [Unit(ruid, 1000 + ruid, random_name(rng), rng.randrange(0, 64), rng.randrange(0, 64))
+            for ruid in range(1, n + 1)]
+
+
+def make_mixed(n: int, rng: random.Random) -> list:
+    """Unit dicts of every type (users, pets, public and rentable bots)."""
+    return [{"type": rng.choice(list(UNIT_TYPES)), "user_id": rng.randrange(-2 ** 31, 2 ** 31),
+             "username": random_name(rng), "motto": random_name(rng), "room_unit_id": ruid,
+             "x": rng.randrange(0, 64), "y": rng.randrange(0, 64), "z": "0.0",
+             "owner_id": rng.randrange(0, 1000), "owner_name": random_name(rng),
+             "posture": "std", "skills": [rng.randrange(0, 10) for _ in range(rng.randrange(0, 6))]}
+            for ruid in range(1, n + 1)]
+
+
+def room_users_payload(units: list) -> bytes:
+    return encode_int(len(units)) + b"".join(
+        encode_room_unit(u) if isinstance(u, dict) else u.encode() for u in units)
+
+
+def user_update_payload(units: list) -> bytes:
+    return IN.USER_UPDATE.payload([u.status(f"/mv {u.x},{u.y},0.0/") for u in units])
+
+
+def random_fields(fields, rng: random.Random) -> list:
+    """Random values for a message schema (see clabo.codec)."""
+    values = []
+    for field in fields:
+        kind = field[1]
+        if isinstance(kind, tuple):
+            values.append([tuple(random_fields(kind, rng)) for _ in range(rng.randrange(0, 4))])
+        elif kind == "i":
+            values.append(rng.choice((0, -1, 2 ** 31 - 1, -2 ** 31, rng.randrange(-2 ** 31, 2 ** 31))))
+        elif kind == "h":
+            values.append(rng.randrange(0, 65536))
+        elif kind == "b":
+            values.append(rng.random() < 0.5)
+        elif kind == "s":
+            values.append(random_name(rng))
+        elif kind == "h*":
+            values.append([rng.randrange(0, 65536) for _ in range(rng.randrange(0, 5))])
+        else:
+            values.append(rng.randbytes(rng.randrange(0, 12)))
+    return values
+
+
+def wanted(fields, values: list) -> tuple:
+    """The part of values a message decoder returns."""
+    out = []
+    for field, value in zip(fields, values):
+        if field[0].startswith("_"):
+            continue
+        if isinstance(field[1], tuple):
+            value = [wanted(field[1], entry) for entry in value]
+        out.append(value)
+    return tuple(out)
+
+
+# ── Benchmarks ───────────────────────────────────────────────────────
+def measure(fn, seconds: float) -> dict:
+    """Calls/s and µs/call over about `seconds`, plus peak bytes of one call."""
+    fn()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds / 5:
+            break
+        loops *= 2
+    loops = max(1, int(loops * seconds / elapsed))
+    start = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return {"calls_per_s": round(loops / elapsed), "us_per_call": round(elapsed / loops * 1e6, 3),
+            "peak_bytes": peak}
+
+
+def cases(user_counts: list, rng: random.Random) -> list:
+    """[(name, zero-argument callable)]."""
+    chat = encode_string("hello there, welcome to the club!") + encode_int(0) + encode_int(-1)
+    frame = b"".join(build_packet(OUT.CHAT.id, chat) for _ in range(20))
+    fields = encode_int(42) + encode_string("日本語ユーザー") + encode_bool(True)
+
+    def read_fields():
+        r = PayloadReader(fields)
+        r.read_int(), r.read_string(), r.read_bool()
+
+    out = [
+        ("encode_int", lambda: encode_int(-123456)),
+        ("encode_string ascii", lambda: encode_string("hello there, welcome to the club!")),
+        ("encode_string utf-8", lambda: encode_string("日本語ユーザー🍸")),
+        ("build_packet chat", lambda: build_packet(OUT.CHAT.id, chat)),
+        ("OUT.CHAT.encode", lambda: OUT.CHAT.encode("hello there, welcome to the club!")),
+        ("IN.CHAT.decode", lambda payload=IN.CHAT.payload(7, "hello there", 0, 0, 0, 11):
+            IN.CHAT.decode(payload)),
+        ("parse_packets 20/frame", lambda: parse_packets(frame)),
+        ("PayloadReader int+str+bool", read_fields),
+    ]
+    for n in user_counts:
+        units = make_units(n, rng)
+        users, updates = room_users_payload(units), user_update_payload(units)
+        positions = {u.ruid: {"username": u.name, "user_id": u.user_id, "x": 0, "y": 0} for u in units}
+        out += [
+            (f"encode ROOM_USERS x{n}", lambda units=units: room_users_payload(units)),
+            (f"parse_room_users x{n}", lambda users=users: parse_room_users(users, {})),
+            (f"parse_room_users mixed x{n}", lambda mixed=room_users_payload(make_mixed(n, rng)):
+                parse_room_users(mixed, {})),
+            (f"encode USER_UPDATE x{n}", lambda units=units: user_update_payload(units)),
+            (f"parse_user_update x{n}", lambda updates=updates, positions=positions:
+                parse_user_update(updates, positions)),
+            (f"IN.USER_UPDATE.decode x{n}", lambda updates=updates: IN.USER_UPDATE.decode(updates)),
+        ]
+    return out
+
+
+# ── Round-trip properties ────────────────────────────────────────────
+def prop_string(rng):
+    s = random_name(rng) * rng.choice((1, 1, 1, 50))
+    r = PayloadReader(encode_string(s))
+    assert r.read_string() == s and r.remaining() == 0, s
+
+
+def prop_int_bool(rng):
+    n = rng.choice((0, -1, 2 ** 31 - 1, -2 ** 31, rng.randrange(-2 ** 31, 2 ** 31)))
+    b = rng.random() < 0.5
+    r = PayloadReader(encode_int(n) + encode_bool(b))
+    assert (r.read_int(), r.read_bool()) == (n, b), (n, b)
+
+
+def prop_packets(rng):
+    packets = [(rng.randrange(0, 65536), rng.randbytes(rng.choice((0, 1, 6, 300))))
+               for _ in range(rng.randrange(0, 8))]
+    data = b"".join(build_packet(h, p) for h, p in packets)
+    assert parse_packets(data) == packets, packets
+    cut = rng.randrange(0, len(data) + 1)
+    got = parse_packets(data[:cut])                 # truncated frame: complete packets only
+    assert got == packets[:len(got)], (cut, got)
+
+
+def prop_truncated_reader(rng):
+    data = encode_int(7) + encode_string(random_name(rng)) + encode_bool(True)
+    r = PayloadReader(data[:rng.randrange(0, len(data))])
+    try:
+        r.read_int(), r.read_string(), r.read_bool()
+    except ValueError:
+        return
+    raise AssertionError("no error on truncated payload")
+
+
+def prop_room_users(rng):
+    units = make_units(rng.choice((1, 2, 5, 50)), rng)
+    room = {}
+    parsed = parse_room_users(room_users_payload(units), room)
+    assert parsed == [(u.ruid, u.name) for u in units], (len(units), len(parsed))
+    assert all((room[u.ruid]["x"], room[u.ruid]["y"]) == (u.x, u.y) for u in units)
+
+
+def prop_room_units_mixed(rng):
+    units = make_mixed(rng.choice((1, 3, 20)), rng)
+    room = {}
+    parsed = parse_room_users(room_users_payload(units), room)
+    assert parsed == [(u["room_unit_id"], u["username"]) for u in units], (len(units), len(parsed))
+    assert all(room[u["room_unit_id"]]["type"] == UNIT_TYPES[u["type"]][0] for u in units)
+
+
+def prop_user_update(rng):
+    units = make_units(rng.choice((1, 5, 50)), rng)
+    room = {u.ruid: {"username": u.name, "user_id": u.user_id, "x": -1, "y": -1} for u in units}
+    assert parse_user_update(user_update_payload(units), room) == [u.ruid for u in units]
+    assert all((room[u.ruid]["x"], room[u.ruid]["y"]) == (u.x, u.y) for u in units)
+
+
+def prop_truncated_parsers(rng):
+    units = make_units(rng.choice((1, 5)), rng)
+    for payload, parse in ((room_users_payload(units), parse_room_users),
+                           (room_users_payload(make_mixed(5, rng)), parse_room_users),
+                           (user_update_payload(units), parse_user_update)):
+        parse(payload[:rng.randrange(0, len(payload))], {})     # must not raise
+
+
+def prop_messages(rng):
+    for message in list(OUT) + list(IN):
+        values = random_fields(message.fields, rng)
+        packet = message.encode(*values)
+        assert packet == build_packet(message.id, message.payload(*values)), message
+        (hid, payload), = parse_packets(packet)
+        assert hid == message.id and message.decode(payload) == wanted(message.fields, values), (message, values)
+
+
+def prop_truncated_messages(rng):
+    for message in list(OUT) + list(IN):
+        payload = message.payload(*random_fields(message.fields, rng))
+        try:
+            message.decode(payload[:rng.randrange(0, len(payload) + 1)])
+        except ValueError:
+            pass                    # the only error a short payload may raise
+
+
+PROPERTIES = [prop_string, prop_int_bool, prop_packets, prop_truncated_reader,
+              prop_room_users, prop_room_units_mixed, prop_user_update, prop_truncated_parsers,
+              prop_messages, prop_truncated_messages]
+
+
+def check(examples: int, seed: int) -> bool:
+    ok = True
+    for prop in PROPERTIES:
+        rng = random.Random(seed)
+        for i in range(examples):
+            try:
+                prop(rng)
+            except (AssertionError, ValueError, struct.error, UnicodeError) as e:
+                print(f"  FAIL {prop.__name__} (example {i}, seed {seed}): {type(e).__name__}: {str(e)[:200]}")
+                ok = False
+                break
+        else:
+            print(f"  ok   {prop.__name__} ({examples} examples)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark and self-check the packet codec.")
+    parser.add_argument("--users", default="1,50,500", help="ROOM_USERS/USER_UPDATE sizes")
+    parser.add_argument("--seconds", type=float, default=0.5, help="time per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--check", type=int, default=None, metavar="N",
+                        help="run round-trip properties with N examples each instead")
+    args = parser.parse_args()
+    logging.getLogger("clabo.protocol").setLevel(logging.ERROR)   # per-call parse warnings; --check reports failures
+
+    if args.check is not None:
+        sys.exit(0 if check(args.check, args.seed) else 1)
+
+    results = {}
+    for name, fn in cases([int(n) for n in args.users.split(",")], random.Random(args.seed)):
+        results[name] = measure(fn, args.seconds)
+        if not args.json:
+            r = results[name]
+            print(f"{name:32s} {r['calls_per_s']:>12,d}/s {r['us_per_call']:>11.3f} µs {r['peak_bytes']:>9,d} B")
+    if args.json:
+        print(json.dumps({"python": sys.version.split()[0], "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
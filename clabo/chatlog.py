@@ -0,0 +1,177 @@
+"""
+Chat log: room chat, arrivals and departures the bots observe, batched
+into SQLite for analytics.
+
+The listener calls ChatLog.record(), which only appends a row to an
+in-memory batch.  A background task commits the batch in one
+transaction (executemany in a worker thread) every `interval` seconds,
+or sooner once `batch_size` rows are waiting, so the event loop never
+blocks on disk.
+
+    python -m clabo.chatlog chat.db --hours          # busiest hours
+    python -m clabo.chatlog chat.db --talkers 20     # top talkers
+    python -m clabo.chatlog chat.db --room 208 --days 7 --hours
+"""
+
+import argparse
+import asyncio
+import logging
+import sqlite3
+import time
+
+from clabo.clock import clock
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id    INTEGER PRIMARY KEY,
+    ts    REAL NOT NULL,            -- unix time
+    room  INTEGER NOT NULL,
+    kind  TEXT NOT NULL,            -- chat, shout, whisper, arrive, leave
+    user  TEXT NOT NULL,
+    ruid  INTEGER,
+    text  TEXT
+);
+CREATE INDEX IF NOT EXISTS events_room_ts ON events (room, ts);
+CREATE INDEX IF NOT EXISTS events_user_ts ON events (user, ts);
+CREATE INDEX IF NOT EXISTS events_ts ON events (ts);
+"""
+
+CHAT_KINDS = ("chat", "shout", "whisper")
+
+
+def open_db(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class ChatLog:
+    """Batched, asynchronous writer for observed room events."""
+
+    def __init__(self, path: str, interval: float = 2.0, batch_size: int = 500):
+        self.path = path
+        self.interval = interval
+        self.batch_size = batch_size
+        self.conn = open_db(path)
+        self.batch = []
+        self.written = 0
+        self.full = asyncio.Event()
+        self.task = None
+        self.closing = False
+
+    def start(self) -> None:
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    def record(self, room: int, kind: str, user: str, ruid: int = None, text: str = None) -> None:
+        self.batch.append((clock.time(), room, kind, user, ruid, text))
+        if len(self.batch) >= self.batch_size:
+            self.full.set()
+
+    async def _run(self) -> None:
+        while not self.closing:
+            try:
+                await asyncio.wait_for(self.full.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self.full.clear()
+            await self.flush()
+
+    async def flush(self) -> None:
+        if not self.batch:
+            return
+        rows, self.batch = self.batch, []
+        try:
+            await asyncio.to_thread(self._write, rows)
+        except sqlite3.Error as e:
+            log.error("[!] Chat log write err (%s rows lost): %s", len(rows), e)
+            return
+        self.written += len(rows)
+
+    def _write(self, rows: list) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO events (ts, room, kind, user, ruid, text) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    async def close(self) -> None:
+        # Not cancelled: a write already in its worker thread would carry on
+        # under the final flush and conn.close().  Wake the task and let it
+        # finish the flush it is in instead.
+        self.closing = True
+        self.full.set()
+        if self.task is not None:
+            await asyncio.gather(self.task, return_exceptions=True)
+        await self.flush()
+        self.conn.close()
+        log.info("[*] Chat log: %s events → %s", self.written, self.path)
+
+
+# ── Queries ──────────────────────────────────────────────────────────
+def _where(room: int = None, days: float = None, kinds=None) -> tuple:
+    clauses, params = [], []
+    if room is not None:
+        clauses.append("room = ?")
+        params.append(room)
+    if days is not None:
+        clauses.append("ts >= ?")
+        params.append(time.time() - days * 86400)
+    if kinds:
+        clauses.append(f"kind IN ({', '.join('?' * len(kinds))})")
+        params.extend(kinds)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def busiest_hours(conn: sqlite3.Connection, room: int = None, days: float = None) -> list:
+    """[(hour 0-23 local time, chat lines, distinct talkers)], busiest first."""
+    where, params = _where(room, days, CHAT_KINDS)
+    return conn.execute(
+        "SELECT CAST(strftime('%H', ts, 'unixepoch', 'localtime') AS INTEGER) AS hour,"
+        f" COUNT(*) AS lines, COUNT(DISTINCT user) FROM events{where}"
+        " GROUP BY hour ORDER BY lines DESC", params).fetchall()
+
+
+def top_talkers(conn: sqlite3.Connection, room: int = None, days: float = None, limit: int = 10) -> list:
+    """[(user, chat lines)], most talkative first."""
+    where, params = _where(room, days, CHAT_KINDS)
+    return conn.execute(
+        f"SELECT user, COUNT(*) AS lines FROM events{where}"
+        " GROUP BY user ORDER BY lines DESC LIMIT ?", params + [limit]).fetchall()
+
+
+def room_traffic(conn: sqlite3.Connection, days: float = None) -> list:
+    """[(room, arrivals, chat lines)], busiest room first."""
+    where, params = _where(None, days)
+    return conn.execute(
+        "SELECT room, SUM(kind = 'arrive'), SUM(kind IN ('chat', 'shout', 'whisper'))"
+        f" FROM events{where} GROUP BY room ORDER BY 3 DESC", params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query a bot chat log database.")
+    parser.add_argument("db")
+    parser.add_argument("--room", type=int, default=None)
+    parser.add_argument("--days", type=float, default=None, help="only the last N days")
+    parser.add_argument("--hours", action="store_true", help="busiest hours of the day")
+    parser.add_argument("--talkers", type=int, default=None, metavar="N", help="top N talkers")
+    args = parser.parse_args()
+
+    conn = open_db(args.db)
+    if args.hours:
+        print("hour  lines  talkers")
+        for hour, lines, talkers in busiest_hours(conn, args.room, args.days):
+            print(f"{hour:02d}:00 {lines:6d} {talkers:8d}")
+    if args.talkers:
+        for user, lines in top_talkers(conn, args.room, args.days, args.talkers):
+            print(f"{lines:6d}  {user}")
+    if not args.hours and not args.talkers:
+        print("room  arrivals  lines")
+        for room, arrivals, lines in room_traffic(conn, args.days):
+            print(f"{room:4d} {arrivals:9d} {lines:6d}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
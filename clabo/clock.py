@@ -0,0 +1,61 @@
+"""
+Behavior clock and random source.
+
+Everything that waits *as behavior* — scheduler timers (ambient gaps,
+patrol steps, dances, follow checks, greeting windows), idle_drain(),
+spam and re-greet windows, the builder's 5-minute run, the mock
+server's crowd — reads `clock` instead of time/asyncio directly, and
+draws random choices from `rng`.  Network waits (handshake replies,
+RTT timeouts, pings) stay on real time.
+
+With a time warp, clock time runs `factor` times faster than real time,
+so paired with the mock server an hour of patrols plays out in a
+minute, and a fixed seed makes the choices repeatable:
+
+    CLABO_TIME_WARP=60 CLABO_SEED=7 CLABO_OFFLINE=1 python clabo-bot-joe.py
+    python -m clabo.mockserver --warp 60 --seed 7 --users 30
+
+Environment:
+    CLABO_TIME_WARP=1       clock seconds per real second
+    CLABO_SEED=             seed for rng (unset: seeded from the OS)
+"""
+
+import asyncio
+import os
+import random
+import time
+
+TIME_WARP = float(os.environ.get("CLABO_TIME_WARP", "1"))
+SEED = os.environ.get("CLABO_SEED", "")
+
+
+class Clock:
+    """Monotonic/wall time and sleep, optionally running `factor`x fast."""
+
+    def __init__(self, factor: float = 1.0):
+        self.warp(factor)
+
+    def warp(self, factor: float) -> None:
+        """Set the speed; call before anything has read the clock."""
+        if factor <= 0:
+            raise ValueError("time warp must be positive")
+        self.factor = float(factor)
+        self.origin = time.monotonic()
+        self.origin_wall = time.time()
+
+    def monotonic(self) -> float:
+        return self.origin + (time.monotonic() - self.origin) * self.factor
+
+    def time(self) -> float:
+        return self.origin_wall + (time.monotonic() - self.origin) * self.factor
+
+    def real(self, seconds: float) -> float:
+        """Real seconds that `seconds` of clock time take."""
+        return seconds / self.factor
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds / self.factor)
+
+
+clock = Clock(TIME_WARP)
+rng = random.Random(int(SEED) if SEED else None)
@@ -0,0 +1,333 @@
+"""
+Codec compiler for the message schemas in clabo.messages.
+
+A schema is a tuple of fields, (name, kind) or (name, kind, default):
+
+    "i"   >i int                "h"   >H short          "b"   bool (one byte)
+    "s"   >H-prefixed UTF-8     "h*"  >i count, then that many shorts
+    "*"   the rest of the payload, raw bytes
+    (field, ...)                >i count, then that many entries of the
+                                nested schema (lists of tuples)
+
+compile_encoder() and compile_decoder() turn a schema into the source of
+one specialized function and exec it once: no per-field
+dispatch, and each run of fixed-size fields is a single precompiled
+struct.Struct (the packet's length and header id included).  Names
+starting with "_" are written by the encoder (as the parameter without
+the "_") but skipped by the decoder; a message decoder also stops after
+its last wanted field, so trailing fields it ignores may be absent.
+
+    >>> from clabo.messages import IN, OUT
+    >>> OUT.CHAT.encode("hi")                      # whole packet
+    >>> ruid, text = IN.CHAT.decode(payload)       # ValueError if truncated
+    >>> print(OUT.CHAT.source)                     # the generated code
+"""
+
+import keyword
+import struct
+
+FIXED = {"i": ("i", 4), "h": ("H", 2), "b": ("?", 1)}
+
+
+class _Source:
+    """Lines and globals of one generated function."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lines = []
+        self.env = {"_pack_shorts": _pack_shorts, "_unpack_shorts": _unpack_shorts}
+        self.count = 0
+
+    def var(self, prefix: str) -> str:
+        self.count += 1
+        return f"_{prefix}{self.count}"
+
+    def struct(self, fmt: str) -> str:
+        name = self.var("S")
+        self.env[name] = struct.Struct(">" + fmt)
+        return name
+
+    def const(self, value) -> str:
+        name = self.var("K")
+        self.env[name] = value
+        return name
+
+    def emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def build(self, signature: str):
+        source = f"def {self.name}({signature}):\n" + "\n".join(self.lines) + "\n"
+        exec(compile(source, f"<codec {self.name}>", "exec"), self.env)
+        fn = self.env[self.name]
+        fn.source = source
+        return fn
+
+
+def _pack_shorts(values) -> bytes:
+    return struct.pack(f">{len(values)}H", *values)
+
+
+def _unpack_shorts(data: bytes, pos: int, count: int) -> list:
+    return list(struct.unpack_from(f">{count}H", data, pos))
+
+
+def _fields(schema):
+    for field in schema:
+        name, kind = field[0], field[1]
+        if not isinstance(kind, tuple) and kind not in FIXED and kind not in ("s", "h*", "*"):
+            raise ValueError(f"field {name!r}: unknown kind {kind!r}")
+        yield name, kind, field[2:]
+
+
+# ── Encoders ─────────────────────────────────────────────────────────
+def _encode_parts(src: _Source, schema, values: list, indent: int, head: list = None):
+    """Emit the statements for schema's fields; returns (part expressions,
+    fixed payload bytes, variable-length part names)."""
+    parts, variable = [], []
+    fmt, args = ("IH", list(head)) if head else ("", [])
+    fixed = 0
+
+    def flush():
+        nonlocal fmt, args
+        if fmt:
+            parts.append(f"{src.struct(fmt)}.pack({', '.join(args)})")
+            fmt, args = "", []
+
+    for (name, kind, _), value in zip(_fields(schema), values):
+        if isinstance(kind, tuple):
+            entries, joined = src.var("e"), src.var("j")
+            names = [src.var("v") for _ in kind]
+            fmt += "i"
+            args.append(f"len({value})")
+            fixed += 4
+            flush()
+            src.emit(indent, f"{entries} = []")
+            src.emit(indent, f"for ({', '.join(names)},) in {value}:")
+            inner, _, _ = _encode_parts(src, kind, names, indent + 1)
+            src.emit(indent + 1, f"{entries}.append({' + '.join(inner) or repr(b'')})")
+            src.emit(indent, f"{joined} = b''.join({entries})")
+            parts.append(joined)
+            variable.append(joined)
+        elif kind == "s":
+            encoded = src.var("b")
+            src.emit(indent, f"{encoded} = {value}.encode('utf-8')")
+            fmt += "H"
+            args.append(f"len({encoded})")
+            fixed += 2
+            flush()
+            parts.append(encoded)
+            variable.append(encoded)
+        elif kind == "h*":
+            shorts = src.var("h")
+            src.emit(indent, f"{shorts} = _pack_shorts({value})")
+            fmt += "i"
+            args.append(f"len({value})")
+            fixed += 4
+            flush()
+            parts.append(shorts)
+            variable.append(shorts)
+        elif kind == "*":
+            flush()
+            parts.append(value)
+            variable.append(value)
+        else:
+            code, size = FIXED[kind]
+            fmt += code
+            args.append(value)
+            fixed += size
+    flush()
+    return parts, fixed, variable
+
+
+def compile_encoder(schema, name: str, header: int = None):
+    """f(*fields) → payload bytes, or the whole packet if `header` is given.
+    Parameters are the field names without a leading "_"; a field's third
+    element is its default."""
+    src = _Source(name)
+    params, seen_default = [], False
+    for field_name, kind, default in _fields(schema):
+        param = field_name.lstrip("_")
+        if not param.isidentifier() or keyword.iskeyword(param):
+            raise ValueError(f"{name}: field name {field_name!r} is not an identifier")
+        if default:
+            params.append(f"{param}={src.const(default[0])}")
+            seen_default = True
+        elif seen_default:
+            raise ValueError(f"{name}: field {field_name!r} needs a default (it follows one)")
+        else:
+            params.append(param)
+    values = [p.split("=")[0] for p in params]
+    head = ["{length}", str(header)] if header is not None else None
+    parts, fixed, variable = _encode_parts(src, schema, values, 1, head)
+    body = " + ".join(parts) or repr(b"")
+    if header is not None:
+        length = " + ".join([str(2 + fixed)] + [f"len({v})" for v in variable])
+        body = body.replace("{length}", length, 1)
+    src.emit(1, f"return {body}")
+    return src.build(", ".join(params))
+
+
+# ── Decoders ─────────────────────────────────────────────────────────
+def _decode_fields(src: _Source, schema, indent: int, label: str, upto: int = None) -> list:
+    """Emit the statements decoding schema's fields at `pos`; returns the
+    names holding the wanted values.  Stops after field `upto`."""
+    fields = list(_fields(schema))[:upto]
+    out = []
+    group, targets, size = "", [], 0
+
+    def flush():
+        nonlocal group, targets, size
+        if not group:
+            return
+        src.emit(indent, f"if pos + {size} > end:")
+        src.emit(indent + 1, f"raise ValueError({src.const('EOF reading ' + label)})")
+        if targets:
+            src.emit(indent, f"({', '.join(targets)},) = {src.struct(group)}.unpack_from(data, pos)")
+        src.emit(indent, f"pos += {size}")
+        group, targets, size = "", [], 0
+
+    for name, kind, _ in fields:
+        wanted = not name.startswith("_")
+        if isinstance(kind, tuple) or kind == "h*":
+            count = src.var("c")
+            group += "i"
+            targets.append(count)
+            size += 4
+            flush()
+            result = src.var("v")
+            if kind == "h*":
+                src.emit(indent, f"if {count} < 0 or pos + 2 * {count} > end:")
+                src.emit(indent + 1, f"raise ValueError({src.const('EOF reading ' + label + '.' + name)})")
+                if wanted:
+                    src.emit(indent, f"{result} = _unpack_shorts(data, pos, {count})")
+                src.emit(indent, f"pos += 2 * {count}")
+            else:
+                if wanted:
+                    src.emit(indent, f"{result} = []")
+                src.emit(indent, f"for _ in range({count}):")
+                inner = _decode_fields(src, kind, indent + 1, f"{label}.{name}")
+                if wanted:
+                    src.emit(indent + 1, f"{result}.append(({', '.join(inner)},))" if inner
+                             else f"{result}.append(())")
+                else:
+                    src.emit(indent + 1, "pass")
+            if wanted:
+                out.append(result)
+        elif kind == "s":
+            length = src.var("n")
+            group += "H"
+            targets.append(length)
+            size += 2
+            flush()
+            src.emit(indent, f"if pos + {length} > end:")
+            src.emit(indent + 1, f"raise ValueError({src.const('EOF reading ' + label + '.' + name)})")
+            if wanted:
+                result = src.var("v")
+                src.emit(indent, f"{result} = data[pos:pos + {length}].decode('utf-8', 'replace')")
+                out.append(result)
+            src.emit(indent, f"pos += {length}")
+        elif kind == "*":
+            flush()
+            if wanted:
+                result = src.var("v")
+                src.emit(indent, f"{result} = data[pos:]")
+                out.append(result)
+            src.emit(indent, "pos = end")
+        else:
+            code, width = FIXED[kind]
+            if wanted:
+                result = src.var("v")
+                group += code
+                targets.append(result)
+                out.append(result)
+            else:
+                group += f"{width}x"
+            size += width
+    flush()
+    return out
+
+
+def compile_decoder(schema, name: str, whole: bool = True, as_dict: bool = False):
+    """Decoder for schema's wanted (non-"_") fields; raises ValueError on
+    truncated data.
+
+    whole: f(data) → values, reading only up to the last wanted field;
+    otherwise f(data, pos) → (values, new pos), reading every field.
+    Values are a tuple, or a dict keyed by field name with as_dict."""
+    src = _Source(name)
+    fields = list(_fields(schema))
+    wanted = [f[0] for f in fields if not f[0].startswith("_")]
+    upto = None
+    if whole:
+        upto = max((i + 1 for i, f in enumerate(fields) if not f[0].startswith("_")), default=0)
+        if upto == 0:
+            src.emit(1, "return {}" if as_dict else "return ()")
+            return src.build("data")
+        src.emit(1, "pos = 0")
+    src.emit(1, "end = len(data)")
+    names = _decode_fields(src, schema, 1, name, upto)
+    if as_dict:
+        values = "{" + ", ".join(f"{k!r}: {v}" for k, v in zip(wanted, names)) + "}"
+    else:
+        values = f"({', '.join(names)},)" if names else "()"
+    src.emit(1, f"return {values}" if whole else f"return {values}, pos")
+    return src.build("data" if whole else "data, pos=0")
+
+
+# ── Messages ─────────────────────────────────────────────────────────
+class Message:
+    """One message: header id, direction and its compiled codec.
+
+    encode(*fields) → packet, payload(*fields) → payload bytes,
+    decode(payload) → tuple of the wanted fields.  Each is compiled on
+    first use, so importing the message table stays cheap."""
+
+    COMPILERS = {
+        "encode": lambda m, label: compile_encoder(m.fields, label, header=m.id),
+        "payload": lambda m, label: compile_encoder(m.fields, label + "_payload"),
+        "decode": lambda m, label: compile_decoder(m.fields, label + "_decode"),
+    }
+
+    def __init__(self, name: str, id: int, direction: str, fields: tuple):
+        self.name = name
+        self.id = id
+        self.direction = direction
+        self.fields = fields
+        for _ in _fields(fields):       # unknown kinds still fail at import
+            pass
+
+    def __getattr__(self, attr: str):
+        compiler = Message.COMPILERS.get(attr)
+        if compiler is None:
+            raise AttributeError(attr)
+        fn = compiler(self, f"{self.direction}_{self.name.lower()}")
+        setattr(self, attr, fn)
+        return fn
+
+    @property
+    def source(self) -> str:
+        return "\n".join((self.encode.source, self.payload.source, self.decode.source))
+
+    def __repr__(self) -> str:
+        return f"{self.direction.upper()}.{self.name}({self.id})"
+
+
+class Registry:
+    """The messages of one direction, by name (attributes) and by id."""
+
+    def __init__(self, direction: str, table: tuple):
+        self.direction = direction
+        self.by_id = {}
+        for name, id, fields in table:
+            if id in self.by_id:
+                raise ValueError(f"{direction} header {id} used by {self.by_id[id].name} and {name}")
+            message = Message(name, id, direction, fields)
+            setattr(self, name, message)
+            self.by_id[id] = message
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def name(self, header: int) -> str:
+        message = self.by_id.get(header)
+        return message.name if message is not None else str(header)
@@ -0,0 +1,181 @@
+"""
+Connection setup shared by the bots: websocket connect, SSO queries,
+login/room-entry handshake and the drain helpers used while no
+listener task is running.
+
+Every connection is wrapped in a MeteredSocket feeding the process-wide
+`link` RTT estimator (clabo.rtt); handshake waits and drain quiet gaps
+are derived from its RTO rather than fixed seconds.
+
+Environment:
+    CLABO_OFFLINE=1         skip the database (e.g. against clabo.mockserver)
+    CLABO_RECORD=path       append every frame sent/received to a recording
+    CLABO_REPLAY=path       replay a recording instead of connecting
+                            (no emulator, no database)
+    CLABO_REPLAY_FAST=1     replay as fast as possible instead of wall-clock
+"""
+
+import asyncio
+import logging
+import os
+
+import websockets
+
+from clabo.clock import clock
+from clabo.messages import IN, OUT
+from clabo.protocol import parse_packets
+from clabo.recording import Recorder, RecordingSocket, ReplaySocket
+from clabo.rtt import MeteredSocket, RttEstimator
+
+log = logging.getLogger(__name__)
+
+WS_ORIGIN = "https://localhost"
+DB_CONTAINER = "clabo-hotel-db-1"
+
+OFFLINE = os.environ.get("CLABO_OFFLINE", "0") == "1"
+RECORD_PATH = os.environ.get("CLABO_RECORD", "")
+REPLAY_PATH = os.environ.get("CLABO_REPLAY", "")
+REPLAY_FAST = os.environ.get("CLABO_REPLAY_FAST", "0") == "1"
+
+# Round-trip estimate shared by every connection of this process
+link = RttEstimator()
+
+
+def offline() -> bool:
+    """True when the bot runs without the database container."""
+    return OFFLINE or bool(REPLAY_PATH)
+
+
+def run_sql(query: str, user: str, password: str, database: str) -> str:
+    """Run a query in the database container, return stripped stdout."""
+    if offline():
+        return ""
+    import subprocess
+
+    result = subprocess.run(
+        ["docker", "exec", DB_CONTAINER, "mysql", "-u", user,
+         f"-p{password}", database, "-N", "-e", query],
+        capture_output=True, text=True,
+    )
+    return result.stdout.strip()
+
+
+async def connect(url: str, timeout: float = None):
+    """Open the game websocket (or its recording/replay stand-in)."""
+    if REPLAY_PATH:
+        mode = "fast" if REPLAY_FAST else "wall-clock"
+        log.info("[*] Replaying %s (%s)", REPLAY_PATH, mode)
+        return MeteredSocket(ReplaySocket(REPLAY_PATH, realtime=not REPLAY_FAST), link)
+    if timeout is None:
+        timeout = link.timeout(5)    # TCP + TLS + upgrade: a few round trips
+    ws = await asyncio.wait_for(websockets.connect(url, origin=WS_ORIGIN), timeout=timeout)
+    if RECORD_PATH:
+        log.info("[*] Recording session → %s", RECORD_PATH)
+        ws = RecordingSocket(ws, Recorder(RECORD_PATH))
+    return MeteredSocket(ws, link)
+
+
+async def idle_drain(ws, seconds: float) -> None:
+    """Read and discard packets for `seconds` of clock time (see
+    clabo.clock), answering pings."""
+    loop = asyncio.get_running_loop()
+    end = loop.time() + clock.real(seconds)
+    while True:
+        remaining = end - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            msg = await asyncio.wait_for(ws.recv(), timeout=min(remaining, 5))
+            if isinstance(msg, bytes):
+                for hid, _ in parse_packets(msg):
+                    if hid == IN.SERVER_PING.id:
+                        await ws.send(OUT.CLIENT_PONG.encode())
+        except asyncio.TimeoutError:
+            pass
+
+
+async def drain(ws, timeout: float = None, limit: float = 10) -> list:
+    """Collect packets until `timeout` seconds (default: one RTO) pass
+    without one, answering pings.  `limit` caps the total so a busy room
+    (constant USER_UPDATEs) cannot keep the handshake waiting forever."""
+    if timeout is None:
+        timeout = link.rto
+    loop = asyncio.get_running_loop()
+    end = loop.time() + limit
+    packets = []
+    while True:
+        remaining = end - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            msg = await asyncio.wait_for(ws.recv(), timeout=min(timeout, remaining))
+        except asyncio.TimeoutError:
+            break
+        if isinstance(msg, bytes):
+            for hid, payload in parse_packets(msg):
+                packets.append((hid, payload))
+                if hid == IN.SERVER_PING.id:
+                    await ws.send(OUT.CLIENT_PONG.encode())
+    return packets
+
+
+async def await_reply(ws, header: int, factor: float = 4) -> list:
+    """Collect packets until one with `header` arrives (then drain the
+    rest of the burst) or `factor` RTOs pass; answers pings.  A missed
+    reply backs the RTO off so a congested link gets longer waits."""
+    loop = asyncio.get_running_loop()
+    end = loop.time() + link.timeout(factor)
+    packets = []
+    while True:
+        remaining = end - loop.time()
+        if remaining <= 0:
+            link.backoff()
+            return packets
+        try:
+            msg = await asyncio.wait_for(ws.recv(), timeout=remaining)
+        except asyncio.TimeoutError:
+            continue
+        if not isinstance(msg, bytes):
+            continue
+        found = False
+        for hid, payload in parse_packets(msg):
+            packets.append((hid, payload))
+            if hid == IN.SERVER_PING.id:
+                await ws.send(OUT.CLIENT_PONG.encode())
+            found = found or hid == header
+        if found:
+            return packets + await drain(ws)
+
+
+async def authenticate(ws, sso_ticket: str) -> bool:
+    """Send the login handshake; True once the server accepts the ticket."""
+    await ws.send(OUT.SECURITY_MACHINE.encode())
+    await ws.send(OUT.CLIENT_VARIABLES.encode())
+    await ws.send(OUT.SECURITY_TICKET.encode(sso_ticket))
+    # The ticket lookup hits the database: allow a few round trips
+    packets = await await_reply(ws, IN.AUTHENTICATED.id, factor=5)
+    return any(hid == IN.AUTHENTICATED.id for hid, _ in packets)
+
+
+async def enter_room(ws, room_id: int) -> list:
+    """Walk through the room-entry requests; return the packets received
+    (ROOM_USERS etc.) for the caller to parse."""
+    await ws.send(OUT.GET_GUEST_ROOM.encode(room_id))
+    await drain(ws)
+    await ws.send(OUT.OPEN_FLAT_CONNECTION.encode(room_id))
+    packets = await await_reply(ws, IN.ROOM_OPEN.id)
+    await ws.send(OUT.GET_ROOM_ENTRY_DATA.encode())
+    packets += await await_reply(ws, IN.ROOM_USERS.id)
+    return packets
+
+
+async def request_room(ws, room_id: int) -> None:
+    """Start moving to another room on a socket a listener task is
+    reading: the listener sends request_entry_data() on ROOM_OPEN and
+    parses ROOM_MODEL / ROOM_USERS itself."""
+    await ws.send(OUT.GET_GUEST_ROOM.encode(room_id))
+    await ws.send(OUT.OPEN_FLAT_CONNECTION.encode(room_id))
+
+
+async def request_entry_data(ws) -> None:
+    await ws.send(OUT.GET_ROOM_ENTRY_DATA.encode())
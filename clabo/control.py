@@ -0,0 +1,201 @@
+"""
+Local control socket for a running bot.
+
+Each bot listens on a Unix socket, <dir>/clabo-<name>.sock, in /tmp by
+default (CLABO_CONTROL=dir to move it, CLABO_CONTROL=0 to disable).  The
+protocol is one JSON object per line in each direction:
+
+    → {"cmd": "say", "args": ["hello everyone"]}
+    ← {"ok": true, "result": ...}
+
+From a shell:
+
+    python -m clabo.control claude state
+    python -m clabo.control claude say "the pool party starts in 5 minutes!"
+    python -m clabo.control joe pause
+    python -m clabo.control claude room 206
+
+Every bot has "help", "state", "metrics" (link RTT, loop lag) and
+"profile" (toggle the sampling profiler, like SIGUSR2); the rest are
+registered by the bot itself.
+"""
+
+import asyncio
+import inspect
+import json
+import logging
+import os
+import sys
+
+from clabo.connection import link
+from clabo.messages import OUT
+
+log = logging.getLogger(__name__)
+
+CONTROL = os.environ.get("CLABO_CONTROL", "")
+
+MAX_LINE = 64 * 1024
+
+
+def socket_path(name: str) -> str:
+    # A directory, not one path: every session and fleet worker needs its own
+    return os.path.join(CONTROL if CONTROL and CONTROL != "0" else "/tmp", f"clabo-{name}.sock")
+
+
+class ControlServer:
+    """Dispatches control commands to handlers registered by the bot.
+
+    A handler takes the command's string arguments and returns anything
+    JSON-serializable (or a coroutine producing it); raising ValueError
+    reports a usage error to the caller."""
+
+    def __init__(self, name: str, state=None, watchdog=None, profiler=None):
+        self.name = name
+        self.path = socket_path(name)
+        self.watchdog = watchdog
+        self.profiler = profiler
+        self.commands = {}
+        self.server = None
+        self.register("help", self._help, "list commands")
+        self.register("metrics", self._metrics, "link RTT and event-loop lag")
+        if state is not None:
+            self.register("state", state, "what the bot is doing right now")
+        if profiler is not None:
+            self.register("profile", lambda: profiler.toggle() or "started",
+                          "start/stop the sampling profiler (same as SIGUSR2)")
+
+    def register(self, name: str, handler, help: str = "") -> None:
+        self.commands[name] = (handler, help)
+
+    def _help(self) -> dict:
+        return {name: help for name, (_, help) in sorted(self.commands.items())}
+
+    def _metrics(self) -> dict:
+        metrics = {"rtt": link.summary(), "rto_ms": round(link.rto * 1000)}
+        if self.watchdog is not None:
+            metrics["loop_lag_max_ms"] = round(self.watchdog.max_lag * 1000)
+            metrics["loop_stalls"] = self.watchdog.stalls
+        if self.profiler is not None:
+            metrics["profiling"] = self.profiler.running
+        return metrics
+
+    async def start(self) -> bool:
+        if CONTROL == "0":
+            return False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)       # stale socket from a crashed run (lock file guards real ones)
+        self.server = await asyncio.start_unix_server(self._client, path=self.path, limit=MAX_LINE)
+        os.chmod(self.path, 0o600)
+        log.info("[*] Control socket: %s", self.path)
+        return True
+
+    async def _client(self, reader, writer) -> None:
+        try:
+            while line := await reader.readline():
+                reply = await self.dispatch(line)
+                writer.write(json.dumps(reply, default=str).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, line: bytes) -> dict:
+        try:
+            request = json.loads(line)
+            cmd = request["cmd"]
+            args = [str(a) for a in request.get("args", [])]
+        except (ValueError, KeyError, TypeError):
+            return {"ok": False, "error": 'expected {"cmd": ..., "args": [...]}'}
+        if cmd not in self.commands:
+            return {"ok": False, "error": f"unknown command {cmd!r}, try help"}
+        handler, help = self.commands[cmd]
+        try:
+            inspect.signature(handler).bind(*args)
+        except TypeError:
+            return {"ok": False, "error": f"usage: {help}" if " " in help else f"{cmd} takes no arguments"}
+        try:
+            result = handler(*args)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            log.error("[!] Control %s err: %s", cmd, e)
+            return {"ok": False, "error": str(e)}
+        log.info("[~] Control: %s %s", cmd, " ".join(args), extra={"event": "control", "cmd": cmd})
+        return {"ok": True, "result": result}
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+def register_avatar(control: ControlServer, ws, lock) -> None:
+    """say / shout / move commands every bot supports."""
+
+    async def send(packet: bytes) -> None:
+        async with lock:
+            await ws.send(packet)
+
+    async def say(*words) -> str:
+        text = " ".join(words)
+        if not text:
+            raise ValueError("usage: say <text>")
+        await send(OUT.CHAT.encode(text))
+        return text
+
+    async def shout(*words) -> str:
+        text = " ".join(words)
+        if not text:
+            raise ValueError("usage: shout <text>")
+        await send(OUT.SHOUT.encode(text))
+        return text
+
+    async def move(x, y) -> list:
+        try:
+            x, y = int(x), int(y)
+        except ValueError:
+            raise ValueError("usage: move <x> <y>") from None
+        await send(OUT.MOVE_AVATAR.encode(x, y))
+        return [x, y]
+
+    control.register("say", say, "say <text>")
+    control.register("shout", shout, "shout <text>")
+    control.register("move", move, "move <x> <y>")
+
+
+# ── Client ───────────────────────────────────────────────────────────
+async def request(path: str, cmd: str, args: list) -> dict:
+    reader, writer = await asyncio.open_unix_connection(path, limit=16 * MAX_LINE)
+    try:
+        writer.write(json.dumps({"cmd": cmd, "args": args}).encode("utf-8") + b"\n")
+        await writer.drain()
+        return json.loads(await reader.readline())
+    finally:
+        writer.close()
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("usage: python -m clabo.control <bot name or socket path> <command> [args...]")
+        sys.exit(2)
+    target, cmd, args = sys.argv[1], sys.argv[2], sys.argv[3:]
+    path = target if os.sep in target else socket_path(target)
+    try:
+        reply = asyncio.run(request(path, cmd, args))
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"[!] No bot listening on {path}")
+        sys.exit(1)
+    if not reply.get("ok"):
+        print(f"[!] {reply.get('error')}")
+        sys.exit(1)
+    print(json.dumps(reply["result"], indent=2, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Process-sharded bot fleet.
+
+One event loop tops out on one core once hundreds of sessions are
+decoding ROOM_USERS and USER_UPDATE, so fleet mode splits the
+CLABO_ROOMS sessions (see clabo.presence) over worker processes — one
+bot process, and so one asyncio loop, per shard.  A session always
+lands on shard crc32(user_id) % workers, so the same account keeps the
+same worker (and log file) across restarts.
+
+    python -m clabo.fleet --workers 4 "208=8:claude,206=9:frontdesk2,101=10:lobby1,..."
+    python -m clabo.control fleet metrics          # summed over every session
+    python -m clabo.control fleet all pause        # command every session
+    python -m clabo.control fleet send lobby1 say hi
+
+Workers get CLABO_SHARD (log prefix and file, see clabo.log) and their
+own CLABO_LOCK; everything else in the environment is passed through,
+as is --startup-profile (see clabo.startup).
+The parent's "fleet" control socket talks to each session's own socket,
+all in the CLABO_CONTROL directory (see clabo.control).
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import zlib
+
+from clabo.control import ControlServer, request, socket_path
+from clabo.log import setup_logging
+from clabo.presence import ROOMS, parse_rooms
+
+log = logging.getLogger("clabo.fleet")      # not __name__: this runs as __main__
+
+BOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "clabo-bot-claude.py")
+DEFAULT_USER_ID = 8
+DEFAULT_USERNAME = "claude"
+
+
+def shard_of(user_id: int, workers: int) -> int:
+    return zlib.crc32(str(user_id).encode()) % workers
+
+
+def assign(plans: list, workers: int) -> dict:
+    """{shard: [SessionPlan, ...]} for the shards that got sessions."""
+    shards = {}
+    for plan in plans:
+        shards.setdefault(shard_of(plan.user_id, workers), []).append(plan)
+    return dict(sorted(shards.items()))
+
+
+class Fleet:
+    """Starts one bot process per shard and fans control commands out."""
+
+    def __init__(self, shards: dict, bot: str = BOT, bot_args: tuple = ()):
+        self.shards = shards
+        self.bot = bot
+        self.bot_args = bot_args
+        self.procs = {}
+        self.stopping = False
+        self.sessions = [plan.username for plans in shards.values() for plan in plans]
+
+    async def start(self) -> None:
+        for shard, plans in self.shards.items():
+            env = dict(os.environ,
+                       CLABO_ROOMS=",".join(plan.spec for plan in plans),
+                       CLABO_SHARD=str(shard),
+                       CLABO_LOCK=f"/tmp/clabo-fleet-s{shard}.lock")
+            # Own session: a terminal ^C reaches only the parent, which forwards it once
+            self.procs[shard] = await asyncio.create_subprocess_exec(
+                sys.executable, self.bot, *self.bot_args, env=env, start_new_session=True)
+            log.info("[+] Shard %s (pid %s): %s", shard, self.procs[shard].pid,
+                     ", ".join(map(repr, plans)))
+
+    async def wait(self) -> None:
+        async def watch(shard, proc):
+            code = await proc.wait()
+            log.log(logging.INFO if code == 0 else logging.WARNING,
+                    "[%s] Shard %s exited (%s)", "*" if code == 0 else "!", shard, code)
+        await asyncio.gather(*(watch(shard, proc) for shard, proc in self.procs.items()))
+
+    def stop(self) -> None:
+        """Forward one SIGINT; a second one would interrupt the bots' cleanup."""
+        if self.stopping:
+            return
+        self.stopping = True
+        for proc in self.procs.values():
+            if proc.returncode is None:
+                proc.send_signal(signal.SIGINT)
+
+    # ── Control ──────────────────────────────────────────────────────
+    async def ask(self, session: str, cmd: str, args: list):
+        try:
+            reply = await asyncio.wait_for(request(socket_path(session), cmd, args), timeout=5)
+        except (OSError, asyncio.TimeoutError) as e:
+            return {"ok": False, "error": f"{session}: {e or 'timeout'}"}
+        return reply
+
+    async def ask_all(self, cmd: str, args: list) -> dict:
+        replies = await asyncio.gather(*(self.ask(s, cmd, args) for s in self.sessions))
+        return dict(zip(self.sessions, replies))
+
+    def state(self) -> dict:
+        return {
+            shard: {"pid": proc.pid, "running": proc.returncode is None, "exit": proc.returncode,
+                    "sessions": [plan.username for plan in self.shards[shard]]}
+            for shard, proc in self.procs.items()
+        }
+
+    async def metrics(self) -> dict:
+        replies = await self.ask_all("metrics", [])
+        ok = {s: r["result"] for s, r in replies.items() if r.get("ok")}
+        lags = [m["loop_lag_max_ms"] for m in ok.values() if "loop_lag_max_ms" in m]
+        return {
+            "workers": len(self.procs),
+            "running": sum(proc.returncode is None for proc in self.procs.values()),
+            "sessions": len(self.sessions),
+            "reachable": len(ok),
+            "loop_lag_max_ms": max(lags, default=None),
+            "loop_stalls": sum(m.get("loop_stalls", 0) for m in ok.values()),
+            "per_session": ok,
+        }
+
+    async def send(self, session, cmd, *args):
+        if session not in self.sessions:
+            raise ValueError(f"no session {session!r}")
+        reply = await self.ask(session, cmd, list(args))
+        if not reply.get("ok"):
+            raise ValueError(reply.get("error"))
+        return reply["result"]
+
+    async def broadcast(self, cmd, *args) -> dict:
+        return {s: r.get("result") if r.get("ok") else f"error: {r.get('error')}"
+                for s, r in (await self.ask_all(cmd, list(args))).items()}
+
+
+async def run(shards: dict, bot: str, bot_args: tuple = ()) -> None:
+    fleet = Fleet(shards, bot, bot_args)
+    control = ControlServer("fleet", fleet.state)
+    control.register("metrics", fleet.metrics, "metrics summed over every session")
+    control.register("send", fleet.send, "send <session> <command> [args...]")
+    control.register("all", fleet.broadcast, "all <command> [args...]: every session")
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, fleet.stop)
+    await fleet.start()
+    await control.start()
+    try:
+        await fleet.wait()
+    finally:
+        await control.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run bot sessions sharded over worker processes.")
+    parser.add_argument("rooms", nargs="?", default=ROOMS, help="CLABO_ROOMS spec (default: $CLABO_ROOMS)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--bot", default=BOT, help="bot script each worker runs")
+    parser.add_argument("--startup-profile", action="store_true", help="workers log their start-up timing")
+    args = parser.parse_args()
+
+    setup_logging("fleet")
+    plans = parse_rooms(args.rooms or "208", DEFAULT_USER_ID, DEFAULT_USERNAME)
+    workers = max(1, args.workers)
+    shards = assign(plans, workers)
+    log.info("[*] %s sessions on %s of %s shards", len(plans), len(shards), workers)
+    asyncio.run(run(shards, args.bot, ("--startup-profile",) if args.startup_profile else ()))
+
+
+if __name__ == "__main__":
+    main()
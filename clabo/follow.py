@@ -0,0 +1,106 @@
+"""
+Continuous "follow me" mode.
+
+The listener feeds every USER_UPDATE for the followed guest into
+Follower.on_update().  Updates are coalesced to one check per server
+movement tick (Arcturus walks a unit one tile every 0.5 s), and a new
+MOVE_AVATAR is only sent once the guest has moved more than `distance`
+tiles away from the spot the bot last walked to.  Following ends after
+`timeout` seconds, when the guest leaves the room, or on stop().
+
+While following, a hold at PRIORITY_PATROL parks the owner's ambient
+timers (priority below patrol) so they don't walk the bot away from the
+guest.  Patrol-priority timers such as the room hop still fire; a hop
+ends the follow.
+"""
+
+import logging
+import math
+
+from clabo.messages import OUT
+from clabo.scheduler import PRIORITY_CHAT, PRIORITY_PATROL
+
+log = logging.getLogger(__name__)
+
+MOVE_TICK = 0.5        # server walks one tile per tick
+STOP_WORDS = {"stop", "stop following", "stay", "stay here", "wait here"}
+
+
+class Follower:
+    """Follows one guest at a time for one bot."""
+
+    def __init__(self, ws, scheduler, owner, room_users: dict, lock,
+                 distance: float = 2.0, timeout: float = 120.0):
+        self.ws = ws
+        self.scheduler = scheduler
+        self.owner = owner
+        self.room_users = room_users
+        self.lock = lock
+        self.distance = distance
+        self.timeout = timeout
+        self.hold = scheduler.hold(owner, PRIORITY_PATROL)
+        self.target = None          # roomUnitId being followed
+        self.name = None
+        self.goal = None            # tile of the last MOVE_AVATAR
+        self.check = None           # pending debounced check
+        self.expiry = None
+        self.moves = 0
+
+    @property
+    def active(self) -> bool:
+        return self.target is not None
+
+    async def start(self, ruid: int, name: str) -> bool:
+        """Start following `ruid`; False if their position is unknown."""
+        info = self.room_users.get(ruid)
+        if not info or "x" not in info:
+            return False
+        if self.active:
+            self.stop("switching guest")
+        self.target, self.name = ruid, name
+        self.goal = None
+        self.moves = 0
+        self.hold.acquire()
+        self.expiry = self.scheduler.call_later(
+            self.timeout, self.stop, "timeout", owner=self.owner, priority=PRIORITY_CHAT)
+        await self._retarget()
+        return True
+
+    def stop(self, reason: str = "stopped") -> None:
+        if not self.active:
+            return
+        log.info("[~] Stopped following %s (%s, %s moves)", self.name, reason, self.moves)
+        for timer in (self.check, self.expiry):
+            if timer is not None:
+                timer.cancel()
+        self.check = self.expiry = None
+        self.target = self.name = None
+        self.hold.release()
+
+    def is_stop_command(self, ruid: int, message: str) -> bool:
+        return self.active and ruid == self.target and \
+            message.lower().strip(" !.") in STOP_WORDS
+
+    # ── Listener hooks ────────────────────────────────────────────────
+    def on_update(self, ruids) -> None:
+        """USER_UPDATE parsed; arm one check per movement tick."""
+        if self.target in ruids and self.check is None:
+            self.check = self.scheduler.call_later(
+                MOVE_TICK, self._retarget, owner=self.owner, priority=PRIORITY_CHAT)
+
+    def on_remove(self, ruid: int) -> None:
+        if ruid == self.target:
+            self.stop("left the room")
+
+    async def _retarget(self) -> None:
+        self.check = None
+        info = self.room_users.get(self.target) if self.active else None
+        if not info:
+            return
+        x, y = info["x"], info["y"]
+        if self.goal is not None and math.hypot(x - self.goal[0], y - self.goal[1]) <= self.distance:
+            return
+        async with self.lock:
+            await self.ws.send(OUT.MOVE_AVATAR.encode(x, y))
+        self.goal = (x, y)
+        self.moves += 1
@@ -0,0 +1,73 @@
+"""
+Arrival greetings that stay cheap during join storms.
+
+Arrivals within `window` seconds of the first one are merged into one
+group greeting, so a hotel alert that drops 40 people into the lobby
+costs one wave and one chat line instead of 40.  Names are remembered
+for `ttl` seconds after they were last seen (arriving or leaving), so
+guests who reconnect are not welcomed again.
+"""
+
+from clabo.clock import clock
+from clabo.scheduler import PRIORITY_CHAT
+
+MAX_NAMES = 3          # names spelled out before "and N others"
+
+
+def group_names(names: list, max_names: int = MAX_NAMES) -> str:
+    """Join names: a / a and b / a, b and c / a, b, c and 5 others."""
+    if len(names) > max_names:
+        return f"{', '.join(names[:max_names])} and {len(names) - max_names} others"
+    if len(names) == 1:
+        return names[0]
+    return f"{', '.join(names[:-1])} and {names[-1]}"
+
+
+class ArrivalGreeter:
+    """Coalesces arrivals; calls on_group(names) once per window."""
+
+    def __init__(self, scheduler, owner, on_group, window: float = 3.0, ttl: float = 900.0):
+        self.scheduler = scheduler
+        self.owner = owner
+        self.on_group = on_group
+        self.window = window
+        self.ttl = ttl
+        self.seen = {}          # lowercase name → monotonic time last seen
+        self.pending = []
+        self.flush_timer = None
+        self.skipped = 0
+
+    def _recent(self, key: str, now: float) -> bool:
+        last = self.seen.get(key)
+        return last is not None and now - last < self.ttl
+
+    def mark_seen(self, name: str) -> None:
+        """Remember a user without greeting them (already in the room, leaving)."""
+        self.seen[name.lower()] = clock.monotonic()
+
+    def arrive(self, name: str) -> bool:
+        """Queue a greeting unless the user was seen within the TTL."""
+        now = clock.monotonic()
+        key = name.lower()
+        recent = self._recent(key, now)
+        self.seen[key] = now
+        if recent or name in self.pending:
+            self.skipped += 1
+            return False
+        self.pending.append(name)
+        if self.flush_timer is None:
+            self.flush_timer = self.scheduler.call_later(
+                self.window, self._flush, owner=self.owner, priority=PRIORITY_CHAT)
+        return True
+
+    async def _flush(self) -> None:
+        self.flush_timer = None
+        names, self.pending = self.pending, []
+        self._prune(clock.monotonic())
+        if names:
+            await self.on_group(names)
+
+    def _prune(self, now: float) -> None:
+        expired = [k for k, t in self.seen.items() if now - t >= self.ttl]
+        for key in expired:
+            del self.seen[key]
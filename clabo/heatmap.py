@@ -0,0 +1,209 @@
+"""
+Per-tile occupancy heatmaps built from the positions the bots track.
+
+Every movement tick (the server walks avatars on a 500 ms cycle) the
+current position of every avatar in the room — kept up to date from USER_UPDATE —
+is added to a NumPy count array the size of the room's heightmap, in
+one vectorized np.add.at() call.  A count is half a second an avatar
+spent on that tile, so the map shows where people actually stay (dance
+floor, bar) rather than where they walk through.
+
+Snapshots are written every `flush_interval` seconds, off the event
+loop, as <dir>/room<id>.npy (reloaded and extended on the next run),
+plus a rendered .png and a .csv of the raw counts.
+
+    python -m clabo.heatmap heatmaps/room206.npy --top 10
+    python -m clabo.heatmap heatmaps/room206.npy --png out.png --scale 16
+
+NumPy is optional for the bots, and imported only when a heatmap is
+first used, so bots without one never pay for it.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import struct
+import zlib
+
+from clabo.scheduler import PRIORITY_CHAT
+
+np = None      # numpy, once _require_numpy() has imported it
+
+log = logging.getLogger(__name__)
+
+MOVE_TICK = 0.5
+
+
+def _require_numpy() -> None:
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("install numpy to record heatmaps") from None
+        np = numpy
+
+
+def tile_mask(rows: list):
+    """Boolean (height, width) array of walkable tiles from heightmap rows."""
+    _require_numpy()
+    width = max(len(row) for row in rows)
+    mask = np.zeros((len(rows), width), dtype=bool)
+    for y, row in enumerate(rows):
+        mask[y, :len(row)] = [c != "x" for c in row]
+    return mask
+
+
+# ── Rendering ────────────────────────────────────────────────────────
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    chunk = kind + data
+    return struct.pack(">I", len(data)) + chunk + struct.pack(">I", zlib.crc32(chunk) & 0xFFFFFFFF)
+
+
+def encode_png(rgb) -> bytes:
+    """Encode an (h, w, 3) uint8 array as a PNG (no imaging library needed)."""
+    _require_numpy()
+    height, width, _ = rgb.shape
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)   # filter byte 0 per row
+    raw[:, 1:] = rgb.reshape(height, width * 3)
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + _png_chunk(b"IHDR", header)
+            + _png_chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)) + _png_chunk(b"IEND", b""))
+
+
+def colorize(counts, mask=None, scale: int = 8):
+    """Black → red → yellow → white by sqrt-scaled count; void tiles grey."""
+    _require_numpy()
+    values = np.sqrt(counts.astype(np.float64))
+    peak = values.max()
+    t = values / peak if peak > 0 else values
+    rgb = np.empty(counts.shape + (3,), dtype=np.float64)
+    rgb[..., 0] = np.clip(t * 3, 0, 1)
+    rgb[..., 1] = np.clip(t * 3 - 1, 0, 1)
+    rgb[..., 2] = np.clip(t * 3 - 2, 0, 1)
+    rgb = (rgb * 255).astype(np.uint8)
+    if mask is not None:
+        rgb[~mask] = (48, 48, 48)
+    return rgb.repeat(scale, axis=0).repeat(scale, axis=1)
+
+
+def hottest(counts, n: int = 10) -> list:
+    """[(x, y, count)] of the n most occupied tiles."""
+    _require_numpy()
+    flat = counts.ravel()
+    n = min(n, int(np.count_nonzero(flat)))
+    if n == 0:
+        return []
+    top = np.argpartition(flat, -n)[-n:]
+    top = top[np.argsort(flat[top])[::-1]]
+    ys, xs = np.unravel_index(top, counts.shape)
+    return [(int(x), int(y), int(flat[i])) for x, y, i in zip(xs, ys, top)]
+
+
+# ── Recorder ─────────────────────────────────────────────────────────
+class Heatmap:
+    """Occupancy counts for one room."""
+
+    def __init__(self, room_id: int, rows: list, out_dir: str,
+                 flush_interval: float = 60.0, scale: int = 8):
+        _require_numpy()
+        self.room_id = room_id
+        self.mask = tile_mask(rows)
+        self.out_dir = out_dir
+        self.flush_interval = flush_interval
+        self.scale = scale
+        self.base = os.path.join(out_dir, f"room{room_id}")
+        self.counts = np.zeros(self.mask.shape, dtype=np.uint32)
+        self.samples = 0
+        if os.path.exists(self.base + ".npy"):
+            previous = np.load(self.base + ".npy")
+            if previous.shape == self.counts.shape:
+                self.counts += previous.astype(np.uint32)
+            else:
+                log.warning("[!] %s.npy has another room size, starting over", self.base)
+
+    def add(self, positions) -> None:
+        """Count one sample of [(x, y), ...] positions."""
+        if not positions:
+            return
+        xy = np.asarray(positions, dtype=np.intp)
+        xs, ys = xy[:, 0], xy[:, 1]
+        height, width = self.counts.shape
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        np.add.at(self.counts, (ys[inside], xs[inside]), 1)
+        self.samples += 1
+
+    def write(self, counts=None) -> None:
+        """Save .npy/.png/.csv snapshots (blocking; run in a thread)."""
+        if counts is None:
+            counts = self.counts
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp = self.base + ".tmp.npy"
+        np.save(tmp, counts)
+        os.replace(tmp, self.base + ".npy")
+        with open(self.base + ".png", "wb") as f:
+            f.write(encode_png(colorize(counts, self.mask, self.scale)))
+        np.savetxt(self.base + ".csv", counts, fmt="%d", delimiter=",")
+
+    async def flush(self) -> None:
+        await asyncio.to_thread(self.write, self.counts.copy())
+
+
+class HeatmapSampler:
+    """Samples positions on the shared Scheduler and flushes snapshots.
+
+    Ticks run at PRIORITY_CHAT, so no hold on `owner` (answering or
+    following a guest) pauses them: occupancy must be counted then too.
+    The owner only lets cancel_owner() drop the timer with the bot's."""
+
+    def __init__(self, heatmap: Heatmap, scheduler, positions, owner=None):
+        self.heatmap = heatmap
+        self.scheduler = scheduler
+        self.positions = positions      # callable → [(x, y), ...]
+        self.owner = owner
+        self.elapsed = 0.0
+        self.timer = None
+
+    def start(self) -> None:
+        self.timer = self.scheduler.call_later(MOVE_TICK, self._tick, owner=self.owner, priority=PRIORITY_CHAT)
+
+    async def _tick(self) -> None:
+        self.heatmap.add(self.positions())
+        self.elapsed += MOVE_TICK
+        self.timer = self.scheduler.call_later(MOVE_TICK, self._tick, owner=self.owner, priority=PRIORITY_CHAT)
+        if self.elapsed >= self.heatmap.flush_interval:
+            self.elapsed = 0.0
+            await self.heatmap.flush()
+
+    async def close(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+        await self.heatmap.flush()
+        log.info("[*] Heatmap: %s samples → %s.png", self.heatmap.samples, self.heatmap.base)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render or inspect a saved room heatmap.")
+    parser.add_argument("npy", help="room<id>.npy snapshot")
+    parser.add_argument("--png", default=None)
+    parser.add_argument("--csv", default=None)
+    parser.add_argument("--scale", type=int, default=8, help="pixels per tile")
+    parser.add_argument("--top", type=int, default=10, help="print the N hottest tiles")
+    args = parser.parse_args()
+
+    _require_numpy()
+    counts = np.load(args.npy)
+    if args.png:
+        with open(args.png, "wb") as f:
+            f.write(encode_png(colorize(counts, scale=args.scale)))
+    if args.csv:
+        np.savetxt(args.csv, counts, fmt="%d", delimiter=",")
+    total = int(counts.sum())
+    print(f"{counts.shape[1]}x{counts.shape[0]} tiles, {total} samples ({total * MOVE_TICK / 3600:.1f} avatar-hours)")
+    for x, y, count in hottest(counts, args.top):
+        print(f"  ({x:2d},{y:2d}) {count:8d}  {100 * count / total:5.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Non-blocking structured logging for the bots.
+
+Log calls on the event loop only check the level and put the record on
+a queue; a background thread (logging.handlers.QueueListener) formats
+it, does the console write and, when CLABO_LOG_DIR is set, appends one
+JSON object per line to a size-rotated <name>.jsonl file.  Use %-style
+arguments (log.info("%s said %s", user, text)) so formatting, including
+tracebacks, stays off the loop; since it happens later, don't pass
+objects the caller goes on mutating.  extra={...} fields become JSON keys.
+
+Environment:
+    CLABO_LOG_LEVEL=INFO        DEBUG, INFO, WARNING, ERROR
+    CLABO_LOG_DIR=path          also write <dir>/<name>.jsonl
+    CLABO_LOG_MAX_BYTES=10485760, CLABO_LOG_BACKUPS=5   rotation
+    CLABO_SHARD=n               set by clabo.fleet: console lines get a
+                                "[sN]" prefix, the file is <name>-sN.jsonl
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+
+LOG_LEVEL = os.environ.get("CLABO_LOG_LEVEL", "INFO").upper()
+LOG_DIR = os.environ.get("CLABO_LOG_DIR", "")
+LOG_MAX_BYTES = int(os.environ.get("CLABO_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.environ.get("CLABO_LOG_BACKUPS", "5"))
+SHARD = os.environ.get("CLABO_SHARD", "")
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues the record as is.  The stock prepare() formats the
+    message and traceback on the calling thread so records can be
+    pickled; ours never leave the process."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg + extra fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage().strip(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(name: str, level: str = LOG_LEVEL, log_dir: str = LOG_DIR) -> logging.Logger:
+    """Route the "clabo" logger tree through the background writer and
+    return the logger for one bot ("clabo.<name>")."""
+    global _listener
+    root = logging.getLogger("clabo")
+    root.setLevel(level)
+    if _listener is None:
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(logging.Formatter(f"[s{SHARD}] %(message)s" if SHARD else "%(message)s"))
+        handlers = [console]
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            jsonl = logging.handlers.RotatingFileHandler(
+                os.path.join(log_dir, f"{name}-s{SHARD}.jsonl" if SHARD else f"{name}.jsonl"),
+                maxBytes=LOG_MAX_BYTES,
+                backupCount=LOG_BACKUPS, encoding="utf-8")
+            jsonl.setFormatter(JsonFormatter())
+            handlers.append(jsonl)
+        records = queue.SimpleQueue()
+        root.addHandler(_DeferredQueueHandler(records))
+        root.propagate = False
+        _listener = logging.handlers.QueueListener(records, *handlers)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    return logging.getLogger(f"clabo.{name}")
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
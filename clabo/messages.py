@@ -0,0 +1,109 @@
+"""
+The messages clabo speaks: header ids and field layouts, in one place.
+
+OUT is client → server, IN is server → client; each message is compiled
+into a specialized codec by clabo.codec (field kinds are listed there):
+
+    await ws.send(OUT.CHAT.encode("hello"))        # style 0, tracking -1
+    ruid, text = IN.CHAT.decode(payload)
+    if hid == IN.ROOM_USERS.id: ...
+
+Ids and layouts follow the Arcturus Morningstar / Nitro revision the
+hotel runs; a new emulator revision means editing this file only.
+ROOM_USERS units are a tagged union — UNIT_HEADER, then the fields
+UNIT_TYPES lists for the unit's type — decoded by
+clabo.protocol.parse_room_users.  OBJECT_ADD / OBJECT_UPDATE use the
+mock server's simplified layout.
+
+    python -m clabo.messages            # table of every message
+    python -m clabo.messages CHAT       # plus its generated code
+"""
+
+import sys
+
+from clabo.codec import Registry
+
+# ── Shared layouts ───────────────────────────────────────────────────
+CHAT_FIELDS = (   # CHAT / SHOUT / WHISPER as the room relays them
+    ("room_unit_id", "i"), ("text", "s"), ("_gesture", "i", 0), ("_bubble", "i", 0),
+    ("_links", "i", 0), ("_length", "i", 0),
+)
+STATUS_FIELDS = (   # one USER_UPDATE entry
+    ("room_unit_id", "i"), ("x", "i"), ("y", "i"), ("_z", "s"),
+    ("_head_direction", "i"), ("_body_direction", "i"), ("_status", "s"),
+)
+
+# Room units: every unit starts with UNIT_HEADER; the type int at its end
+# picks the trailing fields.
+UNIT_HEADER = (
+    ("user_id", "i"), ("username", "s"), ("_motto", "s"), ("_figure", "s"),
+    ("room_unit_id", "i"), ("x", "i"), ("y", "i"), ("_z", "s"), ("_direction", "i"),
+    ("type", "i"),
+)
+UNIT_TYPES = {
+    1: ("user", (
+        ("_gender", "s"), ("_group_id", "i"), ("_group_status", "i"), ("_group_name", "s"),
+        ("_swim_figure", "s"), ("_achievement_score", "i"), ("_is_moderator", "b"),
+    )),
+    2: ("pet", (
+        ("_pet_type", "i"), ("owner_id", "i"), ("_owner_name", "s"), ("_rarity", "i"),
+        ("_has_saddle", "b"), ("_is_riding", "b"), ("_can_breed", "b"), ("_can_harvest", "b"),
+        ("_can_revive", "b"), ("_breeding_permission", "b"), ("_level", "i"), ("_posture", "s"),
+    )),
+    3: ("bot", ()),
+    4: ("rentable_bot", (
+        ("_gender", "s"), ("owner_id", "i"), ("_owner_name", "s"), ("_skills", "h*"),
+    )),
+}
+
+# ── Client → server ──────────────────────────────────────────────────
+OUT = Registry("out", (
+    ("SECURITY_TICKET", 2419, (("ticket", "s"),)),
+    ("SECURITY_MACHINE", 2490, (("machine_id", "s", ""),)),
+    ("CLIENT_VARIABLES", 1053, (("client_id", "i", 0), ("client_url", "s", "0"), ("external_vars", "s", ""))),
+    ("GET_GUEST_ROOM", 2230, (("room_id", "i"), ("enter", "i", 0), ("forward", "i", 1))),
+    ("OPEN_FLAT_CONNECTION", 2312, (("room_id", "i"), ("password", "s", ""))),
+    ("GET_ROOM_ENTRY_DATA", 3898, ()),
+    ("CHAT", 1314, (("text", "s"), ("style", "i", 0), ("tracking_id", "i", -1))),
+    ("SHOUT", 2085, (("text", "s"), ("style", "i", 0))),
+    ("WHISPER", 1543, (("text", "s"), ("style", "i", 0))),      # text: "<recipient> <message>"
+    ("MOVE_AVATAR", 3320, (("x", "i"), ("y", "i"))),
+    ("DANCE", 2080, (("style", "i"),)),                          # 0 stops
+    ("EXPRESSION", 2456, (("expression", "i"),)),                # 1=wave 2=blow_kiss 3=laugh 5=jump_happy
+    ("SIGN", 1975, (("sign", "i"),)),
+    ("PLACE_OBJECT", 1258, (("placement", "s"),)),               # "itemId x y rotation"
+    ("MOVE_OBJECT", 248, (("item_id", "i"), ("x", "i"), ("y", "i"), ("rotation", "i"))),
+    ("CLIENT_PONG", 2596, ()),
+))
+
+# ── Server → client ──────────────────────────────────────────────────
+IN = Registry("in", (
+    ("SERVER_PING", 3928, ()),
+    ("AUTHENTICATED", 2491, ()),
+    ("ROOM_OPEN", 758, ()),
+    ("ROOM_MODEL", 1301, (("scale", "b"), ("wall_height", "i"), ("heightmap", "s"))),
+    ("ROOM_USERS", 374, (("count", "i"), ("units", "*"))),        # units: see UNIT_HEADER
+    ("USER_UPDATE", 1640, (("statuses", STATUS_FIELDS),)),
+    ("USER_REMOVE", 2661, (("room_unit_id", "s"),)),
+    ("CHAT", 1446, CHAT_FIELDS),
+    ("SHOUT", 1036, CHAT_FIELDS),
+    ("WHISPER", 1132, CHAT_FIELDS),
+    ("DANCE", 2233, (("room_unit_id", "i"), ("style", "i"))),
+    ("EXPRESSION", 1631, (("room_unit_id", "i"), ("expression", "i"))),
+    ("OBJECT_ADD", 1534, (("item_id", "i"), ("x", "i"), ("y", "i"), ("rotation", "i"))),
+    ("OBJECT_UPDATE", 3776, (("item_id", "i"), ("x", "i"), ("y", "i"), ("rotation", "i"))),
+))
+
+
+def main():
+    wanted = set(sys.argv[1:])
+    for registry in (OUT, IN):
+        for message in sorted(registry, key=lambda m: m.name):
+            fields = ", ".join(f[0] if isinstance(f[1], tuple) else f"{f[0]}:{f[1]}" for f in message.fields)
+            print(f"{registry.direction:3s} {message.id:5d} {message.name:22s} {fields}")
+            if message.name in wanted:
+                print(message.source)
+
+
+if __name__ == "__main__":
+    main()
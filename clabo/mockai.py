@@ -0,0 +1,88 @@
+"""
+Local stand-in for the OpenRouter chat-completions endpoint.
+
+Answers every request after a fixed latency with a canned reply that
+quotes the guest, so the concierge's AI path (single and batched
+requests, the response cache) can be exercised and counted offline:
+
+    python -m clabo.mockai --port 8089 --latency 0.8
+    OPENROUTER_URL=http://127.0.0.1:8089/api/v1/chat/completions \
+        CLABO_AI_BATCH=1 CLABO_OFFLINE=1 python clabo-bot-claude.py
+
+A request with response_format json_object is treated as a batch: each
+"[n] name: message" line of its last user message gets its own entry in
+the JSON reply.  --drop leaves that share of batch entries out, to
+exercise the bot's one-by-one retry.  Prints request counts on exit.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+
+from aiohttp import web
+
+BATCH_LINE = re.compile(r"^\[(\d+)\] ([^:\n]+): (.*)$", re.M)
+
+
+class MockAI:
+    def __init__(self, latency: float, drop: float, seed: int = None):
+        self.latency = latency
+        self.drop = drop
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.batches = 0
+        self.batched_messages = 0
+
+    @staticmethod
+    def reply_to(name: str, message: str) -> str:
+        return f"Happy to help, {name}! You asked: {message[:40]}"
+
+    async def complete(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        last = next((m["content"] for m in reversed(body.get("messages", [])) if m["role"] == "user"), "")
+        if (body.get("response_format") or {}).get("type") == "json_object":
+            lines = BATCH_LINE.findall(last)
+            self.batches += 1
+            self.batched_messages += len(lines)
+            content = json.dumps({n: self.reply_to(name, text) for n, name, text in lines
+                                  if self.rng.random() >= self.drop})
+        else:
+            name, _, text = last.partition(": ")
+            content = self.reply_to(name, text)
+        return web.json_response({
+            "id": f"mock-{self.requests}",
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": "stop"}],
+        })
+
+    def summary(self) -> dict:
+        return {"requests": self.requests, "batches": self.batches,
+                "batched_messages": self.batched_messages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenRouter chat-completions endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.8, help="seconds per request")
+    parser.add_argument("--drop", type=float, default=0.0, help="share of batch entries left out")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    ai = MockAI(args.latency, args.drop, args.seed)
+    app = web.Application()
+    app.router.add_post("/api/v1/chat/completions", ai.complete)
+    try:
+        web.run_app(app, host=args.host, port=args.port, print=lambda *_: print(
+            f"[+] Mock AI on http://{args.host}:{args.port}/api/v1/chat/completions", flush=True))
+    finally:
+        print(json.dumps(ai.summary(), indent=2), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+"""
+Local stand-in for the Arcturus websocket server.
+
+Speaks the subset of the protocol the bots use: auth handshake, room
+entry, ROOM_USERS / USER_UPDATE / USER_REMOVE, chat echo, dance and
+expression broadcasts, item placement acks and ping/pong.  Rooms can be
+filled with a synthetic crowd that walks, chats, arrives and leaves, so
+bot throughput and latency can be measured on a plain Linux box:
+
+    python -m clabo.mockserver --users 50 --chat-rate 2 --duration 120
+    CLABO_WS_URL=ws://127.0.0.1:2096 CLABO_OFFLINE=1 python clabo-bot-claude.py
+
+Any SSO ticket is accepted; "ClaboBot-<name>-..." tickets log in as
+<name>, everything else as bot<N>.  --script takes a JSON list of timed
+events, e.g. [{"at": 10, "join": 40}, {"at": 20, "say": "hi claude"},
+{"at": 30, "leave": 20}].  --warp runs the crowd, script and duration on
+a sped-up clabo.clock; give the bots the same CLABO_TIME_WARP.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import re
+import struct
+import time
+
+import websockets
+import websockets.exceptions
+
+from clabo.clock import TIME_WARP, clock
+from clabo.codec import compile_encoder
+from clabo.messages import IN, OUT, UNIT_HEADER, UNIT_TYPES
+from clabo.protocol import parse_packets
+
+TICK = 0.5                # Arcturus room cycle: one tile per 500 ms
+UNIT_TYPE_USER = 1
+FIGURE = "hd-180-1.ch-210-66.lg-270-82"
+
+encode_user_unit = compile_encoder(UNIT_HEADER + UNIT_TYPES[UNIT_TYPE_USER][1], "mock_user_unit")
+
+CROWD_NAMES = [
+    "alice", "bob", "carol", "dave", "erin", "frank", "grace", "heidi",
+    "ivan", "judy", "mallory", "niaj", "olivia", "peggy", "rupert", "sybil",
+    "trent", "victor", "walter", "yara",
+]
+CROWD_LINES = [
+    "hi", "hey all", "lol", "anyone wanna trade?", "nice room", "brb",
+    "where is the club?", "dance!", "wave", "who made this place?",
+    "this music slaps", "afk", "can i get rights?", "hello?",
+]
+MENTION_LINES = [
+    "hey {bot}", "{bot} what is this hotel?", "@{bot} help", "{bot} dance",
+    "{bot} follow me", "thanks {bot}!", "{bot} where can i buy furni?",
+]
+
+
+class Unit:
+    """One avatar in a mock room (a connected bot or a synthetic guest)."""
+
+    def __init__(self, ruid: int, user_id: int, name: str, x: int, y: int, client=None):
+        self.ruid = ruid
+        self.user_id = user_id
+        self.name = name
+        self.x = x
+        self.y = y
+        self.target = None
+        self.sign = None
+        self.client = client
+
+    def encode(self) -> bytes:
+        """ROOM_USERS entry in the Arcturus layout for a legacy user."""
+        return encode_user_unit(self.user_id, self.name, "mock", FIGURE, self.ruid, self.x, self.y,
+                                "0.0", 2, UNIT_TYPE_USER, "M", -1, -1, "", "", 0, False)
+
+    def status(self, status: str) -> tuple:
+        """USER_UPDATE entry (see messages.STATUS_FIELDS)."""
+        return (self.ruid, self.x, self.y, "0.0", 2, 2, status)
+
+
+class Client:
+    """One websocket connection."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.name = None
+        self.user_id = None
+        self.room = None
+        self.unit = None
+        self.ping_sent = None
+        self.mentions = []        # monotonic times of unanswered mentions
+
+    async def send(self, packet: bytes, stats) -> None:
+        try:
+            await self.ws.send(packet)
+            stats.frames_out += 1
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+
+class Stats:
+    """Throughput and latency counters for one server run."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.frames_in = 0
+        self.frames_out = 0
+        self.packets_in = {}
+        self.dropped = 0
+        self.pong_rtts = []
+        self.reply_latencies = []
+
+    @staticmethod
+    def _percentile(values: list, pct: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def summary(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "elapsed": round(elapsed, 2),
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+            "frames_out_per_s": round(self.frames_out / elapsed, 1),
+            "pongs": len(self.pong_rtts),
+            "pong_rtt_p50_ms": round(self._percentile(self.pong_rtts, 0.5) * 1000, 2),
+            "pong_rtt_p99_ms": round(self._percentile(self.pong_rtts, 0.99) * 1000, 2),
+            "replies": len(self.reply_latencies),
+            "reply_p50_ms": round(self._percentile(self.reply_latencies, 0.5) * 1000, 1),
+            "reply_p99_ms": round(self._percentile(self.reply_latencies, 0.99) * 1000, 1),
+            "packets_in": dict(sorted(self.packets_in.items())),
+            "dropped": self.dropped,
+        }
+
+
+class Room:
+    """Room state: units, connected clients and the synthetic crowd."""
+
+    def __init__(self, server, room_id: int):
+        self.server = server
+        self.room_id = room_id
+        self.width = server.width
+        self.height = server.height
+        self.units = {}           # ruid → Unit
+        self.clients = set()
+        self.next_ruid = 1
+        self.next_user_id = 1000
+        self.items = 0
+
+    def heightmap(self) -> str:
+        rows = []
+        for y in range(self.height):
+            rows.append("".join("x" if (x == 0 and y != 1) else "0" for x in range(self.width)))
+        return "\r".join(rows)
+
+    def random_tile(self) -> tuple:
+        rng = self.server.rng
+        return rng.randrange(1, self.width), rng.randrange(1, self.height)
+
+    def add_unit(self, name: str, user_id: int = None, client=None) -> Unit:
+        if user_id is None:
+            user_id = self.next_user_id
+            self.next_user_id += 1
+        x, y = (0, 1) if client else self.random_tile()
+        unit = Unit(self.next_ruid, user_id, name, x, y, client)
+        self.next_ruid += 1
+        self.units[unit.ruid] = unit
+        return unit
+
+    async def broadcast(self, packet: bytes) -> None:
+        stats = self.server.stats
+        await asyncio.gather(*(c.send(packet, stats) for c in list(self.clients)))
+
+    async def announce(self, units: list) -> None:
+        await self.broadcast(IN.ROOM_USERS.encode(len(units), b"".join(u.encode() for u in units)))
+
+    async def remove_unit(self, unit: Unit) -> None:
+        self.units.pop(unit.ruid, None)
+        await self.broadcast(IN.USER_REMOVE.encode(str(unit.ruid)))
+
+    async def say(self, unit: Unit, message: str, kind=IN.CHAT, bubble: int = 0) -> None:
+        if unit.client is None:
+            now = time.monotonic()
+            lowered = message.lower()
+            for client in self.clients:
+                if client.name and client.name.lower() in lowered:
+                    client.mentions.append(now)
+        await self.broadcast(kind.encode(unit.ruid, message, 0, bubble, 0, len(message)))
+
+    async def tick(self) -> None:
+        """Advance walking units one tile and broadcast their statuses."""
+        statuses = []
+        for unit in self.units.values():
+            if unit.target is None:
+                continue
+            tx, ty = unit.target
+            nx = unit.x + (tx > unit.x) - (tx < unit.x)
+            ny = unit.y + (ty > unit.y) - (ty < unit.y)
+            if (nx, ny) == (unit.x, unit.y):
+                unit.target = None
+                statuses.append(unit.status("/"))
+                continue
+            statuses.append(unit.status(f"/mv {nx},{ny},0.0/"))
+            unit.x, unit.y = nx, ny
+        if statuses:
+            await self.broadcast(IN.USER_UPDATE.encode(statuses))
+
+    def guests(self) -> list:
+        return [u for u in self.units.values() if u.client is None]
+
+    def add_guest(self) -> Unit:
+        name = f"{CROWD_NAMES[self.next_user_id % len(CROWD_NAMES)]}{self.next_user_id}"
+        return self.add_unit(name)
+
+    async def join(self, count: int) -> None:
+        units = [self.add_guest() for _ in range(count)]
+        if units:
+            await self.announce(units)
+
+    async def leave(self, count: int) -> None:
+        guests = self.guests()
+        self.server.rng.shuffle(guests)
+        for unit in guests[:count]:
+            await self.remove_unit(unit)
+
+    async def crowd_step(self) -> None:
+        """One tick of synthetic crowd behavior."""
+        server = self.server
+        rng = server.rng
+        guests = self.guests()
+        for unit in guests:
+            if unit.target is None and rng.random() < server.move_rate * TICK:
+                unit.target = self.random_tile()
+        if guests and rng.random() < server.chat_rate * TICK:
+            speaker = rng.choice(guests)
+            bots = [c.name for c in self.clients if c.name]
+            if bots and rng.random() < server.mention_rate:
+                line = rng.choice(MENTION_LINES).format(bot=rng.choice(bots))
+            else:
+                line = rng.choice(CROWD_LINES)
+            await self.say(speaker, line)
+        if rng.random() < server.churn_rate * TICK / 60:
+            if len(guests) > server.crowd_size or (guests and rng.random() < 0.5):
+                await self.leave(1)
+            else:
+                await self.join(1)
+
+
+class MockServer:
+    """Mock Arcturus: handles connections and drives the rooms."""
+
+    def __init__(self, crowd_size: int = 0, chat_rate: float = 0.0,
+                 move_rate: float = 0.0, mention_rate: float = 0.2,
+                 churn_rate: float = 0.0, ping_interval: float = 30.0,
+                 width: int = 20, height: int = 28, seed: int = None):
+        self.crowd_size = crowd_size
+        self.chat_rate = chat_rate            # crowd chat lines per second per room
+        self.move_rate = move_rate            # walks started per guest per second
+        self.mention_rate = mention_rate      # share of lines addressed to a bot
+        self.churn_rate = churn_rate          # arrivals/departures per minute
+        self.ping_interval = ping_interval
+        self.width = width
+        self.height = height
+        self.rng = random.Random(seed)
+        self.rooms = {}
+        self.stats = Stats()
+        self.next_bot = 1
+
+    def room(self, room_id: int) -> Room:
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = self.rooms[room_id] = Room(self, room_id)
+            for _ in range(self.crowd_size):
+                room.add_guest()
+        return room
+
+    # ── Connections ───────────────────────────────────────────────────
+    async def handler(self, ws, *_):
+        client = Client(ws)
+        pinger = asyncio.create_task(self._ping_loop(client))
+        try:
+            async for frame in ws:
+                if not isinstance(frame, bytes):
+                    continue
+                self.stats.frames_in += 1
+                for hid, payload in parse_packets(frame):
+                    self.stats.packets_in[hid] = self.stats.packets_in.get(hid, 0) + 1
+                    await self.dispatch(client, hid, payload)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            pinger.cancel()
+            await self._leave_room(client)
+
+    async def _ping_loop(self, client: Client) -> None:
+        while True:
+            await clock.sleep(self.ping_interval)
+            client.ping_sent = time.monotonic()
+            await client.send(IN.SERVER_PING.encode(), self.stats)
+
+    async def _leave_room(self, client: Client) -> None:
+        room = client.room
+        if room is None:
+            return
+        room.clients.discard(client)
+        if client.unit is not None:
+            await room.remove_unit(client.unit)
+        client.room = client.unit = None
+
+    async def dispatch(self, client: Client, hid: int, payload: bytes) -> None:
+        message = OUT.by_id.get(hid)
+        if message is None:
+            return
+        stats = self.stats
+        try:
+            fields = message.decode(payload)
+        except (ValueError, struct.error) as e:
+            self._drop(message, e)
+            return
+
+        if message is OUT.CLIENT_PONG:
+            if client.ping_sent is not None:
+                stats.pong_rtts.append(time.monotonic() - client.ping_sent)
+                client.ping_sent = None
+            return
+
+        if message is OUT.SECURITY_TICKET:
+            match = re.match(r"ClaboBot-([A-Za-z0-9_]+)", fields[0])
+            if match:
+                client.name = match.group(1)
+            else:
+                client.name = f"bot{self.next_bot}"
+            client.user_id = self.next_bot
+            self.next_bot += 1
+            await client.send(IN.AUTHENTICATED.encode(), stats)
+            return
+
+        if message is OUT.OPEN_FLAT_CONNECTION:
+            await self._leave_room(client)
+            room = self.room(fields[0])
+            client.room = room
+            await client.send(IN.ROOM_OPEN.encode(), stats)
+            await client.send(IN.ROOM_MODEL.encode(True, -1, room.heightmap()), stats)
+            return
+
+        room = client.room
+        if room is None:
+            return
+
+        if message is OUT.GET_ROOM_ENTRY_DATA:
+            if client.unit is None:
+                # Room broadcasts only reach a client once it has entered
+                others = list(room.units.values())
+                await client.send(IN.ROOM_USERS.encode(len(others), b"".join(u.encode() for u in others)), stats)
+                client.unit = room.add_unit(client.name, client.user_id, client)
+                room.clients.add(client)
+                await room.announce([client.unit])
+            return
+
+        unit = client.unit
+        if unit is None:
+            return
+
+        if message is OUT.CHAT or message is OUT.SHOUT:
+            if client.mentions:
+                stats.reply_latencies.append(time.monotonic() - client.mentions.pop(0))
+            await room.say(unit, fields[0], IN.CHAT if message is OUT.CHAT else IN.SHOUT)
+        elif message is OUT.WHISPER:
+            target, _, text = fields[0].partition(" ")
+            packet = IN.WHISPER.encode(unit.ruid, text, 0, 0, 0, len(text))
+            for other in room.clients:
+                if other is client or other.name == target:
+                    await other.send(packet, stats)
+        elif message is OUT.MOVE_AVATAR:
+            x, y = fields
+            if 0 <= x < room.width and 0 <= y < room.height:
+                unit.target = (x, y)
+        elif message is OUT.DANCE:
+            await room.broadcast(IN.DANCE.encode(unit.ruid, fields[0]))
+        elif message is OUT.EXPRESSION:
+            await room.broadcast(IN.EXPRESSION.encode(unit.ruid, fields[0]))
+        elif message is OUT.SIGN:
+            await room.broadcast(IN.USER_UPDATE.encode([unit.status(f"/sign {fields[0]}/")]))
+        elif message is OUT.PLACE_OBJECT:
+            # Simplified ack: itemId, x, y, rotation as ints
+            try:
+                item_id, x, y, rot = (int(v) for v in fields[0].split()[:4])
+            except ValueError as e:      # also fewer than 4 fields
+                self._drop(message, e)
+                return
+            room.items += 1
+            await room.broadcast(IN.OBJECT_ADD.encode(item_id, x, y, rot))
+        elif message is OUT.MOVE_OBJECT:
+            await room.broadcast(IN.OBJECT_UPDATE.encode(*fields))
+
+    def _drop(self, message, error: Exception) -> None:
+        self.stats.dropped += 1
+        print(f"[!] Dropped malformed {message.name}: {error}", flush=True)
+
+    # ── Room driver ───────────────────────────────────────────────────
+    async def run_script(self, events: list, room_id: int) -> None:
+        """Play timed crowd events: join/leave counts and lines to say."""
+        start = clock.monotonic()
+        for event in sorted(events, key=lambda e: e.get("at", 0)):
+            delay = start + event.get("at", 0) - clock.monotonic()
+            if delay > 0:
+                await clock.sleep(delay)
+            room = self.room(event.get("room", room_id))
+            if "join" in event:
+                await room.join(event["join"])
+            if "leave" in event:
+                await room.leave(event["leave"])
+            if "say" in event:
+                guests = room.guests()
+                if not guests:
+                    await room.join(1)
+                    guests = room.guests()
+                await room.say(self.rng.choice(guests), event["say"])
+
+    async def drive(self) -> None:
+        while True:
+            await clock.sleep(TICK)
+            for room in list(self.rooms.values()):
+                if not room.clients:
+                    continue
+                await room.crowd_step()
+                await room.tick()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 2096,
+                    duration: float = None, report: float = None,
+                    script: list = None, script_room: int = 208) -> dict:
+        """Serve until cancelled (or for duration seconds); return stats."""
+        tasks = [asyncio.create_task(self.drive())]
+        if script:
+            tasks.append(asyncio.create_task(self.run_script(script, script_room)))
+        if report:
+            tasks.append(asyncio.create_task(self._report_loop(report)))
+        try:
+            async with websockets.serve(self.handler, host, port):
+                print(f"[+] Mock Arcturus on ws://{host}:{port}", flush=True)
+                if duration:
+                    await clock.sleep(duration)
+                else:
+                    await asyncio.Future()
+        finally:
+            for task in tasks:
+                task.cancel()
+        return self.stats.summary()
+
+    async def _report_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            print(f"[*] {json.dumps(self.stats.summary())}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Arcturus websocket server for the bots.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2096)
+    parser.add_argument("--users", type=int, default=0, help="synthetic guests per room")
+    parser.add_argument("--chat-rate", type=float, default=0.0, help="crowd chat lines per second per room")
+    parser.add_argument("--move-rate", type=float, default=0.05, help="walks started per guest per second")
+    parser.add_argument("--mention-rate", type=float, default=0.2, help="share of lines addressed to a bot")
+    parser.add_argument("--churn-rate", type=float, default=0.0, help="arrivals/departures per minute")
+    parser.add_argument("--ping-interval", type=float, default=30.0)
+    parser.add_argument("--size", default="20x28", help="room size WxH")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--duration", type=float, default=None, help="stop after N (clock) seconds")
+    parser.add_argument("--warp", type=float, default=TIME_WARP, help="clock seconds per real second")
+    parser.add_argument("--report", type=float, default=None, help="print stats every N seconds")
+    parser.add_argument("--script", default=None, help="JSON file with timed crowd events")
+    parser.add_argument("--script-room", type=int, default=208)
+    args = parser.parse_args()
+
+    clock.warp(args.warp)
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+    server = MockServer(
+        crowd_size=args.users, chat_rate=args.chat_rate, move_rate=args.move_rate,
+        mention_rate=args.mention_rate, churn_rate=args.churn_rate,
+        ping_interval=args.ping_interval, width=width, height=height, seed=args.seed,
+    )
+    try:
+        summary = asyncio.run(server.serve(
+            args.host, args.port, duration=args.duration, report=args.report,
+            script=script, script_room=args.script_room,
+        ))
+    except KeyboardInterrupt:
+        summary = server.stats.summary()
+    print(json.dumps(summary, indent=2), flush=True)
+
+
+if __name__ == "__main__":
+    main()
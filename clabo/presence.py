@@ -0,0 +1,223 @@
+"""
+Multi-room presence for one bot persona.
+
+CLABO_ROOMS lists the sessions one bot process runs, comma-separated.
+Each session is one connection.  "a+b+c" hops that connection between
+rooms every CLABO_HOP_INTERVAL (clock) seconds; "=user_id:username"
+logs the session in as another account, since the emulator allows one
+connection per account:
+
+    CLABO_ROOMS=208                        one room (the default)
+    CLABO_ROOMS=208+101+206                one connection touring three rooms
+    CLABO_ROOMS=208,206=9:frontdesk2       two rooms at once, the second as user 9
+
+All sessions share one Presence: the AI's HTTP client (made on the first
+AI call) and persona, the per-guest chat histories (a guest who moves rooms keeps the
+conversation), a ResponseCache that answers a repeated opening
+question — or the same question asked in two rooms at once — with one
+AI call, and optionally a ReplyBatcher that answers guests who speak
+within CLABO_AI_BATCH seconds of each other with one AI request.
+"""
+
+import asyncio
+import collections
+import logging
+import os
+
+from clabo.admission import normalize
+from clabo.clock import clock
+
+log = logging.getLogger(__name__)
+
+ROOMS = os.environ.get("CLABO_ROOMS", "")
+HOP_INTERVAL = float(os.environ.get("CLABO_HOP_INTERVAL", "600"))
+
+
+class SessionPlan:
+    """Rooms one connection covers and the account it logs in as."""
+
+    def __init__(self, rooms: list, user_id: int, username: str):
+        self.rooms = rooms
+        self.user_id = user_id
+        self.username = username
+
+    def __repr__(self) -> str:
+        return f"{self.username}@{'+'.join(map(str, self.rooms))}"
+
+    @property
+    def spec(self) -> str:
+        """This plan as a CLABO_ROOMS entry."""
+        return f"{'+'.join(map(str, self.rooms))}={self.user_id}:{self.username}"
+
+
+def parse_rooms(spec: str, user_id: int, username: str) -> list:
+    """SessionPlans from a CLABO_ROOMS spec; entries without an account
+    use (user_id, username), which only one session may do."""
+    plans = []
+    for entry in filter(None, (e.strip() for e in spec.split(","))):
+        rooms, _, account = entry.partition("=")
+        try:
+            room_ids = [int(r) for r in rooms.split("+")]
+            if account:
+                uid, _, name = account.partition(":")
+                plans.append(SessionPlan(room_ids, int(uid), name or f"user{uid}"))
+            else:
+                plans.append(SessionPlan(room_ids, user_id, username))
+        except ValueError:
+            raise ValueError(f"bad CLABO_ROOMS entry {entry!r} (want room[+room...][=user_id:username])") from None
+    users = [p.user_id for p in plans]
+    if len(set(users)) != len(users):
+        raise ValueError("CLABO_ROOMS: each session needs its own account")
+    return plans
+
+
+class ResponseCache:
+    """Shared AI replies keyed by normalized question, with in-flight
+    de-duplication."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = collections.OrderedDict()   # key → (time, reply)
+        self.pending = {}                          # (generation, key) → Future of an in-flight call
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0                        # bumped by clear()
+
+    def clear(self) -> int:
+        """Forget every reply, e.g. after the persona changed; calls still
+        in flight are not cached when they return."""
+        dropped = len(self.entries)
+        self.entries.clear()
+        self.generation += 1
+        return dropped
+
+    async def get(self, username: str, text: str, fetch):
+        """Cached reply for text, else await fetch() (once for concurrent
+        askers).  Replies naming the asker are not kept."""
+        key = normalize(text)
+        entry = self.entries.get(key)
+        if entry is not None and clock.monotonic() - entry[0] < self.ttl:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+        generation = self.generation
+        slot = (generation, key)
+        if slot in self.pending:
+            self.hits += 1
+            # Shielded: a waiter cancelled (e.g. its session shutting down)
+            # must not cancel the reply the other askers are waiting for.
+            return await asyncio.shield(self.pending[slot])
+        self.misses += 1
+        self.pending[slot] = future = asyncio.get_running_loop().create_future()
+        reply = None
+        try:
+            reply = await fetch()
+        finally:
+            del self.pending[slot]
+            if not future.done():
+                future.set_result(reply)     # waiters get None if the call failed
+        if reply and generation == self.generation and username.lower() not in reply.lower():
+            self.entries[key] = (clock.monotonic(), reply)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return reply
+
+    def summary(self) -> dict:
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+class ReplyBatcher:
+    """Collects AI requests arriving within `window` (real) seconds, from
+    any session, into one call of `call(items) -> [reply, ...]` and fans
+    the replies back out to the askers."""
+
+    def __init__(self, call, window: float, max_batch: int = 8):
+        self.call = call
+        self.window = window
+        self.max_batch = max_batch
+        self.pending = []              # [(item, Future)]
+        self.timer = None
+        self.tasks = set()             # in-flight calls; the loop only holds tasks weakly
+        self.calls = 0
+        self.asked = 0
+
+    async def ask(self, item):
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((item, future))
+        self.asked += 1
+        if len(self.pending) >= self.max_batch:
+            self._flush()
+        elif self.timer is None:
+            self.timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        if batch:
+            self.calls += 1
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _run(self, batch: list) -> None:
+        replies = []
+        try:
+            replies = await self.call([item for item, _ in batch])
+        except Exception as e:
+            log.error("[!] Batched AI call err: %s", e)
+        finally:
+            for i, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(replies[i] if i < len(replies) else None)
+
+    async def close(self) -> None:
+        """Cancel queued and in-flight calls; their askers get None."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.pending = self.pending, []
+        for _, future in batch:
+            if not future.done():
+                future.set_result(None)
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    def summary(self) -> dict:
+        return {"calls": self.calls, "asked": self.asked,
+                "per_call": round(self.asked / self.calls, 2) if self.calls else None}
+
+
+class Presence:
+    """State the sessions of one persona share."""
+
+    def __init__(self, plans: list, http_factory, persona: str):
+        self.plans = plans
+        self.http_factory = http_factory
+        self._http = None
+        self.persona = persona
+        self.histories = {}            # username → [(role, content), ...] max 6
+        self.cache = ResponseCache()
+        self.batcher = None            # ReplyBatcher when CLABO_AI_BATCH is set
+
+    @property
+    def http(self):
+        """The shared HTTP client, made by http_factory() on first use."""
+        if self._http is None:
+            self._http = self.http_factory()
+        return self._http
+
+    async def close(self) -> None:
+        if self.batcher is not None:
+            await self.batcher.close()
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    @property
+    def multi(self) -> bool:
+        return len(self.plans) > 1
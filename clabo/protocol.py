@@ -0,0 +1,187 @@
+"""
+Habbo wire format used by the bots and the mock server.
+
+Every packet is >I length (header + payload), >H header id, payload.
+Payload fields: >i ints, >H-prefixed UTF-8 strings, single-byte bools.
+Header ids and message layouts are declared in clabo.messages; the
+helpers here are for code that builds or reads payloads by hand.
+"""
+
+import logging
+import struct
+
+from clabo.codec import compile_decoder
+from clabo.messages import IN, UNIT_HEADER, UNIT_TYPES
+
+log = logging.getLogger(__name__)
+
+
+class PayloadReader:
+    """Read Habbo wire-format fields from a binary payload."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def read_int(self) -> int:
+        if self.pos + 4 > len(self.data):
+            raise ValueError("EOF reading int")
+        val = struct.unpack(">i", self.data[self.pos:self.pos + 4])[0]
+        self.pos += 4
+        return val
+
+    def read_short(self) -> int:
+        if self.pos + 2 > len(self.data):
+            raise ValueError("EOF reading short")
+        val = struct.unpack(">H", self.data[self.pos:self.pos + 2])[0]
+        self.pos += 2
+        return val
+
+    def read_string(self) -> str:
+        length = self.read_short()
+        if self.pos + length > len(self.data):
+            raise ValueError("EOF reading string")
+        val = self.data[self.pos:self.pos + length].decode("utf-8", errors="replace")
+        self.pos += length
+        return val
+
+    def read_bool(self) -> bool:
+        if self.pos + 1 > len(self.data):
+            raise ValueError("EOF reading bool")
+        val = self.data[self.pos] != 0
+        self.pos += 1
+        return val
+
+    def remaining(self) -> int:
+        return len(self.data) - self.pos
+
+
+def build_packet(header_id: int, payload: bytes = b"") -> bytes:
+    length = 2 + len(payload)
+    return struct.pack(">IH", length, header_id) + payload
+
+
+def encode_string(s: str) -> bytes:
+    b = s.encode("utf-8")
+    return struct.pack(">H", len(b)) + b
+
+
+def encode_int(n: int) -> bytes:
+    return struct.pack(">i", n)
+
+
+def encode_bool(b: bool) -> bytes:
+    return b"\x01" if b else b"\x00"
+
+
+def parse_packets(data: bytes):
+    packets = []
+    o = 0
+    while o + 6 <= len(data):
+        length = struct.unpack(">I", data[o:o + 4])[0]
+        if o + 4 + length > len(data):
+            break
+        hid = struct.unpack(">H", data[o + 4:o + 6])[0]
+        payload = data[o + 6:o + 4 + length]
+        packets.append((hid, payload))
+        o += 4 + length
+    return packets
+
+
+# ── Room units (ROOM_USERS) ──────────────────────────────────────────
+# Layouts live in clabo.messages (UNIT_HEADER, then the type's fields
+# from UNIT_TYPES); each part gets a compiled decoder.
+_INT = struct.Struct(">i")
+_SHORT = struct.Struct(">H")
+
+_decode_unit_header = compile_decoder(UNIT_HEADER, "unit_header", whole=False, as_dict=True)
+_decode_unit_tail = {
+    type_id: (kind, compile_decoder(fields, f"unit_{kind}", whole=False, as_dict=True))
+    for type_id, (kind, fields) in UNIT_TYPES.items()
+}
+
+
+def _encode_fields(schema, values: dict) -> bytes:
+    parts = []
+    for name, kind in schema:
+        value = values.get(name.lstrip("_"))
+        if kind == "i":
+            parts.append(encode_int(value or 0))
+        elif kind == "s":
+            parts.append(encode_string(value or ""))
+        elif kind == "b":
+            parts.append(encode_bool(value))
+        else:
+            value = value or []
+            parts.append(encode_int(len(value)) + b"".join(_SHORT.pack(v) for v in value))
+    return b"".join(parts)
+
+
+def encode_room_unit(unit: dict) -> bytes:
+    """One ROOM_USERS entry from a dict keyed by schema field names
+    (without the "_"); missing fields encode as 0 / "" / False."""
+    return _encode_fields(UNIT_HEADER + UNIT_TYPES[unit["type"]][1], unit)
+
+
+# ── Packet parsers ───────────────────────────────────────────────────
+def parse_room_users(payload: bytes, room_users: dict):
+    """Parse ROOM_USERS (374) packet → update room_users dict.
+    Returns list of (room_unit_id, username) for newly parsed units
+    (users, pets and bots; each entry's "type" tells them apart)."""
+    parsed = []
+    if len(payload) < 4:
+        return parsed
+    count = _INT.unpack_from(payload, 0)[0]
+    pos = 4
+    for _ in range(count):
+        try:
+            unit, pos = _decode_unit_header(payload, pos)
+            tail = _decode_unit_tail.get(unit["type"])
+            if tail is not None:
+                pos = tail[1](payload, pos)[1]
+        except ValueError:
+            log.warning("[!] ROOM_USERS truncated after %s of %s units", len(parsed), count)
+            break
+        ruid = unit["room_unit_id"]
+        room_users[ruid] = {
+            "username": unit["username"],
+            "user_id": unit["user_id"],
+            "x": unit["x"],
+            "y": unit["y"],
+            "type": tail[0] if tail else "unknown",
+        }
+        parsed.append((ruid, unit["username"]))
+        if tail is None:
+            # Unknown trailing layout: this unit is usable, the ones after it are not
+            log.warning("[!] ROOM_USERS unit type %s unknown, %s of %s units read",
+                        unit["type"], len(parsed), count)
+            break
+    return parsed
+
+
+def parse_user_update(payload: bytes, room_users: dict) -> list:
+    """Parse USER_UPDATE (1640) to track positions; returns the
+    roomUnitIds that were updated (none if the packet is truncated)."""
+    try:
+        statuses = IN.USER_UPDATE.decode(payload)[0]
+    except ValueError:
+        return []
+    updated = []
+    for room_unit_id, x, y in statuses:
+        info = room_users.get(room_unit_id)
+        if info is not None:
+            info["x"] = x
+            info["y"] = y
+            updated.append(room_unit_id)
+    return updated
+
+
+def parse_room_model(payload: bytes) -> list:
+    """Parse ROOM_MODEL (1301) → heightmap rows ("x" = no tile)."""
+    heightmap = IN.ROOM_MODEL.decode(payload)[2]
+    return [row for row in heightmap.split("\r") if row]
+
+
+def parse_chat(payload: bytes):
+    """Parse CHAT_MESSAGE / SHOUT_MESSAGE → (roomUnitId, message)."""
+    return IN.CHAT.decode(payload)
@@ -0,0 +1,213 @@
+"""
+Binary session recorder and deterministic replayer for bot traffic.
+
+A recording is an append-only file: a 5-byte file header (b"CLBR" +
+format version) followed by one record per websocket frame:
+
+    >BQI   flags, time.monotonic_ns() at send/recv, frame length
+    ...    raw frame bytes
+
+flags bit 0 = outbound (sent by the bot), bit 1 = text frame, bit 2 =
+first frame of a session.  Several sessions may be appended to the same
+file; their timestamps are only comparable within a session.
+"""
+
+import asyncio
+import logging
+import struct
+import time
+
+import websockets.exceptions
+
+log = logging.getLogger(__name__)
+
+MAGIC = b"CLBR"
+VERSION = 1
+FILE_HEADER = MAGIC + bytes([VERSION])
+RECORD_HEADER = struct.Struct(">BQI")
+
+FLAG_OUT = 0x01
+FLAG_TEXT = 0x02
+FLAG_SESSION = 0x04
+
+
+class Recorder:
+    """Append every frame to a recording file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.fp = open(path, "ab")
+        if self.fp.tell() == 0:
+            self.fp.write(FILE_HEADER)
+        else:
+            with open(path, "rb") as existing:
+                if existing.read(len(FILE_HEADER)) != FILE_HEADER:
+                    self.fp.close()
+                    raise ValueError(f"{path} is not a v{VERSION} recording")
+        self.frames = 0
+
+    def write(self, outbound: bool, frame) -> None:
+        flags = FLAG_OUT if outbound else 0
+        if self.frames == 0:
+            flags |= FLAG_SESSION
+        if isinstance(frame, str):
+            flags |= FLAG_TEXT
+            frame = frame.encode("utf-8")
+        self.fp.write(RECORD_HEADER.pack(flags, time.monotonic_ns(), len(frame)))
+        self.fp.write(frame)
+        self.frames += 1
+
+    def close(self) -> None:
+        if not self.fp.closed:
+            self.fp.close()
+            log.info("[*] Recorded %s frames → %s", self.frames, self.path)
+
+
+def iter_frames(path: str):
+    """Yield (outbound, monotonic_ns, frame, new_session) for every record
+    in a file.
+    A truncated final record (bot killed mid-write) ends the iteration."""
+    with open(path, "rb") as fp:
+        if fp.read(len(FILE_HEADER)) != FILE_HEADER:
+            raise ValueError(f"{path} is not a v{VERSION} recording")
+        while True:
+            head = fp.read(RECORD_HEADER.size)
+            if len(head) < RECORD_HEADER.size:
+                return
+            flags, ts, length = RECORD_HEADER.unpack(head)
+            frame = fp.read(length)
+            if len(frame) < length:
+                return
+            if flags & FLAG_TEXT:
+                frame = frame.decode("utf-8", errors="replace")
+            yield bool(flags & FLAG_OUT), ts, frame, bool(flags & FLAG_SESSION)
+
+
+class RecordingSocket:
+    """Websocket wrapper that records every frame sent and received."""
+
+    def __init__(self, ws, recorder: Recorder):
+        self.ws = ws
+        self.recorder = recorder
+
+    async def send(self, frame) -> None:
+        await self.ws.send(frame)
+        self.recorder.write(True, frame)
+
+    async def recv(self):
+        frame = await self.ws.recv()
+        self.recorder.write(False, frame)
+        return frame
+
+    async def close(self) -> None:
+        try:
+            await self.ws.close()
+        finally:
+            self.recorder.close()
+
+    def __getattr__(self, name):
+        return getattr(self.ws, name)
+
+
+class ReplaySocket:
+    """Stand-in websocket that plays back the inbound side of a recording.
+
+    realtime=True keeps the recorded gaps between inbound frames.
+    realtime=False delivers frames as fast as the bot consumes them, but
+    holds each frame until the bot has sent as many frames as it had when
+    that frame was recorded, so handshake and room-entry phases still see
+    their own responses.  gate_timeout must exceed the bots' drain
+    timeouts; when it expires (the bot sent fewer frames than recorded,
+    e.g. a shorter AI reply) the shortfall is forgiven for later frames.
+    Sends are counted and discarded.  When the recording runs out, recv()
+    raises ConnectionClosedOK like a server hang-up would; sends are still
+    accepted until close() so already-queued handler work can finish.
+    """
+
+    def __init__(self, path: str, realtime: bool = True, gate_timeout: float = 5.0):
+        self.path = path
+        self.realtime = realtime
+        self.gate_timeout = gate_timeout
+        self.frames = self._inbound(path)
+        self.pending = None        # (sends_before, frame) not yet delivered
+        self.received = 0
+        self.sent = 0
+        self.forgiven = 0          # sends the replayed bot never made
+        self.exhausted = False
+        self.closed = False
+        self.sent_event = asyncio.Event()
+        self.started = time.monotonic()
+        self.last_ts = None
+        self.due = None
+
+    @staticmethod
+    def _inbound(path: str):
+        sends = 0
+        new_session = False
+        for outbound, ts, frame, session_start in iter_frames(path):
+            new_session = new_session or session_start
+            if outbound:
+                sends += 1
+            else:
+                yield sends, ts, frame, new_session
+                new_session = False
+
+    @staticmethod
+    def _closed_error():
+        return websockets.exceptions.ConnectionClosedOK(None, None)
+
+    async def recv(self):
+        if self.closed or self.exhausted:
+            raise self._closed_error()
+        loop = asyncio.get_running_loop()
+        if self.pending is None:
+            try:
+                sends_before, ts, frame, new_session = next(self.frames)
+            except StopIteration:
+                self.exhausted = True
+                raise self._closed_error() from None
+            # Timestamps of sessions appended to one file share a clock only
+            # within a session, so the idle time between two runs is skipped.
+            if new_session:
+                self.last_ts = None
+            gap = 0 if self.last_ts is None else max(0, ts - self.last_ts) / 1e9
+            self.last_ts = ts
+            self.due = (loop.time() if self.due is None else self.due) + gap
+            self.pending = (sends_before, frame)
+        sends_before, frame = self.pending
+
+        if self.realtime:
+            delay = self.due - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        else:
+            deadline = loop.time() + self.gate_timeout
+            while self.sent + self.forgiven < sends_before:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self.forgiven = sends_before - self.sent
+                    break
+                self.sent_event.clear()
+                try:
+                    await asyncio.wait_for(self.sent_event.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+            # Let the handler tasks run between frames
+            await asyncio.sleep(0)
+
+        self.pending = None
+        self.received += 1
+        return frame
+
+    async def send(self, frame) -> None:
+        if self.closed:
+            raise self._closed_error()
+        self.sent += 1
+        self.sent_event.set()
+
+    async def close(self) -> None:
+        self.closed = True
+        self.frames.close()
+        elapsed = time.monotonic() - self.started
+        rate = self.received / elapsed if elapsed > 0 else 0.0
+        log.info("[*] Replay %s: %s frames in, %s out, %.2fs (%.0f frames/s)", self.path, self.received, self.sent, elapsed, rate)
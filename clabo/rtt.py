@@ -0,0 +1,150 @@
+"""
+Round-trip measurement for the game connection.
+
+Arcturus never answers a client ping (the server pings, the bot pongs),
+so RTT is sampled from requests that have a well-defined reply:
+
+    SECURITY_TICKET       → AUTHENTICATED
+    OPEN_FLAT_CONNECTION  → ROOM_OPEN
+    GET_ROOM_ENTRY_DATA   → ROOM_USERS
+    CHAT / SHOUT          → the room's echo of the same text
+
+Move → USER_UPDATE is deliberately not used: the server only walks units
+on its 500 ms room cycle, which would swamp the network RTT.
+
+Samples feed a smoothed RTT / RTO estimator (RFC 6298: srtt, rttvar,
+rto = srtt + 4·rttvar, doubled on a missed reply), and the connection
+helpers derive their waits from it instead of fixed constants.
+"""
+
+import collections
+import logging
+import struct
+import time
+
+from clabo.messages import IN, OUT
+from clabo.protocol import parse_packets
+
+log = logging.getLogger(__name__)
+
+# request header → reply header
+PROBES = {
+    OUT.SECURITY_TICKET.id: IN.AUTHENTICATED.id,
+    OUT.OPEN_FLAT_CONNECTION.id: IN.ROOM_OPEN.id,
+    OUT.GET_ROOM_ENTRY_DATA.id: IN.ROOM_USERS.id,
+}
+ECHOES = {OUT.CHAT.id: IN.CHAT.id, OUT.SHOUT.id: IN.SHOUT.id}
+
+MAX_OUTSTANDING = 16
+
+
+class RttEstimator:
+    """Smoothed RTT and retransmission-style timeout (RFC 6298)."""
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(self, initial: float = 1.0, min_rto: float = 0.3, max_rto: float = 10.0):
+        self.initial = initial
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.srtt = None
+        self.rttvar = None
+        self.backoff_factor = 1
+        self.samples = 0
+        self.last = None
+
+    def sample(self, rtt: float) -> None:
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.backoff_factor = 1
+        self.samples += 1
+        self.last = rtt
+
+    def backoff(self) -> None:
+        """A reply never came: double the timeout until the next sample."""
+        if self.rto * 2 <= self.max_rto:
+            self.backoff_factor *= 2
+
+    @property
+    def rto(self) -> float:
+        base = self.initial if self.srtt is None else self.srtt + 4 * self.rttvar
+        return min(self.max_rto, max(self.min_rto, base) * self.backoff_factor)
+
+    def timeout(self, factor: float = 1.0) -> float:
+        """Wait for a reply that costs the server `factor` round trips."""
+        return min(self.max_rto, self.rto * factor)
+
+    def summary(self) -> str:
+        if self.srtt is None:
+            return f"no samples, rto={self.rto * 1000:.0f}ms"
+        return (f"srtt={self.srtt * 1000:.1f}ms rttvar={self.rttvar * 1000:.1f}ms "
+                f"rto={self.rto * 1000:.0f}ms ({self.samples} samples)")
+
+
+class MeteredSocket:
+    """Websocket wrapper that times probe requests against their replies."""
+
+    def __init__(self, ws, rtt: RttEstimator):
+        self.ws = ws
+        self.rtt = rtt
+        self.outstanding = {}      # reply header → deque of send times
+        self.echoes = {}           # (reply header, text) → send time
+
+    async def send(self, frame) -> None:
+        await self.ws.send(frame)
+        if not isinstance(frame, bytes) or len(frame) < 6:
+            return
+        header = struct.unpack_from(">H", frame, 4)[0]
+        now = time.monotonic()
+        if header in PROBES:
+            pending = self.outstanding.setdefault(PROBES[header], collections.deque())
+            if len(pending) < MAX_OUTSTANDING:
+                pending.append(now)
+        elif header in ECHOES and len(self.echoes) < MAX_OUTSTANDING:
+            try:
+                text = OUT.by_id[header].decode(frame[6:])[0]
+            except ValueError:
+                return
+            self.echoes.setdefault((ECHOES[header], text), now)
+
+    async def recv(self):
+        frame = await self.ws.recv()
+        if (self.outstanding or self.echoes) and isinstance(frame, bytes):
+            self._match(frame)
+        return frame
+
+    def _match(self, frame: bytes) -> None:
+        now = time.monotonic()
+        for hid, payload in parse_packets(frame):
+            pending = self.outstanding.get(hid)
+            if pending:
+                self.rtt.sample(now - pending.popleft())
+                if not pending:
+                    del self.outstanding[hid]
+            elif hid in (IN.CHAT.id, IN.SHOUT.id) and self.echoes:
+                try:
+                    key = (hid, IN.CHAT.decode(payload)[1])
+                except ValueError:
+                    continue
+                sent = self.echoes.pop(key, None)
+                if sent is not None:
+                    self.rtt.sample(now - sent)
+        # Replies that never came (e.g. a chat the server filtered) must
+        # not be matched against a much later reply
+        horizon = now - self.rtt.max_rto
+        for key in [k for k, sent in self.echoes.items() if sent < horizon]:
+            del self.echoes[key]
+
+    async def close(self) -> None:
+        try:
+            await self.ws.close()
+        finally:
+            log.info("[*] RTT %s", self.rtt.summary())
+
+    def __getattr__(self, name):
+        return getattr(self.ws, name)
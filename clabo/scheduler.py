@@ -0,0 +1,229 @@
+"""
+Timer-wheel scheduler for ambient and patrol behaviors.
+
+Instead of one coroutine per bot sleeping in asyncio.sleep(), behaviors
+are chains of short timed actions ("dance", then "stop dancing" 8 s
+later, then "patrol" 20 s after that) kept in a hashed timing wheel.
+A single driver task per scheduler advances the wheel, so hundreds of
+bots' idle behavior costs one timer instead of hundreds of sleepers.
+
+Every action belongs to an owner (usually the bot name) and has a
+priority.  While an owner is held — e.g. the chat handler is answering
+a guest — due actions with a lower priority (higher number) are parked
+and re-armed when the hold is released, so ambient behavior yields to
+guest interactions immediately.
+
+Delays are in clabo.clock time, so a time warp speeds up every behavior
+on the wheel; internally the wheel runs on the loop's real clock.
+"""
+
+import asyncio
+import logging
+import math
+
+from clabo.clock import clock, rng
+
+log = logging.getLogger(__name__)
+
+PRIORITY_CHAT = 0
+PRIORITY_PATROL = 5
+PRIORITY_AMBIENT = 10
+
+
+class Timer:
+    """Handle for one scheduled action."""
+
+    __slots__ = ("due", "callback", "args", "owner", "priority", "rounds", "cancelled")
+
+    def __init__(self, due, callback, args, owner, priority):
+        self.due = due
+        self.callback = callback
+        self.args = args
+        self.owner = owner
+        self.priority = priority
+        self.rounds = 0
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class Hold:
+    """Reusable hold on one owner; use as a context manager or call
+    acquire()/release() around the busy section."""
+
+    def __init__(self, scheduler, owner, priority):
+        self.scheduler = scheduler
+        self.owner = owner
+        self.priority = priority
+
+    def acquire(self) -> None:
+        self.scheduler._acquire(self.owner, self.priority)
+
+    def release(self) -> None:
+        self.scheduler._release(self.owner, self.priority)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class Scheduler:
+    """Hashed timing wheel driven by a single asyncio task.
+
+    resolution is the tick length in (clock) seconds; slots * resolution
+    is one wheel rotation.  Longer delays wrap around with a rounds
+    counter."""
+
+    def __init__(self, resolution: float = 0.1, slots: int = 512, resume_jitter: float = 1.0):
+        self.resolution = max(clock.real(resolution), 0.001)   # real seconds per tick
+        self.slots = [[] for _ in range(slots)]
+        self.cursor = 0
+        self.tick_time = None      # loop time of the current cursor position
+        self.pending = 0
+        self.resume_jitter = resume_jitter
+        self.holds = {}            # owner → [priority, ...] of active holds
+        self.deferred = {}         # owner → [Timer, ...] parked while held
+        self.tasks = set()
+        self.wakeup = asyncio.Event()
+        self.driver = None
+
+    # ── Scheduling ────────────────────────────────────────────────────
+    def call_later(self, delay: float, callback, *args, owner=None,
+                   priority: int = PRIORITY_AMBIENT, jitter: float = 0.0) -> Timer:
+        """Run callback(*args) after delay ± jitter seconds.  Coroutine
+        functions are started as tasks; plain functions run inline."""
+        loop = asyncio.get_running_loop()
+        if jitter:
+            delay += rng.uniform(-jitter, jitter)
+        delay = clock.real(delay)
+        now = loop.time()
+        if self.pending == 0:
+            self.tick_time = now   # wheel was idle: restart it at "now"
+        timer = Timer(now + max(0.0, delay), callback, args, owner, priority)
+        self._insert(timer)
+        if self.driver is None or self.driver.done():
+            self.driver = loop.create_task(self._run())
+        self.wakeup.set()
+        return timer
+
+    def _insert(self, timer: Timer) -> None:
+        ticks = max(1, math.ceil((timer.due - self.tick_time) / self.resolution))
+        n = len(self.slots)
+        timer.rounds = (ticks - 1) // n
+        self.slots[(self.cursor + ticks) % n].append(timer)
+        self.pending += 1
+
+    def cancel_owner(self, owner) -> int:
+        """Cancel every pending and parked action of one owner."""
+        cancelled = 0
+        for slot in self.slots:
+            for timer in slot:
+                if timer.owner == owner and not timer.cancelled:
+                    timer.cancel()
+                    cancelled += 1
+        for timer in self.deferred.pop(owner, []):
+            timer.cancel()
+            cancelled += 1
+        return cancelled
+
+    # ── Priority holds ────────────────────────────────────────────────
+    def hold(self, owner, priority: int = PRIORITY_CHAT) -> Hold:
+        """Park the owner's actions below `priority` while held."""
+        return Hold(self, owner, priority)
+
+    def _acquire(self, owner, priority: int) -> None:
+        self.holds.setdefault(owner, []).append(priority)
+
+    def _release(self, owner, priority: int) -> None:
+        held = self.holds.get(owner)
+        if not held:
+            return
+        held.remove(priority)
+        if held:
+            return
+        del self.holds[owner]
+        for timer in self.deferred.pop(owner, []):
+            if not timer.cancelled:
+                self.call_later(rng.uniform(0, self.resume_jitter), timer.callback,
+                                *timer.args, owner=owner, priority=timer.priority)
+
+    def _blocked(self, timer: Timer) -> bool:
+        held = self.holds.get(timer.owner)
+        return bool(held) and timer.priority > min(held)
+
+    # ── Driver ────────────────────────────────────────────────────────
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.pending == 0:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            delay = self.tick_time + self.resolution - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            # Catch up on every tick that elapsed (loop lag, long sleeps)
+            now = loop.time()
+            while self.tick_time + self.resolution <= now:
+                self.tick_time += self.resolution
+                self.cursor = (self.cursor + 1) % len(self.slots)
+                self._fire_slot()
+
+    def _fire_slot(self) -> None:
+        slot = self.slots[self.cursor]
+        if not slot:
+            return
+        due, keep = [], []
+        for timer in slot:
+            if timer.cancelled:
+                self.pending -= 1
+            elif timer.rounds > 0:
+                timer.rounds -= 1
+                keep.append(timer)
+            else:
+                self.pending -= 1
+                due.append(timer)
+        self.slots[self.cursor] = keep
+        due.sort(key=lambda t: (t.priority, t.due))
+        for timer in due:
+            if self._blocked(timer):
+                self.deferred.setdefault(timer.owner, []).append(timer)
+                continue
+            self._invoke(timer)
+
+    def _invoke(self, timer: Timer) -> None:
+        try:
+            result = timer.callback(*timer.args)
+        except Exception as e:
+            log.error("[!] Scheduled action err: %s", e)
+            return
+        if asyncio.iscoroutine(result):
+            # Named after the action so lag reports and profiles can tell them apart
+            name = getattr(timer.callback, "__qualname__", "scheduled")
+            task = asyncio.get_running_loop().create_task(result, name=name)
+            self.tasks.add(task)
+            task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.error("[!] Scheduled action err: %s", task.exception())
+
+    async def close(self) -> None:
+        """Stop the driver and any action still running."""
+        for slot in self.slots:
+            slot.clear()
+        self.pending = 0
+        self.deferred.clear()
+        tasks = list(self.tasks)
+        if self.driver is not None:
+            tasks.append(self.driver)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.driver = None
@@ -0,0 +1,139 @@
+"""
+Start-up helpers for the bot entry points: the event loop and an
+optional start-up profile.
+
+Heavy optional dependencies are imported on first use. aiohttp waits
+for the concierge's first AI call, NumPy for a heatmap, PyYAML for a
+.yaml behavior, subprocess for the first database query, and the
+message codecs (clabo.messages) compile per message when first used.
+A bot that only greets, or one restarted after a crash, skips all of
+it.  run() uses uvloop when it is installed.
+
+--startup-profile, on any bot (or clabo.fleet, which passes it on),
+logs where start-up went: interpreter start, every module the bot
+imported itself, slowest first, and the connect / authenticate / room
+entry phases:
+
+    CLABO_OFFLINE=1 python clabo-bot-claude.py --startup-profile
+
+Import this module first in an entry point so the imports after it
+are timed.
+
+Environment:
+    CLABO_UVLOOP=1          0 keeps asyncio's default event loop
+"""
+
+import builtins
+import contextlib
+import logging
+import os
+import sys
+import time
+
+log = logging.getLogger(__name__)
+
+PROFILE = "--startup-profile" in sys.argv
+USE_UVLOOP = os.environ.get("CLABO_UVLOOP", "1") != "0"
+
+
+def _process_age():
+    """Seconds since this process started (Linux, 10 ms resolution)."""
+    try:
+        with open("/proc/self/stat") as f:
+            started = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(0.0, uptime - started / os.sysconf("SC_CLK_TCK"))
+
+
+class StartupProfile:
+    """Times first imports made outside other imports, and named phases."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.interpreter = _process_age()
+        self.imports = []          # (module, seconds) incl. what it imported
+        self.phases = []           # (name, seconds)
+        self.loop = "asyncio"
+        self.depth = 0
+        self.real_import = None
+
+    def install(self) -> None:
+        self.real_import = real = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if self.depth or level or name in sys.modules:
+                return real(name, globals, locals, fromlist, level)
+            self.depth += 1
+            start = time.perf_counter()
+            try:
+                return real(name, globals, locals, fromlist, level)
+            finally:
+                self.depth -= 1
+                self.imports.append((name, time.perf_counter() - start))
+
+        builtins.__import__ = timed_import
+
+    def uninstall(self) -> None:
+        if self.real_import is not None:
+            builtins.__import__ = self.real_import
+            self.real_import = None
+
+    def report(self, top: int = 12) -> None:
+        self.uninstall()       # the hook is not thread-safe; later imports stay untimed
+        ms = 1000
+        total = time.perf_counter() - self.origin
+        imported = sum(seconds for _, seconds in self.imports)
+        log.info("[*] Startup profile (%s loop):", self.loop)
+        if self.interpreter is not None:
+            log.info("      %-28s %8.1f ms", "interpreter", self.interpreter * ms)
+        log.info("      %-28s %8.1f ms  (%s modules)", "imports", imported * ms, len(self.imports))
+        for name, seconds in sorted(self.imports, key=lambda i: -i[1])[:top]:
+            log.info("        %-26s %8.1f ms", name, seconds * ms)
+        for name, seconds in self.phases:
+            log.info("      %-28s %8.1f ms", name, seconds * ms)
+        log.info("      %-28s %8.1f ms", "total", (total + (self.interpreter or 0)) * ms)
+
+
+profile = StartupProfile() if PROFILE else None
+if profile is not None:
+    profile.install()
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """Time a start-up phase (no-op without --startup-profile)."""
+    if profile is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.phases.append((name, time.perf_counter() - start))
+
+
+def report() -> None:
+    """Log the start-up profile once the bot is up (first call only)."""
+    global profile
+    if profile is not None:
+        profile.report()
+        profile = None
+
+
+def run(main):
+    """asyncio.run(main), on uvloop when it is installed."""
+    import asyncio          # here, so the profile counts it with the bot's imports
+
+    if USE_UVLOOP:
+        try:
+            import uvloop
+        except ImportError:
+            uvloop = None
+        if uvloop is not None:
+            asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            if profile is not None:
+                profile.loop = "uvloop"
+    return asyncio.run(main)
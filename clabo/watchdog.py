@@ -0,0 +1,198 @@
+"""
+Event-loop lag watchdog and on-demand sampling profiler.
+
+LoopWatchdog runs a heartbeat task on the loop and a daemon thread that
+watches it.  When the heartbeat is late by more than `threshold`
+seconds, the thread grabs the loop thread's current stack and the name
+of the running task, so a blocking call (subprocess.run, a slow parse,
+a synchronous write) is logged with where it happened:
+
+    [!] Loop blocked 0.84s in task 'Task-1': subprocess.py:communicate <- ... <- connection.py:run_sql
+
+SamplingProfiler samples the loop thread's stack every few milliseconds
+and writes folded stacks ("task;file:func;file:func count" per line),
+the input format of flamegraph.pl and speedscope.  Toggle it on a
+running bot with SIGUSR2 (or "profile" on its control socket, see
+clabo.control); each stop writes
+<CLABO_PROFILE_DIR>/<name>-<pid>-<time>.folded.
+
+Environment:
+    CLABO_WATCHDOG=0            disable the watchdog
+    CLABO_LAG_THRESHOLD=0.25    seconds of lag reported as a stall
+    CLABO_PROFILE_DIR=/tmp      where profiles are written
+"""
+
+import asyncio
+import collections
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+WATCHDOG = os.environ.get("CLABO_WATCHDOG", "1") == "1"
+LAG_THRESHOLD = float(os.environ.get("CLABO_LAG_THRESHOLD", "0.25"))
+PROFILE_DIR = os.environ.get("CLABO_PROFILE_DIR", "/tmp")
+
+MAX_DEPTH = 64
+
+
+def _stack(frame, depth: int = MAX_DEPTH) -> list:
+    """Innermost-first list of "file:func" for a frame."""
+    frames = []
+    while frame is not None and len(frames) < depth:
+        code = frame.f_code
+        frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+        frame = frame.f_back
+    return frames
+
+
+def _task_name(loop) -> str:
+    try:
+        task = asyncio.current_task(loop)
+    except RuntimeError:
+        return "-"
+    return task.get_name() if task is not None else "loop"
+
+
+class LoopWatchdog:
+    """Reports event-loop stalls with the blocking stack and task name."""
+
+    def __init__(self, threshold: float = LAG_THRESHOLD, interval: float = 0.05):
+        self.threshold = threshold
+        self.interval = interval
+        self.loop = None
+        self.thread_id = None
+        self.beat = 0.0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self.reported = False
+        self.stopped = threading.Event()
+        self.task = None
+
+    def start(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        self.beat = time.monotonic()
+        self.task = self.loop.create_task(self._heartbeat(), name="watchdog")
+        threading.Thread(target=self._watch, name="loop-watchdog", daemon=True).start()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.max_lag = max(self.max_lag, now - expected)
+            if self.reported:
+                log.warning("[!] Loop unblocked after %.2fs", now - self.beat - self.interval)
+                self.reported = False
+            self.beat = now
+
+    def _watch(self) -> None:
+        while not self.stopped.wait(self.interval):
+            stalled = time.monotonic() - self.beat - self.interval
+            if stalled < self.threshold or self.reported:
+                continue
+            frame = sys._current_frames().get(self.thread_id)
+            stack = _stack(frame, 6)
+            self.reported = True
+            self.stalls += 1
+            log.warning("[!] Loop blocked %.2fs in task %r: %s", stalled,
+                        _task_name(self.loop), " <- ".join(stack) or "?",
+                        extra={"event": "loop_stall", "stack": stack})
+
+    async def stop(self) -> None:
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        log.info("[*] Loop lag: max %.0fms, %s stalls over %.0fms",
+                 self.max_lag * 1000, self.stalls, self.threshold * 1000)
+
+
+class SamplingProfiler:
+    """Folded-stack sampler for the event-loop thread."""
+
+    def __init__(self, name: str, interval: float = 0.005, out_dir: str = PROFILE_DIR):
+        self.name = name
+        self.interval = interval
+        self.out_dir = out_dir
+        self.loop = None
+        self.thread_id = None
+        self.counts = collections.Counter()
+        self.samples = 0
+        self.stopped = None
+        self.thread = None
+
+    @property
+    def running(self) -> bool:
+        return self.thread is not None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        self.counts.clear()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self.thread.start()
+        log.info("[*] Profiler started (every %.0fms)", self.interval * 1000)
+
+    def _sample(self) -> None:
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = _stack(frame)
+            stack.reverse()
+            task = _task_name(self.loop)
+            self.counts[";".join([f"task:{task}"] + stack)] += 1
+            self.samples += 1
+
+    def stop(self) -> str:
+        """Stop sampling and write the folded stacks; returns the path."""
+        if not self.running:
+            return ""
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+        os.makedirs(self.out_dir, exist_ok=True)
+        path = os.path.join(self.out_dir, f"{self.name}-{os.getpid()}-{int(time.time())}.folded")
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+        log.info("[*] Profiler stopped: %s samples → %s", self.samples, path)
+        return path
+
+    def toggle(self) -> str:
+        if self.running:
+            return self.stop()
+        self.start()
+        return ""
+
+
+def install(name: str):
+    """Start the lag watchdog (unless disabled) and bind SIGUSR2 to the
+    profiler; returns (watchdog or None, profiler)."""
+    loop = asyncio.get_running_loop()
+    watchdog = None
+    if WATCHDOG:
+        watchdog = LoopWatchdog()
+        watchdog.start()
+    profiler = SamplingProfiler(name)
+    try:
+        loop.add_signal_handler(signal.SIGUSR2, profiler.toggle)
+    except (NotImplementedError, AttributeError, RuntimeError):
+        pass  # no signal support here (e.g. not the main thread)
+    return watchdog, profiler
+
+
+async def uninstall(watchdog, profiler) -> None:
+    profiler.stop()
+    if watchdog is not None:
+        await watchdog.stop()
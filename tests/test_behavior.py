@@ -0,0 +1,31 @@
+"""Behavior compilation (clabo.behavior)."""
+
+import pytest
+
+from clabo.behavior import OP_BRANCH, OP_CHOOSE, BehaviorError, compile_behavior
+
+
+def spec(*steps):
+    return {"name": "t", "steps": [{"label": "a", "pause": 1}, {"label": "b", "pause": 2}, *steps]}
+
+
+def test_choose_compiles_to_weighted_jump():
+    program = compile_behavior(spec({"choose": [[1, "a"], [3, "b"]]}))
+    code, cumulative, targets = program.ops[-1]
+    assert code == OP_CHOOSE
+    assert cumulative == [0.25, 1.0]
+    assert targets == [0, 1]
+
+
+def test_choose_with_condition():
+    program = compile_behavior(spec({"if": "guests_in_room", "else": "a", "choose": [[1, "b"]]}))
+    assert [op[0] for op in program.ops[-2:]] == [OP_BRANCH, OP_CHOOSE]
+
+
+@pytest.mark.parametrize("key, value", [
+    ("log", "x"), ("walk", [1, 2]), ("arrive", 1), ("do", "wave"),
+    ("say", "hi"), ("shout", "hi"), ("pause", 1), ("goto", "a"),
+])
+def test_choose_rejects_actions_it_would_skip(key, value):
+    with pytest.raises(BehaviorError, match=key):
+        compile_behavior(spec({"choose": [[1, "a"]], key: value}))
@@ -0,0 +1,17 @@
+"""Round-trip properties of the packet codec (see clabo.bench --check)."""
+
+import random
+
+import pytest
+
+from clabo.bench import PROPERTIES
+
+EXAMPLES = 300
+
+
+@pytest.mark.parametrize("prop", PROPERTIES, ids=lambda prop: prop.__name__)
+@pytest.mark.parametrize("seed", [0, 1])
+def test_property(prop, seed):
+    rng = random.Random(seed)
+    for _ in range(EXAMPLES):
+        prop(rng)
@@ -0,0 +1,113 @@
+"""assets/flash_texts.py against a local stand-in for www.habbo.<tld>."""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from flash_texts import TLDS, WORKERS, fetch_external_texts
+
+DELAY = 0.2  # per request, so overlapping requests are visible
+
+
+class StandIn(ThreadingHTTPServer):
+    """Serves versioned texts with ETags; TLDs in `fail` answer 500."""
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.version = dict.fromkeys(TLDS, 1)
+        self.fail = set()
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        self.base_url = f'http://127.0.0.1:{self.server_address[1]}/{{tld}}/gamedata/external_flash_texts/0'
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        state = self.server
+        tld = self.path.split('/')[1]
+        with state.lock:
+            state.requests += 1
+            state.in_flight += 1
+            state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            time.sleep(DELAY)
+            if tld not in state.version or tld in state.fail:
+                self.send_error(500 if tld in state.fail else 404)
+                return
+            etag = f'"{tld}-{state.version[tld]}"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            body = f'badge_name_ACH_{tld}=Ünïcode {tld} v{state.version[tld]}\nbadge_desc_ACH_{tld}=a=b\n'.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; charset=utf-8')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', 'Mon, 19 Oct 2026 00:00:00 GMT')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with state.lock:
+                state.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = StandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def statuses(results):
+    return {result.status for result in results.values()}
+
+
+def test_concurrent_fetch_and_revalidation(server, tmp_path):
+    def fetch(**kwargs):
+        return fetch_external_texts(TLDS, server.base_url, str(tmp_path), workers=WORKERS, **kwargs)
+
+    started = time.monotonic()
+    first = fetch()
+    elapsed = time.monotonic() - started
+    assert statuses(first) == {'downloaded'}
+    assert first['de'].text.startswith('badge_name_ACH_de=Ünïcode de v1')
+    assert 1 < server.max_in_flight <= WORKERS
+    assert elapsed < DELAY * len(TLDS), 'no faster than one by one'
+    assert list(first) == TLDS
+
+    second = fetch()
+    assert statuses(second) == {'not modified'}
+    assert all(second[tld].text == first[tld].text for tld in TLDS)
+
+    server.version['de'] = 2
+    server.fail.add('fi')
+    third = fetch()
+    assert third['de'].status == 'downloaded' and 'v2' in third['de'].text
+    assert third['fi'].status == 'stale' and third['fi'].text == first['fi'].text
+
+    before = server.requests
+    offline = fetch(offline=True)
+    assert statuses(offline) == {'cached'} and server.requests == before
+    assert 'v2' in offline['de'].text
+
+
+def test_offline_without_cache(server, tmp_path):
+    missing = fetch_external_texts(['de'], server.base_url, str(tmp_path), offline=True)
+    assert missing['de'].status == 'failed' and missing['de'].text is None
+    assert server.requests == 0
+
+
+def test_unknown_tld(server, tmp_path):
+    unknown = fetch_external_texts(['xx'], server.base_url, str(tmp_path))
+    assert unknown['xx'].status == 'failed' and unknown['xx'].text is None
@@ -0,0 +1,39 @@
+"""Heatmap sampling on the shared Scheduler (clabo.heatmap)."""
+
+import asyncio
+
+from clabo import heatmap
+from clabo.heatmap import HeatmapSampler
+from clabo.scheduler import PRIORITY_PATROL, Scheduler
+
+
+class Counts:
+    """Stands in for Heatmap: counts add() calls."""
+
+    flush_interval = 3600.0
+
+    def __init__(self):
+        self.samples = 0
+
+    def add(self, positions):
+        self.samples += 1
+
+    async def flush(self):
+        pass
+
+
+def test_samples_keep_arriving_while_owner_is_held(monkeypatch):
+    monkeypatch.setattr(heatmap, "MOVE_TICK", 0.02)
+
+    async def run():
+        scheduler = Scheduler(resolution=0.005)
+        counts = Counts()
+        sampler = HeatmapSampler(counts, scheduler, lambda: [(1, 1)], owner="bot")
+        sampler.start()
+        with scheduler.hold("bot"), scheduler.hold("bot", PRIORITY_PATROL):
+            await asyncio.sleep(0.3)
+            held = counts.samples
+        await scheduler.close()
+        return held
+
+    assert asyncio.run(run()) >= 5
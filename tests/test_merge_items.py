@@ -0,0 +1,90 @@
+"""Streaming JSON reader and writer of assets/merge_items.py."""
+
+import io
+import json
+import random
+
+import pytest
+
+from merge_items import JsonStream, JsonWriter, dump_at
+
+CHUNK_SIZES = range(1, 8)
+FORMATS = [
+    {},
+    {'indent': 2},
+    {'separators': (',', ':')},
+    {'indent': 2, 'ensure_ascii': False},
+]
+
+
+def random_value(rng: random.Random, depth: int = 0):
+    kinds = ['int', 'float', 'str', 'literal'] + (['list', 'dict'] * 2 if depth < 4 else [])
+    kind = rng.choice(kinds)
+    if kind == 'int':
+        return rng.choice([0, -1, 7, 10 ** rng.randrange(1, 20), -rng.randrange(1, 10 ** 6)])
+    if kind == 'float':
+        return rng.choice([3.14, -2.5e10, 1e-07, 0.5, -0.0, 123456.789, 2.5e+300])
+    if kind == 'str':
+        return ''.join(rng.choice('ab "\\/\n\tüß€😀') for _ in range(rng.randrange(0, 6)))
+    if kind == 'literal':
+        return rng.choice([True, False, None])
+    if kind == 'list':
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(0, 4))]
+    return {random_value(rng, 4) if rng.random() < 0.5 else f'k{i}': random_value(rng, depth + 1)
+            for i in range(rng.randrange(0, 4))}
+
+
+def copy(stream: JsonStream, out: io.StringIO, level: int = 0) -> None:
+    """Re-write the next value member by member, the way merge_items does."""
+    char = stream.peek()
+    if char == '{':
+        writer = JsonWriter(out, level + 1, '{}')
+        for key in stream.members():
+            writer.key(key)
+            copy(stream, out, level + 1)
+        writer.close()
+    elif char == '[':
+        writer = JsonWriter(out, level + 1, '[]')
+        for element in stream.elements():
+            writer.add(element)
+        writer.close()
+    else:
+        out.write(dump_at(stream.value(), level))
+
+
+@pytest.mark.parametrize('text, chunk_size', [('[3.14]', 1), ('[1, -2.5e10]', 3), ('[2.5e-3,4]', 4)])
+def test_number_cut_by_chunk_boundary(text, chunk_size):
+    assert list(JsonStream(io.StringIO(text), chunk_size).elements()) == json.loads(text)
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_stream_decodes_like_json_loads(seed, chunk_size):
+    rng = random.Random(seed)
+    doc = random_value(rng)
+    text = json.dumps(doc, **rng.choice(FORMATS))
+    stream = JsonStream(io.StringIO(text), chunk_size)
+    value, raw = stream.value(raw=True)
+    assert value == json.loads(text)
+    assert json.loads(raw) == value
+    assert stream.peek() == ''
+
+
+@pytest.mark.parametrize('seed', range(20))
+@pytest.mark.parametrize('chunk_size', CHUNK_SIZES)
+def test_stream_copy_matches_json_dump(seed, chunk_size):
+    rng = random.Random(seed)
+    doc = {'roomitemtypes': {'furnitype': [random_value(rng) for _ in range(3)]},
+           'wallitemtypes': random_value(rng)}
+    text = json.dumps(doc, **rng.choice(FORMATS))
+    out = io.StringIO()
+    copy(JsonStream(io.StringIO(text), chunk_size), out)
+    expected = io.StringIO()
+    json.dump(doc, expected, indent=2, ensure_ascii=False)
+    assert out.getvalue() == expected.getvalue()
+
+
+@pytest.mark.parametrize('text', ['[1 2]', '{"a" 1}', '[1,', '{"a": tru}'])
+def test_stream_rejects_invalid_json(text):
+    with pytest.raises(ValueError, match='Invalid JSON'):
+        copy(JsonStream(io.StringIO(text), 2), io.StringIO())
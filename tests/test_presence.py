@@ -0,0 +1,32 @@
+"""Shared AI reply cache (clabo.presence)."""
+
+import asyncio
+
+from clabo.presence import ResponseCache
+
+
+def test_clear_drops_replies_and_in_flight_calls():
+    async def run():
+        cache = ResponseCache()
+        persona = ["old"]
+        release = asyncio.Event()
+
+        async def fetch():
+            voice = persona[0]
+            await release.wait()
+            return f"{voice} reply"
+
+        release.set()
+        assert await cache.get("ann", "what is this hotel", fetch) == "old reply"
+        release.clear()
+        slow = asyncio.create_task(cache.get("bob", "where is the pool", fetch))
+        await asyncio.sleep(0)
+        persona[0] = "new"
+        assert cache.clear() == 1
+        release.set()
+        assert await slow == "old reply"                 # answered, but not kept
+        assert await cache.get("cat", "where is the pool", fetch) == "new reply"
+        assert await cache.get("dan", "what is this hotel", fetch) == "new reply"
+        return cache.summary()
+
+    assert asyncio.run(run()) == {"entries": 2, "hits": 0, "misses": 4}